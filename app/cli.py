@@ -0,0 +1,101 @@
+"""
+Comandos de mantenimiento.
+
+Uso (desde la raíz del repo):
+    python -m app.cli rebuild-cooccurrences
+    python -m app.cli rebuild-sales
+    python -m app.cli refresh-sales-windows
+    python -m app.cli sweep-reservations
+    python -m app.cli rebuild-sales-rollups
+"""
+import argparse
+from datetime import datetime
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.schema import upgrade_schema
+from app.repositories.cooccurrence_repository import CooccurrenceRepository
+from app.repositories.sales_repository import SalesRepository
+from app.repositories.sales_rollup_repository import SalesRollupRepository
+from app.services.reservation_service import ReservationService
+
+
+def rebuild_cooccurrences(args: argparse.Namespace) -> None:
+    """Recalcula los conteos de "comprados juntos" desde el historial de órdenes."""
+    db = SessionLocal()
+    try:
+        pairs = CooccurrenceRepository(db).rebuild()
+    finally:
+        db.close()
+    print(f"Co-ocurrencias recalculadas: {pairs} pares de productos.")
+
+
+def rebuild_sales(args: argparse.Namespace) -> None:
+    """Recalcula los contadores de ventas (histórico y ventanas) desde el historial de órdenes."""
+    db = SessionLocal()
+    try:
+        products = SalesRepository(db).rebuild(datetime.utcnow().date())
+    finally:
+        db.close()
+    print(f"Ventas recalculadas: {products} productos con ventas.")
+
+
+def refresh_sales_windows(args: argparse.Namespace) -> None:
+    """Mueve las ventanas de 7 y 30 días al día actual (para programarlo al cambiar de día)."""
+    db = SessionLocal()
+    try:
+        updated = SalesRepository(db).refresh_windows(datetime.utcnow().date())
+    finally:
+        db.close()
+    print(f"Ventanas de ventas actualizadas: {updated} productos.")
+
+
+def sweep_reservations(args: argparse.Namespace) -> None:
+    """Borra las reservas de stock vencidas (la API también lo hace sola, como mucho una vez por minuto)."""
+    db = SessionLocal()
+    try:
+        deleted = ReservationService(db).sweep()
+    finally:
+        db.close()
+    print(f"Reservas vencidas borradas: {deleted}.")
+
+
+def rebuild_sales_rollups(args: argparse.Namespace) -> None:
+    """Recalcula los acumulados del dashboard (por día, categoría y localidad) desde el historial de órdenes."""
+    db = SessionLocal()
+    try:
+        rows = SalesRollupRepository(db).rebuild()
+    finally:
+        db.close()
+    print(f"Acumulados de ventas recalculados: {rows} filas diarias.")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "rebuild-cooccurrences", help="Recalcula la tabla de productos comprados juntos."
+    ).set_defaults(handler=rebuild_cooccurrences)
+    commands.add_parser(
+        "rebuild-sales", help="Recalcula los contadores de ventas por producto."
+    ).set_defaults(handler=rebuild_sales)
+    commands.add_parser(
+        "refresh-sales-windows", help="Actualiza las ventanas de ventas de 7 y 30 días."
+    ).set_defaults(handler=refresh_sales_windows)
+    commands.add_parser(
+        "sweep-reservations", help="Borra las reservas de stock vencidas."
+    ).set_defaults(handler=sweep_reservations)
+    commands.add_parser(
+        "rebuild-sales-rollups", help="Recalcula los acumulados de ventas del dashboard."
+    ).set_defaults(handler=rebuild_sales_rollups)
+
+    args = parser.parse_args(argv)
+
+    # Igual que al arrancar la API: las tablas e índices nuevos deben existir
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
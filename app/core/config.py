@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,4 +10,39 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 120
 
+    # Caché en memoria del catálogo (detalle y listados de productos)
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+    CATALOG_CACHE_TTL_SECONDS: int = 60
+
+    # Serialización directa a JSON con TypeAdapters precompilados (ver app/core/rendering.py)
+    FAST_JSON_RENDERING: bool = False
+
+    # Motor columnar en memoria para los listados (requiere numpy, ver app/services/columnar_catalog.py)
+    COLUMNAR_CATALOG_ENABLED: bool = False
+    COLUMNAR_CATALOG_REFRESH_SECONDS: float = 5
+    COLUMNAR_CATALOG_FULL_RELOAD_SECONDS: float = 600
+
+    # Almacenamiento de carritos: "sql" (cada cambio se confirma en la BD) o "memory"
+    # (en memoria del proceso, persistido por lotes cada CART_STORE_FLUSH_SECONDS)
+    CART_STORE_BACKEND: str = "sql"
+    CART_STORE_FLUSH_SECONDS: float = 1.0
+    CART_STORE_IDLE_SECONDS: float = 900
+
+    # Reservas de stock al agregar al carrito (ver app/services/reservation_service.py)
+    STOCK_RESERVATIONS_ENABLED: bool = False
+    STOCK_RESERVATION_TTL_SECONDS: int = 900
+    STOCK_RESERVATION_SWEEP_SECONDS: int = 60
+
+    # Header Idempotency-Key de POST /orders (ver app/services/idempotency_service.py)
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_WAIT_SECONDS: float = 5
+
+    # Checkout en cola con commit agrupado para productos de venta flash (ver app/services/flash_sale.py).
+    # Ej: FLASH_SALE_PRODUCT_IDS='[12, 34]'
+    FLASH_SALE_PRODUCT_IDS: List[int] = []
+    FLASH_SALE_BATCH_SIZE: int = 100
+    # Espera máxima de un request por su lote (luego responde 504)
+    FLASH_SALE_WAIT_SECONDS: float = 30
+
 settings = Settings()
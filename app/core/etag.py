@@ -0,0 +1,29 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fuerte (entre comillas) derivado de los valores que definen la representación."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Compara el header If-None-Match con el ETag actual.
+    Acepta listas separadas por coma, "*" y etiquetas débiles (W/), como indica RFC 9110.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo para un recurso que el cliente ya tiene."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido o no corresponde al orden solicitado."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(scope: str, value: Any, last_id: int) -> str:
+    """
+    Genera un cursor opaco a partir del último elemento de la página.
+    `scope` identifica el orden (ej: "price:asc") para rechazar cursores
+    reutilizados con otro criterio de ordenamiento.
+    """
+    payload = {"s": scope, "v": _encode_value(value), "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], scope: str) -> Optional[Tuple[Any, int]]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+    Retorna la tupla (valor, id) o None si no se envió cursor.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = _decode_value(payload["v"]), int(payload["id"])
+        cursor_scope = payload["s"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Cursor de paginación inválido.") from e
+
+    if cursor_scope != scope:
+        raise InvalidCursorError("El cursor no corresponde al ordenamiento solicitado.")
+
+    return value, last_id
@@ -0,0 +1,43 @@
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+class SchemaRenderer:
+    """
+    Ruta rápida de serialización para un esquema de respuesta.
+
+    El TypeAdapter se compila una sola vez (a nivel de módulo) y serializa directo a
+    bytes JSON con pydantic-core, sin pasar por jsonable_encoder ni por json.dumps.
+    Es opcional (settings.FAST_JSON_RENDERING): desactivada, `respond` devuelve los
+    datos tal cual y FastAPI los valida con el `response_model` del endpoint.
+    """
+
+    def __init__(self, schema: Any):
+        self.adapter = TypeAdapter(schema)
+
+    def render(self, data: Any) -> bytes:
+        """Valida (leyendo atributos de objetos ORM/DTO) y serializa a JSON."""
+        validated = self.adapter.validate_python(data, from_attributes=True)
+        return self.adapter.dump_json(validated)
+
+    def respond(self, data: Any, status_code: int = 200, response: Optional[Response] = None) -> Any:
+        """
+        Respuesta ya serializada si la ruta rápida está activa; si no, los datos sin tocar.
+        `response` es el Response inyectado por FastAPI: sus headers (ej: ETag) se conservan.
+        """
+        if not settings.FAST_JSON_RENDERING:
+            return data
+
+        headers = dict(response.headers) if response is not None else None
+        if headers:
+            headers.pop("content-length", None)
+        return Response(
+            content=self.render(data),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
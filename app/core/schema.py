@@ -0,0 +1,87 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+from .database import Base
+from .upsert import check_upsert_support
+
+# Tabla FTS5 de la búsqueda de productos en SQLite (la consulta está en ProductSearch)
+FTS_TABLE = "products_fts"
+
+# Índice FTS5 de contenido externo: guarda solo el índice invertido, el texto vive en `products`.
+# Los triggers lo mantienen sincronizado con cada INSERT/UPDATE/DELETE.
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, description, sku,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, sku)
+        VALUES (new.id, new.name, new.description, new.sku);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, sku)
+        VALUES ('delete', old.id, old.name, old.description, old.sku);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description, sku ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, sku)
+        VALUES ('delete', old.id, old.name, old.description, old.sku);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, sku)
+        VALUES (new.id, new.name, new.description, new.sku);
+    END
+    """,
+]
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Complementa `Base.metadata.create_all`: create_all no toca tablas existentes,
+    así que las columnas generadas e índices declarados después de crear una tabla
+    se agregan aquí.
+    También prepara el índice de búsqueda: en MariaDB es el índice FULLTEXT
+    declarado en Product; en SQLite, la tabla virtual FTS5 y sus triggers.
+    Es idempotente y se ejecuta en cada arranque, donde también se rechazan los motores
+    sin upsert.
+    """
+    check_upsert_support(engine)
+    with engine.begin() as conn:
+        add_missing_columns(conn, "products", ["stock_margin"])
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+        if engine.dialect.name == "sqlite":
+            ensure_sqlite_search_index(conn)
+
+
+def add_missing_columns(conn: Connection, table_name: str, column_names: list) -> None:
+    """Agrega (ALTER TABLE) columnas del modelo que todavía no existen en una tabla ya creada."""
+    table = Base.metadata.tables[table_name]
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    for name in column_names:
+        if name not in existing:
+            column_ddl = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+
+
+def ensure_sqlite_search_index(conn: Connection) -> None:
+    """Crea la tabla FTS5 y sus triggers si faltan, indexando los productos existentes."""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+
+    for statement in SQLITE_FTS_DDL:
+        conn.exec_driver_sql(statement)
+
+    if not exists:
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
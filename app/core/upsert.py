@@ -0,0 +1,80 @@
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy import Select, Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import Engine, Result
+from sqlalchemy.orm import Session
+
+
+# Motores con INSERT ... ON DUPLICATE KEY / ON CONFLICT (ver _execute)
+UPSERT_DIALECTS = ("mysql", "mariadb", "sqlite", "postgresql")
+
+
+def check_upsert_support(engine: Engine) -> None:
+    """
+    Falla al arrancar (y no a mitad de un request) si el motor no admite los upserts
+    que usan el checkout, el carrito y las importaciones.
+    """
+    if engine.dialect.name not in UPSERT_DIALECTS:
+        raise RuntimeError(
+            f"El motor '{engine.dialect.name}' no está soportado: DATABASE_URL debe apuntar a "
+            f"{', '.join(UPSERT_DIALECTS)}."
+        )
+
+
+def upsert(
+    db: Session,
+    table: Table,
+    rows: List[Dict[str, Any]],
+    key_columns: Sequence[str],
+    update: Callable[[Any], Dict[str, Any]],
+) -> Result:
+    """
+    INSERT de varias filas en una sola sentencia que actualiza las existentes:
+    ON DUPLICATE KEY UPDATE en MariaDB/MySQL y ON CONFLICT DO UPDATE en SQLite/PostgreSQL.
+
+    `key_columns` es la clave única en conflicto (la usan SQLite y PostgreSQL; MySQL usa
+    cualquier clave única). `update(incoming)` recibe las columnas de la fila entrante
+    (`inserted` en MySQL, `excluded` en el resto) y devuelve el SET a aplicar.
+    No hace commit: forma parte de la transacción del llamador.
+    """
+    return _execute(db, table, lambda stmt: stmt.values(rows), key_columns, update)
+
+
+def upsert_from_select(
+    db: Session,
+    table: Table,
+    columns: Sequence[str],
+    select: Select,
+    key_columns: Sequence[str],
+    update: Callable[[Any], Dict[str, Any]],
+) -> Result:
+    """
+    Como `upsert`, pero las filas salen de un SELECT (INSERT ... SELECT ... ON CONFLICT):
+    permite condicionar la escritura a otras tablas en la misma sentencia.
+    El `rowcount` del resultado es 0 si el SELECT no devolvió filas.
+    """
+    return _execute(db, table, lambda stmt: stmt.from_select(list(columns), select), key_columns, update)
+
+
+def _execute(
+    db: Session,
+    table: Table,
+    source: Callable[[Any], Any],
+    key_columns: Sequence[str],
+    update: Callable[[Any], Dict[str, Any]],
+) -> Result:
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = source(mysql.insert(table))
+        stmt = stmt.on_duplicate_key_update(**update(stmt.inserted))
+    elif dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = source(insert(table))
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=update(stmt.excluded))
+    else:
+        # No debería pasar: check_upsert_support lo rechaza al arrancar
+        raise NotImplementedError(f"UPSERT no soportado para el motor '{dialect}'.")
+
+    return db.execute(stmt)
@@ -2,11 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.database import Base, engine
-from .routers import order_router, product_router, category_router, cart_item_router, health_router, auth_router, cart_router
+from app.core.schema import upgrade_schema
+from .routers import order_router, product_router, category_router, cart_item_router, health_router, auth_router, cart_router, dashboard_router
 from fastapi.middleware.cors import CORSMiddleware
 
 
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
 app = FastAPI(title="E-Commerce API")
 
@@ -30,6 +32,7 @@ app.include_router(category_router)
 app.include_router(cart_router)
 app.include_router(cart_item_router)
 app.include_router(order_router)
+app.include_router(dashboard_router)
 
 
 
@@ -2,4 +2,11 @@ from .product import Product
 from .category import Category
 from .cart_item import CartItem
 from .cart import Cart
-from .user import User
\ No newline at end of file
+from .user import User
+from .order import Order
+from .order_item import OrderItem
+from .product_cooccurrence import ProductCooccurrence
+from .product_sales import ProductSales, ProductSalesDaily
+from .stock_reservation import StockReservation
+from .idempotency_key import IdempotencyKey
+from .sales_rollup import SalesDaily, SalesCategoryDaily, SalesMonthly, SalesCategoryMonthly
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, PrimaryKeyConstraint, Index
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from app.core.database import Base
+from datetime import datetime
+
+class IdempotencyKey(Base):
+    """
+    Header Idempotency-Key de un POST /orders, por usuario. Guarda la huella del cuerpo
+    de la solicitud y la respuesta ya serializada, para devolverla en los reintentos sin
+    repetir el checkout. Mientras `response` es NULL la solicitud está en curso.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    # Se fija en la misma transacción que crea la orden: si el proceso cae antes de guardar
+    # la respuesta, el reintento la arma desde la orden
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="SET NULL"))
+    # MEDIUMTEXT en MariaDB: una orden grande puede pasar los 64 KB de TEXT
+    response = Column(Text().with_variant(MEDIUMTEXT(), "mysql", "mariadb"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "key"),
+        # Barrido de vencidas
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -1,5 +1,5 @@
 # app/models/order.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
@@ -24,4 +24,12 @@ class Order(Base):
         back_populates="order", 
         cascade="all, delete-orphan"
     )
+
+    __table_args__ = (
+        # Historial de un usuario paginado por keyset sobre (order_date, id)
+        Index("ix_orders_user_date_id", "user_id", "order_date", "id"),
+        # Consola de administración: filtro por estado y listado general, por keyset
+        Index("ix_orders_status_date_id", "status", "order_date", "id"),
+        Index("ix_orders_order_date_id", "order_date", "id"),
+    )
     
\ No newline at end of file
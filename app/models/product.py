@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, CheckConstraint, Index, Computed, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from datetime import datetime
 
+# Valores posibles de Product.stock_status
+STOCK_STATUSES = ("Normal", "Alerta", "Agotado")
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -17,8 +21,20 @@ class Product(Base):
     sku = Column(String(50), nullable=False, unique=True, index=True) 
     stock_current = Column(Integer, default=0, nullable=False) 
     stock_min = Column(Integer, default=10, nullable=False) 
+    # Margen sobre el mínimo (columna generada, no se escribe). <= 0 es Alerta o Agotado.
+    stock_margin = Column(Integer, Computed("stock_current - stock_min", persisted=False))
     __table_args__ = (
         CheckConstraint('stock_current >= 0', name='check_stock_non_negative'),
+        # Índices compuestos para la paginación por keyset (columna de orden + id)
+        Index('ix_products_price_id', 'price', 'id'),
+        Index('ix_products_name_id', 'name', 'id'),
+        Index('ix_products_created_at_id', 'created_at', 'id'),
+        Index('ix_products_stock_margin_id', 'stock_margin', 'id'),
+        # Lectura incremental de cambios (snapshot columnar del catálogo)
+        Index('ix_products_updated_at', 'updated_at'),
+        # Búsqueda de texto completo (en SQLite se usa FTS5, ver product_search.py)
+        Index('ft_products_search', 'name', 'description', 'sku', mysql_prefix='FULLTEXT')
+            .ddl_if(dialect=('mysql', 'mariadb')),
     )
     
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -26,7 +42,7 @@ class Product(Base):
 
     category = relationship("Category", back_populates="products")
 
-    @property
+    @hybrid_property
     def stock_status(self) -> str:
         """
         Calcula el estado del stock: Normal, Alerta o Agotado.
@@ -38,4 +54,14 @@ class Product(Base):
             return "Alerta"
 
         else:
-            return "Normal"
\ No newline at end of file
+            return "Normal"
+
+    @stock_status.inplace.expression
+    @classmethod
+    def _stock_status_expression(cls):
+        """La misma regla evaluada en SQL (para filtrar, agrupar y proyectar)."""
+        return case(
+            (cls.stock_current == 0, "Agotado"),
+            (cls.stock_margin <= 0, "Alerta"),
+            else_="Normal",
+        )
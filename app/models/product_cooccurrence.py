@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint, Index
+from app.core.database import Base
+
+class ProductCooccurrence(Base):
+    """
+    Cantidad de órdenes en las que se compraron juntos dos productos.
+    Se guarda en ambos sentidos (A->B y B->A) para que leer los relacionados de un
+    producto sea un rango del índice (product_id, order_count).
+    """
+    __tablename__ = "product_cooccurrences"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    related_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    order_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("product_id", "related_product_id"),
+        # Top-K de relacionados: los de más órdenes en común primero
+        Index("ix_cooccurrence_top", "product_id", "order_count", "related_product_id"),
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, PrimaryKeyConstraint, Index
+from app.core.database import Base
+
+class ProductSalesDaily(Base):
+    """Unidades vendidas de un producto en un día (UTC). Base de las ventanas móviles."""
+    __tablename__ = "product_sales_daily"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    units = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("product_id", "day"),
+    )
+
+
+class ProductSales(Base):
+    """
+    Contadores de ventas por producto: histórico y ventanas de 7 y 30 días.
+    `window_day` es el día para el que están calculadas las ventanas; al cambiar de día
+    se recalculan desde ProductSalesDaily (ver SalesService).
+    """
+    __tablename__ = "product_sales"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    units_total = Column(Integer, nullable=False, default=0)
+    units_7d = Column(Integer, nullable=False, default=0)
+    units_30d = Column(Integer, nullable=False, default=0)
+    window_day = Column(Date, nullable=False)
+
+    __table_args__ = (
+        # Rankings por índice: cada ventana ordenada con el id como desempate
+        Index("ix_product_sales_total", "units_total", "product_id"),
+        Index("ix_product_sales_7d", "units_7d", "product_id"),
+        Index("ix_product_sales_30d", "units_30d", "product_id"),
+        Index("ix_product_sales_window_day", "window_day"),
+    )
@@ -0,0 +1,79 @@
+from sqlalchemy import Column, Integer, String, Double, Date, PrimaryKeyConstraint
+from app.core.database import Base
+
+class SalesDaily(Base):
+    """
+    Órdenes, unidades y facturación por día (UTC), localidad y estado de la orden.
+    Las mantienen el checkout y el cambio de estado (ver SalesRollupRepository); el
+    dashboard suma estas filas en lugar de agregar orders/order_items.
+    """
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, nullable=False)
+    locality = Column(String(50), nullable=False, default="")
+    status = Column(String(50), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    # DOUBLE: es una suma corrida, en FLOAT de MySQL perdería centavos
+    revenue = Column(Double, nullable=False, default=0)
+
+    __table_args__ = (
+        # Los rangos de fechas recorren la clave primaria
+        PrimaryKeyConstraint("day", "locality", "status"),
+    )
+
+
+class SalesCategoryDaily(Base):
+    """
+    Lo mismo por categoría de producto. `orders` cuenta las órdenes con algún producto de
+    la categoría (una orden con dos categorías suma en ambas). category_id 0 = sin categoría.
+    """
+    __tablename__ = "sales_category_daily"
+
+    day = Column(Date, nullable=False)
+    category_id = Column(Integer, nullable=False, default=0)
+    locality = Column(String(50), nullable=False, default="")
+    status = Column(String(50), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Double, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "category_id", "locality", "status"),
+    )
+
+
+class SalesMonthly(Base):
+    """
+    Los mismos acumulados de sales_daily por mes (`month` es el día 1). Con ellos un rango
+    largo suma una fila por mes completo y solo baja a sales_daily en los meses de los bordes.
+    """
+    __tablename__ = "sales_monthly"
+
+    month = Column(Date, nullable=False)
+    locality = Column(String(50), nullable=False, default="")
+    status = Column(String(50), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Double, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("month", "locality", "status"),
+    )
+
+
+class SalesCategoryMonthly(Base):
+    """Los acumulados de sales_category_daily por mes (`month` es el día 1)."""
+    __tablename__ = "sales_category_monthly"
+
+    month = Column(Date, nullable=False)
+    category_id = Column(Integer, nullable=False, default=0)
+    locality = Column(String(50), nullable=False, default="")
+    status = Column(String(50), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Double, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("month", "category_id", "locality", "status"),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, PrimaryKeyConstraint, Index
+from app.core.database import Base
+
+class StockReservation(Base):
+    """
+    Unidades de un producto apartadas para el carrito de un usuario hasta `expires_at`.
+    Una fila por (usuario, producto) con la cantidad que tiene en el carrito; las vencidas
+    no cuentan y las borra el barrido (ver ReservationService).
+    """
+    __tablename__ = "stock_reservations"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("user_id", "product_id"),
+        # Reservas vigentes de un producto: la suma se resuelve con el índice (cubre quantity)
+        Index("ix_stock_reservations_product_expires", "product_id", "expires_at", "quantity"),
+        # Barrido de vencidas
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
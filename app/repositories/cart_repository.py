@@ -1,8 +1,11 @@
+from sqlalchemy import Integer, delete, func, literal, select, true, tuple_
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 
+from app.core.upsert import upsert, upsert_from_select
 from app.models.cart import Cart
 from app.models.cart_item import CartItem
+from app.models.product import Product
 from app.schemas.cart import CartItemCreate
 
 class CartRepository:
@@ -15,9 +18,37 @@ class CartRepository:
     def get_cart_by_user_id(self, user_id: int) -> Optional[Cart]:
         """Obtiene el carrito de un usuario, cargando sus items y productos asociados."""
         return self.db.query(Cart).options(
-            joinedload(Cart.items).joinedload(CartItem.product)
+            # La categoría también: cada producto de la respuesta incluye su nombre
+            joinedload(Cart.items).joinedload(CartItem.product).joinedload(Product.category)
         ).filter(Cart.user_id == user_id).first()
 
+    def get_quantities(self, user_id: int) -> Optional[Tuple[int, Dict[int, int]]]:
+        """(id del carrito, {product_id: cantidad}) sin cargar productos; None si no tiene carrito."""
+        rows = (
+            self.db.query(Cart.id, CartItem.product_id, CartItem.quantity)
+            .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+            .filter(Cart.user_id == user_id)
+            .all()
+        )
+        if not rows:
+            return None
+        return rows[0][0], {product_id: quantity for _, product_id, quantity in rows if product_id is not None}
+
+    def get_summary(self, user_id: int) -> Tuple[int, int, float]:
+        """(productos distintos, unidades, total) del carrito con una sola consulta agregada."""
+        item_count, total_quantity, total_price = (
+            self.db.query(
+                func.count(CartItem.product_id),
+                func.coalesce(func.sum(CartItem.quantity), 0),
+                func.coalesce(func.sum(CartItem.quantity * Product.price), 0),
+            )
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .join(Product, Product.id == CartItem.product_id)
+            .filter(Cart.user_id == user_id)
+            .one()
+        )
+        return item_count, int(total_quantity), float(total_price)
+
     def get_or_create_cart(self, user_id: int) -> Cart:
         """Obtiene el carrito o lo crea si no existe para ese usuario."""
         cart = self.get_cart_by_user_id(user_id)
@@ -49,6 +80,76 @@ class CartRepository:
         self.db.refresh(new_item)
         return new_item
 
+    def add_item_checked(self, user_id: int, product_id: int, quantity: int) -> bool:
+        """
+        Suma `quantity` al ítem del producto en el carrito del usuario (o lo crea) con una
+        sola sentencia INSERT ... SELECT con upsert, que solo escribe si el carrito y el
+        producto existen y el stock alcanza para la cantidad total resultante.
+        Devuelve False si no escribió nada. No hace commit.
+        """
+        in_cart = (
+            select(CartItem.quantity)
+            .where(CartItem.cart_id == Cart.id, CartItem.product_id == Product.id)
+            .scalar_subquery()
+        )
+        # Cruce explícito de una fila por lado (el carrito del usuario y el producto)
+        source = (
+            select(Cart.id, Product.id, literal(quantity, Integer))
+            .select_from(Cart)
+            .join(Product, true())
+            .where(
+                Cart.user_id == user_id,
+                Product.id == product_id,
+                Product.stock_current >= quantity + func.coalesce(in_cart, 0),
+            )
+        )
+        result = upsert_from_select(
+            self.db,
+            CartItem.__table__,
+            ["cart_id", "product_id", "quantity"],
+            source,
+            key_columns=["cart_id", "product_id"],
+            update=lambda incoming: {"quantity": CartItem.quantity + incoming.quantity},
+        )
+        return result.rowcount > 0
+
+    def set_quantities(self, cart_id: int, quantities: Dict[int, int]) -> None:
+        """
+        Fija la cantidad de varios productos del carrito ({product_id: cantidad}; 0 lo quita).
+        No hace commit: el llamador confirma el lote completo.
+        """
+        self.set_quantities_many({cart_id: quantities})
+
+    def set_quantities_many(self, changes: Dict[int, Dict[int, int]]) -> None:
+        """
+        Igual que `set_quantities` para varios carritos ({cart_id: {product_id: cantidad}}),
+        con a lo sumo dos sentencias: un DELETE ... IN y un upsert multi-fila. No hace commit.
+        """
+        removed = [
+            (cart_id, product_id)
+            for cart_id, quantities in changes.items()
+            for product_id, quantity in quantities.items()
+            if quantity <= 0
+        ]
+        kept = [
+            {"cart_id": cart_id, "product_id": product_id, "quantity": quantity}
+            for cart_id, quantities in sorted(changes.items())
+            for product_id, quantity in sorted(quantities.items())
+            if quantity > 0
+        ]
+        if removed:
+            self.db.execute(
+                delete(CartItem).where(tuple_(CartItem.cart_id, CartItem.product_id).in_(removed))
+            )
+        if kept:
+            upsert(
+                self.db,
+                CartItem.__table__,
+                kept,
+                key_columns=["cart_id", "product_id"],
+                update=lambda incoming: {"quantity": incoming.quantity},
+            )
+
     def update_item_quantity(self, item: CartItem, quantity: int) -> CartItem:
         """Actualiza la cantidad de un ítem existente."""
         item.quantity = quantity
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional, Set, Tuple
 
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
@@ -15,6 +15,17 @@ class CategoryRepository:
         """Recupera todas las categorías."""
         return self.db.query(Category).all()
 
+    def get_fingerprint(self) -> List[Tuple[Any, ...]]:
+        """Pares (id, nombre) de todas las categorías, sin instanciar objetos ORM (para ETags)."""
+        return [tuple(row) for row in self.db.query(Category.id, Category.name).order_by(Category.id).all()]
+
+    def get_existing_ids(self, category_ids: Iterable[int]) -> Set[int]:
+        """Subconjunto de los IDs recibidos que existen, en una sola consulta IN."""
+        ids = set(category_ids)
+        if not ids:
+            return set()
+        return {row[0] for row in self.db.query(Category.id).filter(Category.id.in_(ids)).all()}
+
     def get_by_id(self, category_id: int) -> Optional[Category]:
         """Recupera una categoría por su ID."""
         return self.db.query(Category).filter(Category.id == category_id).first()
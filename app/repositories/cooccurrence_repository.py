@@ -0,0 +1,74 @@
+from itertools import permutations
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.upsert import upsert
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_cooccurrence import ProductCooccurrence
+from app.repositories.product_repository import PRODUCT_ROW_COLUMNS, ROW_CATEGORY, ProductRow
+
+
+class CooccurrenceRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def add_order(self, product_ids: Iterable[int]) -> None:
+        """
+        Suma una orden a los pares de productos que contiene, con un único upsert multi-fila.
+        No hace commit: se ejecuta dentro de la transacción del checkout.
+        """
+        ids = sorted(set(product_ids))
+        if len(ids) < 2:
+            return
+
+        # Orden fijo de filas: dos checkouts simultáneos toman los bloqueos en el mismo orden
+        rows = [
+            {"product_id": a, "related_product_id": b, "order_count": 1}
+            for a, b in permutations(ids, 2)
+        ]
+        upsert(
+            self.db,
+            ProductCooccurrence.__table__,
+            rows,
+            key_columns=["product_id", "related_product_id"],
+            update=lambda incoming: {"order_count": ProductCooccurrence.order_count + incoming.order_count},
+        )
+
+    def top_related(self, product_id: int, limit: int) -> List[Tuple[ProductRow, int]]:
+        """Los `limit` productos comprados junto a `product_id` en más órdenes, con su conteo."""
+        rows = (
+            self.db.query(*PRODUCT_ROW_COLUMNS, ProductCooccurrence.order_count)
+            .select_from(ProductCooccurrence)
+            .join(Product, Product.id == ProductCooccurrence.related_product_id)
+            .outerjoin(ROW_CATEGORY, Product.category_id == ROW_CATEGORY.id)
+            .filter(ProductCooccurrence.product_id == product_id)
+            .order_by(ProductCooccurrence.order_count.desc(), ProductCooccurrence.related_product_id.desc())
+            .limit(limit)
+            .all()
+        )
+        return [(ProductRow.from_row(row), row.order_count) for row in rows]
+
+    def rebuild(self) -> int:
+        """
+        Recalcula toda la tabla desde order_items con un INSERT ... SELECT (auto-join por
+        orden) y confirma. Sirve para la carga inicial o para corregir desvíos.
+        Devuelve la cantidad de pares guardados.
+        """
+        item, other = aliased(OrderItem), aliased(OrderItem)
+        pairs = (
+            select(item.product_id, other.product_id, func.count(func.distinct(item.order_id)))
+            .join(other, (other.order_id == item.order_id) & (other.product_id != item.product_id))
+            .group_by(item.product_id, other.product_id)
+        )
+
+        self.db.query(ProductCooccurrence).delete(synchronize_session=False)
+        self.db.execute(
+            insert(ProductCooccurrence).from_select(
+                ["product_id", "related_product_id", "order_count"], pairs
+            )
+        )
+        self.db.commit()
+        return self.db.query(func.count()).select_from(ProductCooccurrence).scalar()
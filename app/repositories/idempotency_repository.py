@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+class IdempotencyRepository:
+    """Claves de idempotencia de POST /orders. Ningún método hace commit: los usa IdempotencyService."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def claim(self, user_id: int, key: str, fingerprint: str, expires_at: datetime) -> None:
+        """Registra la clave como solicitud en curso. Lanza IntegrityError si ya existe."""
+        self.db.execute(
+            insert(IdempotencyKey).values(
+                user_id=user_id, key=key, fingerprint=fingerprint,
+                created_at=datetime.utcnow(), expires_at=expires_at,
+            )
+        )
+
+    def get(self, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        return (
+            self.db.query(IdempotencyKey)
+            .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .populate_existing()
+            .first()
+        )
+
+    def attach_order(self, user_id: int, key: str, order_id: int) -> None:
+        """Asocia la orden creada a la clave (dentro de la transacción del checkout)."""
+        self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(order_id=order_id)
+        )
+
+    def store_response(self, user_id: int, key: str, response: str) -> None:
+        self.db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .values(response=response)
+        )
+
+    def release(self, user_id: int, key: str, created_before: Optional[datetime] = None) -> None:
+        """
+        Borra una clave en curso que no llegó a crear la orden (el cliente puede reintentar).
+        Con `created_before`, solo si la solicitud empezó antes de esa fecha.
+        """
+        stmt = delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.order_id.is_(None),
+        )
+        if created_before is not None:
+            stmt = stmt.where(IdempotencyKey.created_at <= created_before)
+        self.db.execute(stmt)
+
+    def delete_if_expired(self, user_id: int, key: str, now: datetime) -> None:
+        self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.expires_at <= now,
+            )
+        )
+
+    def delete_expired(self, now: datetime, batch_size: int) -> int:
+        """Borra hasta `batch_size` claves vencidas (las más viejas primero, por índice)."""
+        keys = self.db.execute(
+            select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.expires_at <= now)
+            .order_by(IdempotencyKey.expires_at)
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            return 0
+        self.db.execute(
+            delete(IdempotencyKey).where(
+                tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_([tuple(key) for key in keys]),
+                IdempotencyKey.expires_at <= now,
+            )
+        )
+        return len(keys)
@@ -1,12 +1,21 @@
 # app/repositories/order_repository.py
-from sqlalchemy.orm import Session
-from sqlalchemy import exc
-from typing import Optional, List
+from sqlalchemy.orm import Query, Session, selectinload
+from sqlalchemy import and_, exc, insert, or_
+from typing import Any, Iterator, Optional, List, Tuple
+from datetime import date, datetime, time, timedelta
 
 from app.models.order import Order
 from app.models.order_item import OrderItem
+from app.models.product import Product
 from app.schemas.order import OrderCreate # Solo para tipado
 
+# Columnas de la exportación: la orden y uno de sus ítems (NULL si la orden no tiene ítems)
+EXPORT_ROW_COLUMNS = (
+    Order.id, Order.order_date, Order.status, Order.user_id, Order.locality,
+    Order.shipping_address, Order.total_amount,
+    OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.unit_price,
+)
+
 class OrderRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -15,6 +24,92 @@ class OrderRepository:
         """Recupera una orden por su ID."""
         return self.db.query(Order).get(order_id)
 
+    def get_by_id_for_update(self, order_id: int) -> Optional[Order]:
+        """Lee la orden con SELECT ... FOR UPDATE (hasta el commit de la transacción)."""
+        return (
+            self.db.query(Order)
+            .filter(Order.id == order_id)
+            .with_for_update()
+            .populate_existing()
+            .one_or_none()
+        )
+
+    def list_filtered(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        locality: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Order]:
+        """
+        Órdenes filtradas, más recientes primero, con sus ítems y productos.
+        Las fechas son inclusivas (días completos). Con `limit` pagina por keyset sobre
+        (order_date, id): `after` es el (order_date, id) de la última orden de la página
+        anterior. Según el filtro se recorre (user_id, order_date, id), (status, order_date, id)
+        u (order_date, id), así el costo de una página no depende del total de órdenes.
+        """
+        query = self._filtered_query(self.db.query(Order), user_id, status, date_from, date_to, locality)
+        if after is not None:
+            last_date, last_id = after
+            query = query.filter(
+                or_(Order.order_date < last_date, and_(Order.order_date == last_date, Order.id < last_id))
+            )
+
+        query = query.order_by(Order.order_date.desc(), Order.id.desc()).options(
+            selectinload(Order.items).joinedload(OrderItem.product)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def iter_export_rows(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        locality: Optional[str] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Una fila plana (EXPORT_ROW_COLUMNS) por ítem de las órdenes filtradas, en el orden
+        del listado y con los ítems de cada orden seguidos. Se leen con un cursor del lado
+        del servidor (yield_per) de a `batch_size`, sin instanciar objetos ORM.
+        """
+        query = (
+            self.db.query(*EXPORT_ROW_COLUMNS)
+            .select_from(Order)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .outerjoin(Product, Product.id == OrderItem.product_id)
+        )
+        query = self._filtered_query(query, user_id, status, date_from, date_to, locality)
+        query = query.order_by(Order.order_date.desc(), Order.id.desc(), OrderItem.id)
+        return iter(query.execution_options(yield_per=batch_size))
+
+    @staticmethod
+    def _filtered_query(
+        query: Query,
+        user_id: Optional[int],
+        status: Optional[str],
+        date_from: Optional[date],
+        date_to: Optional[date],
+        locality: Optional[str],
+    ) -> Query:
+        if user_id is not None:
+            query = query.filter(Order.user_id == user_id)
+        if status is not None:
+            query = query.filter(Order.status == status)
+        if date_from is not None:
+            query = query.filter(Order.order_date >= datetime.combine(date_from, time.min))
+        if date_to is not None:
+            query = query.filter(Order.order_date < datetime.combine(date_to + timedelta(days=1), time.min))
+        if locality is not None:
+            query = query.filter(Order.locality == locality)
+        return query
+
     def create_order_transaction(
         self, 
         user_id: int, 
@@ -38,16 +133,18 @@ class OrderRepository:
         self.db.add(new_order)
         self.db.flush() # Importante para obtener el ID de la nueva orden antes del commit
         
+        # 2. Todos los ítems con un único INSERT multi-fila
         order_items = [
-            OrderItem(
-                order_id=new_order.id, 
-                product_id=item['product_id'], 
-                quantity=item['quantity'], 
-                unit_price=item['price']
-            )
+            {
+                "order_id": new_order.id,
+                "product_id": item['product_id'],
+                "quantity": item['quantity'],
+                "unit_price": item['price'],
+            }
             for item in items_to_add
         ]
-        self.db.add_all(order_items)
+        if order_items:
+            self.db.execute(insert(OrderItem.__table__).values(order_items))
         
        
         
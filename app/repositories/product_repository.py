@@ -1,9 +1,111 @@
-from sqlalchemy.orm import Session
-from typing import Optional, List
-from sqlalchemy import asc, desc
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy.orm import Session, Query, aliased
+from typing import Any, Dict, Iterable, Iterator, Optional, List, Tuple
+from sqlalchemy import asc, desc, and_, or_, case, cast, func, Integer
 from app.models.product import Product
 from app.models.category import Category
+from app.models.product_sales import ProductSales
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.repositories.product_search import ProductSearch
+from app.core.upsert import upsert
+
+# Columnas permitidas en `sort_by`. El id se usa siempre como desempate.
+SORT_COLUMNS = {
+    "price": Product.price,
+    "name": Product.name,
+    "created_at": Product.created_at,
+    # Por urgencia de reposición: primero los de menor margen sobre el mínimo
+    "stock_status": Product.stock_margin,
+    # Unidades vendidas en los últimos 30 días (0 si no tiene ventas); requiere unir product_sales
+    "popularity": func.coalesce(ProductSales.units_30d, 0).label("popularity"),
+}
+
+# Condición de cada estado de stock escrita sobre stock_margin para que use su índice
+STOCK_STATUS_CONDITIONS = {
+    "Agotado": Product.stock_current == 0,
+    "Alerta": and_(Product.stock_margin <= 0, Product.stock_current != 0),
+    "Normal": and_(Product.stock_margin > 0, Product.stock_current != 0),
+}
+
+# Columnas del snapshot en memoria del catálogo (ver services/columnar_catalog.py)
+SNAPSHOT_COLUMNS = (
+    Product.id,
+    Product.price,
+    Product.category_id,
+    Product.created_at,
+    Product.updated_at,
+    Product.stock_current,
+    Product.stock_min,
+    Product.rating,
+    Product.name,
+    Product.description,
+    Product.sku,
+    Product.image_url,
+)
+
+# Alias propio para leer el nombre de la categoría sin chocar con el join del filtro
+ROW_CATEGORY = aliased(Category)
+
+PRODUCT_ROW_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.rating,
+    Product.category_id,
+    Product.image_url,
+    Product.sku,
+    Product.stock_current,
+    Product.stock_min,
+    Product.stock_margin,
+    Product.created_at,
+    Product.stock_status.label("stock_status"),
+    ROW_CATEGORY.name.label("category_name"),
+)
+
+
+@dataclass(slots=True)
+class CategoryRef:
+    name: str
+
+
+@dataclass(slots=True)
+class ProductRow:
+    """
+    Producto de solo lectura para listados. Expone los mismos atributos que lee
+    ProductResponse, así que se valida igual que un objeto ORM (from_attributes).
+    """
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    rating: int
+    category_id: Optional[int]
+    image_url: Optional[str]
+    sku: str
+    stock_current: int
+    stock_min: int
+    stock_margin: int
+    created_at: datetime
+    stock_status: str
+    category: Optional[CategoryRef]
+    search_rank: Optional[float] = None
+    popularity: Optional[int] = None
+
+    @classmethod
+    def from_row(cls, row, attached: Optional[str] = None) -> "ProductRow":
+        """`attached` es el atributo (search_rank o popularity) que recibe la columna extra de la fila."""
+        values = tuple(row)
+        category_name = values[13]
+        product = cls(
+            *values[:13],
+            category=CategoryRef(category_name) if category_name is not None else None,
+        )
+        if attached is not None:
+            setattr(product, attached, values[14])
+        return product
+
 
 class ProductRepository:
     def __init__(self, db: Session):
@@ -12,28 +114,229 @@ class ProductRepository:
     def get_by_id(self, product_id: int) -> Optional[Product]:
         return self.db.query(Product).filter(Product.id == product_id).first()
 
+    def get_row(self, product_id: int) -> Optional[ProductRow]:
+        """Producto con el nombre de su categoría, sin instanciar el objeto ORM."""
+        row = self._rows_query().filter(Product.id == product_id).first()
+        return ProductRow.from_row(row) if row is not None else None
+
+    def exists(self, product_id: int) -> bool:
+        return self.db.query(Product.id).filter(Product.id == product_id).first() is not None
+
     def get_by_id_for_update(self, product_id: int) -> Optional[Product]:
         """
         Bloquea la fila para evitar condiciones de carrera durante la compra.
         """
         return self.db.query(Product).filter(Product.id == product_id).with_for_update().first()
 
+    def get_many(self, product_ids: Iterable[int], for_update: bool = False) -> Dict[int, Product]:
+        """
+        {id: Product} de los productos dados, con una sola consulta IN. Con `for_update`
+        bloquea todas las filas en orden de id: dos compras con productos en común las
+        toman en el mismo orden y no pueden bloquearse mutuamente.
+        """
+        ids = sorted(set(product_ids))
+        if not ids:
+            return {}
+        query = self.db.query(Product).filter(Product.id.in_(ids))
+        if for_update:
+            # populate_existing: el carrito ya cargó estos productos; se toma el stock recién bloqueado
+            query = query.order_by(Product.id).with_for_update().populate_existing()
+        return {product.id: product for product in query.all()}
+
     def list_filtered(
         self, 
         category: Optional[str] = None, 
         min_price: Optional[float] = None, 
         max_price: Optional[float] = None, 
         search: Optional[str] = None,
+        stock_status: Optional[List[str]] = None,
         sort_by: Optional[str] = None,
-        order: str = "asc"
+        order: str = "asc",
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, int]] = None,
     ) -> List[Product]:
         """
         Aplica filtros dinámicos a la consulta de productos.
+        Si se indica `limit`, pagina por keyset sobre (columna de orden, id):
+        `after` es la tupla (valor, id) del último producto de la página anterior.
+
+        Con `search` y sin `sort_by` los resultados se ordenan por relevancia y cada
+        producto devuelto lleva su puntaje en el atributo `search_rank`. Con
+        `sort_by="popularity"` llevan sus ventas de 30 días en `popularity`.
+        """
+        rows, attached = self._listing(
+            self.db.query(Product), category, min_price, max_price, search, stock_status, sort_by, order, limit, after
+        )
+        return self._unpack_attached(rows, attached) if attached else rows
+
+    def list_rows(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None,
+        stock_status: Optional[List[str]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[ProductRow]:
         """
-        query = self.db.query(Product)
+        Misma semántica que `list_filtered`, pero de solo lectura: una única consulta que
+        selecciona las columnas del listado más el nombre de la categoría y el stock_status
+        calculado en SQL. Devuelve ProductRow (sin identity map ni instrumentación ORM).
+        """
+        rows, attached = self._listing(
+            self._rows_query(), category, min_price, max_price, search, stock_status, sort_by, order, limit, after
+        )
+        return [ProductRow.from_row(row, attached) for row in rows]
+
+    def iter_rows(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None,
+        stock_status: Optional[List[str]] = None,
+        sort_by: Optional[str] = None,
+        order: str = "asc",
+        batch_size: int = 1000,
+    ) -> Iterator[ProductRow]:
+        """
+        Recorre el catálogo filtrado sin cargarlo entero: `yield_per` activa un cursor del
+        lado del servidor (stream_results) y trae las filas de a `batch_size`.
+        Sin `sort_by` ni búsqueda el orden es por id, estable entre exportaciones.
+        """
+        query, attached = self._listing_query(
+            self._rows_query(), category, min_price, max_price, search, stock_status, sort_by, order, None, None
+        )
+        if attached is None and sort_by not in SORT_COLUMNS:
+            query = query.order_by(Product.id)
+
+        for row in query.execution_options(yield_per=batch_size):
+            yield ProductRow.from_row(row, attached)
+
+    def iter_snapshot_rows(
+        self,
+        updated_since: Optional[datetime] = None,
+        product_ids: Optional[List[int]] = None,
+        batch_size: int = 10000,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        Filas planas (SNAPSHOT_COLUMNS) ordenadas por id, leídas por lotes con cursor del
+        servidor. Sin argumentos trae todo el catálogo; si no, solo los productos modificados
+        desde `updated_since` (usa su índice) y/o cuyos ids se indican.
+        """
+        query = self.db.query(*SNAPSHOT_COLUMNS)
+        if updated_since is not None:
+            query = query.filter(Product.updated_at >= updated_since)
+        if product_ids:
+            query = query.filter(Product.id.in_(product_ids))
+        return iter(query.order_by(Product.id).execution_options(yield_per=batch_size))
+
+    def _rows_query(self) -> Query:
+        """Consulta de proyección: columnas del listado + nombre de la categoría."""
+        return (
+            self.db.query(*PRODUCT_ROW_COLUMNS)
+            .select_from(Product)
+            .outerjoin(ROW_CATEGORY, Product.category_id == ROW_CATEGORY.id)
+        )
+
+    def _listing(
+        self,
+        query: Query,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        search: Optional[str],
+        stock_status: Optional[List[str]],
+        sort_by: Optional[str],
+        order: str,
+        limit: Optional[int],
+        after: Optional[Tuple[Any, int]],
+    ) -> Tuple[list, Optional[str]]:
+        """Ejecuta el listado. Devuelve también el atributo de la columna extra (ver `_listing_query`)."""
+        query, attached = self._listing_query(
+            query, category, min_price, max_price, search, stock_status, sort_by, order, limit, after
+        )
+        return query.all(), attached
+
+    def _listing_query(
+        self,
+        query: Query,
+        category: Optional[str],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        search: Optional[str],
+        stock_status: Optional[List[str]],
+        sort_by: Optional[str],
+        order: str,
+        limit: Optional[int],
+        after: Optional[Tuple[Any, int]],
+    ) -> Tuple[Query, Optional[str]]:
+        """
+        Filtros, orden y keyset comunes a los listados. Si el orden agrega una columna al
+        final de cada fila (relevancia o popularidad) devuelve el nombre de su atributo.
+        """
+        product_search = ProductSearch.build(self.db, search)
+        query = self._apply_filters(
+            query,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            search=product_search,
+            stock_status=stock_status,
+        )
+
+        sort_column = SORT_COLUMNS.get(sort_by)
+        descending = order == "desc"
+        attached = None
+
+        if sort_column is None and product_search is not None:
+            # La relevancia siempre va de mejor a peor, sin importar `order`
+            sort_column = product_search.rank
+            descending = False
+            query = query.add_columns(product_search.rank)
+            attached = "search_rank"
+        elif sort_by == "popularity":
+            query = (
+                query.outerjoin(ProductSales, ProductSales.product_id == Product.id)
+                .add_columns(sort_column)
+            )
+            attached = "popularity"
+
+        direction = desc if descending else asc
+
+        if limit is None:
+            if sort_column is not None:
+                query = query.order_by(direction(sort_column), direction(Product.id))
+            return query, attached
+
+        # Paginación por keyset: el id desempata y siempre acompaña al orden
+        key_column = sort_column if sort_column is not None else Product.id
+
+        if after is not None:
+            query = query.filter(self._keyset_condition(key_column, after, descending))
 
+        if key_column is Product.id:
+            query = query.order_by(direction(Product.id))
+        else:
+            query = query.order_by(direction(key_column), direction(Product.id))
+
+        return query.limit(limit), attached
+
+    def _apply_filters(
+        self,
+        query: Query,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[ProductSearch] = None,
+        stock_status: Optional[List[str]] = None,
+    ) -> Query:
+        """Filtros comunes del catálogo, reutilizables por cualquier consulta sobre Product."""
         if category:
-            query = query.join(Category).filter(Category.name == category)
+            query = query.join(Category, Product.category_id == Category.id).filter(Category.name == category)
 
         if min_price is not None:
             query = query.filter(Product.price >= min_price)
@@ -41,29 +344,147 @@ class ProductRepository:
         if max_price is not None:
             query = query.filter(Product.price <= max_price)
 
-        
-        if search:
-      
-            query = query.filter(Product.name.ilike(f"%{search}%"))
-        
-        if sort_by:
-            sort_column = None
-            
-         
-            if sort_by == "price":
-                sort_column = Product.price
-            elif sort_by == "name":
-                sort_column = Product.name
-            elif sort_by == "created_at":
-                sort_column = Product.created_at
-            
-            if sort_column:
-                if order == "desc":
-                    query = query.order_by(desc(sort_column))
-                else:
-                    query = query.order_by(asc(sort_column))
-
-        return query.all()
+        if search is not None:
+            query = search.apply(query)
+
+        if stock_status:
+            query = query.filter(or_(*(STOCK_STATUS_CONDITIONS[status] for status in stock_status)))
+
+        return query
+
+    @staticmethod
+    def _unpack_attached(rows, attached: str) -> List[Product]:
+        """Convierte filas (Product, valor) en productos con el valor en el atributo `attached`."""
+        products = []
+        for product, value in rows:
+            setattr(product, attached, value)
+            products.append(product)
+        return products
+
+    @staticmethod
+    def _keyset_condition(key_column, after: Tuple[Any, int], descending: bool):
+        """Condición "después de (valor, id)" expandida para que use los índices compuestos."""
+        value, last_id = after
+        if key_column is Product.id:
+            return Product.id < last_id if descending else Product.id > last_id
+
+        if descending:
+            return or_(key_column < value, and_(key_column == value, Product.id < last_id))
+        return or_(key_column > value, and_(key_column == value, Product.id > last_id))
+
+    def listing_version(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None,
+        stock_status: Optional[List[str]] = None,
+    ) -> Tuple[Any, ...]:
+        """
+        Resumen del conjunto filtrado (cantidad, último updated_at, stock y precios sumados)
+        para su ETag. Las sumas cubren las compras y cambios de precio que caen en el mismo
+        segundo que la última modificación (DATETIME de MariaDB no guarda fracciones).
+        """
+        query = self._apply_filters(
+            self.db.query(Product),
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            search=ProductSearch.build(self.db, search),
+            stock_status=stock_status,
+        )
+        return tuple(
+            query.with_entities(
+                func.count(Product.id),
+                func.max(Product.updated_at),
+                func.sum(Product.stock_current),
+                func.sum(Product.price),
+            ).one()
+        )
+
+    def facet_counts(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search: Optional[str] = None,
+        stock_status: Optional[List[str]] = None,
+        bucket_size: float = 50.0,
+    ) -> Dict[str, Any]:
+        """
+        Calcula las facetas del listado con agregados agrupados en SQL (sin cargar productos):
+        conteo por categoría, histograma de precios y conteo por estado de stock.
+        """
+        base = self._apply_filters(
+            self.db.query(Product),
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            search=ProductSearch.build(self.db, search),
+            stock_status=stock_status,
+        )
+
+        # Alias propio: el filtro por categoría puede haber unido ya la tabla categories
+        facet_category = aliased(Category)
+        categories = (
+            base.outerjoin(facet_category, Product.category_id == facet_category.id)
+            .with_entities(Product.category_id, facet_category.name, func.count(Product.id))
+            .group_by(Product.category_id, facet_category.name)
+            .order_by(facet_category.name)
+            .all()
+        )
+
+        bucket = self._price_bucket(bucket_size).label("bucket")
+        price_buckets = (
+            base.with_entities(bucket, func.count(Product.id))
+            .group_by(bucket)
+            .order_by(bucket)
+            .all()
+        )
+
+        status = Product.stock_status.label("stock_status")
+        status_counts = dict(
+            base.with_entities(status, func.count(Product.id)).group_by(status).all()
+        )
+
+        return {
+            "total": sum(status_counts.values()),
+            "categories": [
+                {"category_id": category_id, "name": name, "count": count}
+                for category_id, name, count in categories
+            ],
+            "price_buckets": [
+                {"min": index * bucket_size, "max": (index + 1) * bucket_size, "count": count}
+                for index, count in price_buckets
+            ],
+            "stock_status": status_counts,
+        }
+
+    def list_low_stock(
+        self,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        category_id: Optional[int] = None,
+    ) -> List[ProductRow]:
+        """
+        Productos en Alerta o Agotado (stock_current <= stock_min), del menor margen al mayor.
+        Recorre el índice (stock_margin, id) por keyset: `after` es el (margen, id) del último
+        producto de la página anterior, así que cada página cuesta lo mismo.
+        """
+        query = self._rows_query().filter(Product.stock_margin <= 0)
+        if category_id is not None:
+            query = query.filter(Product.category_id == category_id)
+        if after is not None:
+            query = query.filter(self._keyset_condition(Product.stock_margin, after, descending=False))
+
+        rows = query.order_by(Product.stock_margin, Product.id).limit(limit).all()
+        return [ProductRow.from_row(row) for row in rows]
+
+    def _price_bucket(self, bucket_size: float):
+        """Índice del tramo de precio. En SQLite FLOOR puede no existir; CAST trunca igual (precios >= 0)."""
+        if self.db.get_bind().dialect.name == "sqlite":
+            return cast(Product.price / bucket_size, Integer)
+        return func.floor(Product.price / bucket_size)
 
     def create(self, product_in: ProductCreate) -> Product:
         # Usamos model_dump()
@@ -73,6 +494,91 @@ class ProductRepository:
         self.db.refresh(db_product)
         return db_product
 
+    def upsert_by_sku(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Inserta o actualiza (por `sku`) un lote de productos en una sola sentencia
+        multi-fila y confirma la transacción. `created_at` se conserva en las existentes.
+        """
+        now = datetime.utcnow()
+        values = [{**row, "created_at": now, "updated_at": now} for row in rows]
+        update_columns = [column for column in values[0] if column not in ("sku", "created_at")]
+
+        upsert(
+            self.db,
+            Product.__table__,
+            values,
+            key_columns=["sku"],
+            update=lambda incoming: {column: incoming[column] for column in update_columns},
+        )
+        self.db.commit()
+
+    def get_rows_by_ids(self, product_ids: Iterable[int]) -> List[ProductRow]:
+        """Proyección (ProductRow) de los productos dados, con una sola consulta IN."""
+        ids = set(product_ids)
+        if not ids:
+            return []
+        return [ProductRow.from_row(row) for row in self._rows_query().filter(Product.id.in_(ids)).all()]
+
+    def get_stock_levels(self, product_ids: Iterable[int], for_update: bool = False) -> Dict[int, int]:
+        """
+        {id: stock_current} de los productos dados, con una sola consulta IN (los inexistentes
+        no aparecen). Con `for_update` bloquea las filas en orden de id, así dos transacciones
+        con productos en común no se bloquean mutuamente.
+        """
+        ids = set(product_ids)
+        if not ids:
+            return {}
+        query = self.db.query(Product.id, Product.stock_current).filter(Product.id.in_(ids))
+        if for_update:
+            query = query.order_by(Product.id).with_for_update()
+        return {product_id: stock for product_id, stock in query.all()}
+
+    def get_stock_for_update(self, skus: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Bloquea las filas de los SKU dados y devuelve {sku: (id, stock_current)}."""
+        rows = (
+            self.db.query(Product.sku, Product.id, Product.stock_current)
+            .filter(Product.sku.in_(skus))
+            .with_for_update()
+            .all()
+        )
+        return {sku: (product_id, stock) for sku, product_id, stock in rows}
+
+    def set_stock_levels(self, levels: Dict[int, int]) -> None:
+        """
+        Fija el stock de varios productos ({id: stock}) con un único UPDATE ... CASE.
+        No hace commit: forma parte de la transacción del llamador.
+        """
+        if not levels:
+            return
+        self.db.query(Product).filter(Product.id.in_(list(levels))).update(
+            {
+                Product.stock_current: case(levels, value=Product.id),
+                Product.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
+    def decrement_stock(self, quantities: Dict[int, int]) -> int:
+        """
+        Resta stock a varios productos ({id: unidades}) con un único UPDATE ... CASE,
+        solo donde alcanza (`stock_current >= unidades`). Devuelve las filas actualizadas:
+        si son menos que los productos, el llamador debe revertir la transacción.
+        No hace commit.
+        """
+        if not quantities:
+            return 0
+        units = case(quantities, value=Product.id)
+        return self.db.query(Product).filter(
+            Product.id.in_(list(quantities)),
+            Product.stock_current >= units,
+        ).update(
+            {
+                Product.stock_current: Product.stock_current - units,
+                Product.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
     def update(self, product_id: int, product_in: ProductUpdate) -> Optional[Product]:
         db_product = self.get_by_id(product_id)
         if not db_product:
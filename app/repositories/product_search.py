@@ -0,0 +1,83 @@
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal, literal_column, or_, select, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Query, Session
+
+from app.core.schema import FTS_TABLE
+from app.models.product import Product
+
+# Pesos bm25 por columna (name, description, sku): el nombre y el SKU pesan más.
+SQLITE_BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def search_terms(search: Optional[str]) -> List[str]:
+    """Normaliza el texto de búsqueda a una lista de términos alfanuméricos."""
+    if not search:
+        return []
+    return re.findall(r"\w+", search.lower())
+
+
+class ProductSearch:
+    """
+    Búsqueda de texto completo sobre name, description y sku.
+
+    Usa el índice FULLTEXT en MariaDB/MySQL y FTS5 en SQLite; en otros motores
+    cae a ILIKE. Todos los términos son obligatorios y cada uno admite prefijo
+    (ej: "cuad lap" encuentra "cuaderno" con "lápiz"; en ILIKE, cualquier
+    subcadena). `rank` es una expresión donde el valor
+    menor es el resultado más relevante.
+    """
+
+    def __init__(self, terms: List[str], dialect: str):
+        self.terms = terms
+        self.dialect = dialect
+        self._subquery = None
+
+        if dialect == "sqlite":
+            fts_query = " ".join(f'"{term}"*' for term in terms)
+            fts = literal_column(FTS_TABLE)
+            self._subquery = (
+                select(
+                    literal_column("rowid").label("product_id"),
+                    func.bm25(fts, *SQLITE_BM25_WEIGHTS).label("rank"),
+                )
+                .select_from(text(FTS_TABLE))
+                .where(fts.op("MATCH")(fts_query))
+                .subquery("product_search")
+            )
+            self.rank = self._subquery.c.rank
+        elif dialect in ("mysql", "mariadb"):
+            boolean_query = " ".join(f"+{term}*" for term in terms)
+            self._match = match(
+                Product.name, Product.description, Product.sku, against=boolean_query
+            ).in_boolean_mode()
+            self.rank = -self._match
+        else:
+            self.rank = literal(0)
+
+    @classmethod
+    def build(cls, db: Session, search: Optional[str]) -> Optional["ProductSearch"]:
+        """Retorna None si el texto no contiene términos buscables."""
+        terms = search_terms(search)
+        if not terms:
+            return None
+        return cls(terms, db.get_bind().dialect.name)
+
+    def apply(self, query: Query) -> Query:
+        """Restringe la consulta a los productos que coinciden con la búsqueda."""
+        if self._subquery is not None:
+            return query.join(self._subquery, self._subquery.c.product_id == Product.id)
+
+        if self.dialect in ("mysql", "mariadb"):
+            return query.filter(self._match > 0)
+
+        for term in self.terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(
+                Product.name.ilike(pattern),
+                Product.description.ilike(pattern),
+                Product.sku.ilike(pattern),
+            ))
+        return query
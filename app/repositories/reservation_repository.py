@@ -0,0 +1,122 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.upsert import upsert
+from app.models.stock_reservation import StockReservation
+
+
+class ReservationRepository:
+    """Libro de reservas de stock. Ningún método hace commit: los usa ReservationService."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reserved_by_others(self, product_ids: Iterable[int], user_id: int, now: datetime) -> Dict[int, int]:
+        """Unidades con reserva vigente de otros usuarios, por producto (suma por índice)."""
+        ids = set(product_ids)
+        if not ids:
+            return {}
+        rows = (
+            self.db.query(StockReservation.product_id, func.sum(StockReservation.quantity))
+            .filter(
+                StockReservation.product_id.in_(ids),
+                StockReservation.expires_at > now,
+                StockReservation.user_id != user_id,
+            )
+            .group_by(StockReservation.product_id)
+            .all()
+        )
+        return {product_id: int(quantity) for product_id, quantity in rows}
+
+    def reserved_totals(self, product_ids: Iterable[int], now: datetime) -> Dict[int, int]:
+        """Unidades con reserva vigente de todos los usuarios, por producto."""
+        ids = set(product_ids)
+        if not ids:
+            return {}
+        rows = (
+            self.db.query(StockReservation.product_id, func.sum(StockReservation.quantity))
+            .filter(StockReservation.product_id.in_(ids), StockReservation.expires_at > now)
+            .group_by(StockReservation.product_id)
+            .all()
+        )
+        return {product_id: int(quantity) for product_id, quantity in rows}
+
+    def get_reservations_of_users(
+        self, user_ids: Iterable[int], product_ids: Iterable[int], now: datetime
+    ) -> Dict[Tuple[int, int], int]:
+        """Reservas vigentes de varios usuarios ({(user_id, product_id): cantidad})."""
+        users, ids = set(user_ids), set(product_ids)
+        if not users or not ids:
+            return {}
+        rows = self.db.query(StockReservation.user_id, StockReservation.product_id, StockReservation.quantity).filter(
+            StockReservation.user_id.in_(users),
+            StockReservation.product_id.in_(ids),
+            StockReservation.expires_at > now,
+        )
+        return {(user_id, product_id): quantity for user_id, product_id, quantity in rows}
+
+    def get_user_reservations(
+        self, user_id: int, now: datetime, product_ids: Optional[Iterable[int]] = None
+    ) -> Dict[int, int]:
+        """Reservas vigentes del usuario ({product_id: cantidad})."""
+        query = self.db.query(StockReservation.product_id, StockReservation.quantity).filter(
+            StockReservation.user_id == user_id,
+            StockReservation.expires_at > now,
+        )
+        if product_ids is not None:
+            query = query.filter(StockReservation.product_id.in_(set(product_ids)))
+        return {product_id: quantity for product_id, quantity in query.all()}
+
+    def set_user_reservations(self, user_id: int, quantities: Dict[int, int], expires_at: datetime) -> None:
+        """Fija las reservas del usuario ({product_id: cantidad}; 0 la libera) y renueva su vencimiento."""
+        released = [product_id for product_id, quantity in quantities.items() if quantity <= 0]
+        kept = [
+            {"user_id": user_id, "product_id": product_id, "quantity": quantity, "expires_at": expires_at}
+            for product_id, quantity in sorted(quantities.items())
+            if quantity > 0
+        ]
+        if released:
+            self.release(user_id, released)
+        if kept:
+            upsert(
+                self.db,
+                StockReservation.__table__,
+                kept,
+                key_columns=["user_id", "product_id"],
+                update=lambda incoming: {"quantity": incoming.quantity, "expires_at": incoming.expires_at},
+            )
+
+    def release_users(self, user_ids: Iterable[int]) -> None:
+        """Libera todas las reservas de varios usuarios con un solo DELETE."""
+        users = set(user_ids)
+        if users:
+            self.db.execute(delete(StockReservation).where(StockReservation.user_id.in_(users)))
+
+    def release(self, user_id: int, product_ids: Optional[Iterable[int]] = None) -> None:
+        """Libera las reservas del usuario (todas o las de los productos dados)."""
+        stmt = delete(StockReservation).where(StockReservation.user_id == user_id)
+        if product_ids is not None:
+            stmt = stmt.where(StockReservation.product_id.in_(set(product_ids)))
+        self.db.execute(stmt)
+
+    def delete_expired(self, now: datetime, batch_size: int) -> int:
+        """Borra hasta `batch_size` reservas vencidas (las más viejas primero, por índice)."""
+        keys = self.db.execute(
+            select(StockReservation.user_id, StockReservation.product_id)
+            .where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+        ).all()
+        if not keys:
+            return 0
+        self.db.execute(
+            delete(StockReservation).where(
+                tuple_(StockReservation.user_id, StockReservation.product_id).in_([tuple(key) for key in keys]),
+                # Una reserva renovada mientras tanto ya no está vencida
+                StockReservation.expires_at <= now,
+            )
+        )
+        return len(keys)
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, case, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.upsert import upsert
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.product_sales import ProductSales, ProductSalesDaily
+from app.repositories.product_repository import PRODUCT_ROW_COLUMNS, ROW_CATEGORY, ProductRow
+
+# Columna de cada ranking disponible
+SALES_WINDOWS = {
+    "total": ProductSales.units_total,
+    "7d": ProductSales.units_7d,
+    "30d": ProductSales.units_30d,
+}
+
+# Días de historial diario que hacen falta para la ventana más larga
+DAILY_HISTORY_DAYS = 30
+
+
+def _window_start(today: date, days: int) -> date:
+    """Primer día incluido en una ventana de `days` días que termina hoy."""
+    return today - timedelta(days=days - 1)
+
+
+class SalesRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_order(self, items: Iterable[Tuple[int, int]], day: date) -> None:
+        """
+        Suma las unidades de una orden ((product_id, cantidad)) al día y a los contadores,
+        con un upsert multi-fila por tabla. No hace commit: va en la transacción del checkout.
+        """
+        units = defaultdict(int)
+        for product_id, quantity in items:
+            units[product_id] += quantity
+        if not units:
+            return
+
+        # Orden fijo de filas: dos checkouts simultáneos toman los bloqueos en el mismo orden
+        product_ids = sorted(units)
+        upsert(
+            self.db,
+            ProductSalesDaily.__table__,
+            [{"product_id": pid, "day": day, "units": units[pid]} for pid in product_ids],
+            key_columns=["product_id", "day"],
+            update=lambda incoming: {"units": ProductSalesDaily.units + incoming.units},
+        )
+        upsert(
+            self.db,
+            ProductSales.__table__,
+            [
+                {"product_id": pid, "units_total": units[pid], "units_7d": units[pid],
+                 "units_30d": units[pid], "window_day": day}
+                for pid in product_ids
+            ],
+            key_columns=["product_id"],
+            update=lambda incoming: {
+                "units_total": ProductSales.units_total + incoming.units_total,
+                "units_7d": ProductSales.units_7d + incoming.units_7d,
+                "units_30d": ProductSales.units_30d + incoming.units_30d,
+            },
+        )
+
+    def refresh_windows(self, today: date) -> int:
+        """
+        Recalcula las ventanas de 7 y 30 días de los contadores que quedaron de un día
+        anterior (sumando ProductSalesDaily) y descarta el historial diario que ya no se usa.
+        Es idempotente en el mismo día. Confirma la transacción y devuelve las filas tocadas.
+        """
+        def window_units(days: int):
+            return (
+                select(func.coalesce(func.sum(ProductSalesDaily.units), 0))
+                .where(
+                    ProductSalesDaily.product_id == ProductSales.product_id,
+                    ProductSalesDaily.day >= _window_start(today, days),
+                )
+                .scalar_subquery()
+            )
+
+        result = self.db.execute(
+            update(ProductSales)
+            .where(ProductSales.window_day < today)
+            .values(units_7d=window_units(7), units_30d=window_units(30), window_day=today)
+        )
+        self.db.query(ProductSalesDaily).filter(
+            ProductSalesDaily.day < _window_start(today, DAILY_HISTORY_DAYS)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return result.rowcount
+
+    def list_bestsellers(
+        self,
+        window: str,
+        limit: int,
+        after: Optional[Tuple[int, int]] = None,
+        category: Optional[str] = None,
+    ) -> List[Tuple[ProductRow, int]]:
+        """
+        Productos más vendidos en la ventana dada, con sus unidades. Recorre el índice
+        (unidades, product_id) de mayor a menor; `after` es el (unidades, id) de la última fila.
+        """
+        units = SALES_WINDOWS[window]
+        query = (
+            self.db.query(*PRODUCT_ROW_COLUMNS, units.label("units_sold"))
+            .select_from(ProductSales)
+            .join(Product, Product.id == ProductSales.product_id)
+            .outerjoin(ROW_CATEGORY, Product.category_id == ROW_CATEGORY.id)
+            .filter(units > 0)
+        )
+        if category:
+            query = query.filter(ROW_CATEGORY.name == category)
+        if after is not None:
+            value, last_id = after
+            query = query.filter(or_(units < value, and_(units == value, ProductSales.product_id < last_id)))
+
+        rows = query.order_by(units.desc(), ProductSales.product_id.desc()).limit(limit).all()
+        return [(ProductRow.from_row(row), row.units_sold) for row in rows]
+
+    def rebuild(self, today: date) -> int:
+        """
+        Recalcula ambas tablas desde orders/order_items con INSERT ... SELECT agregados
+        y confirma. Devuelve la cantidad de productos con ventas.
+        """
+        start_7d = datetime.combine(_window_start(today, 7), time.min)
+        start_30d = datetime.combine(_window_start(today, 30), time.min)
+        start_daily = datetime.combine(_window_start(today, DAILY_HISTORY_DAYS), time.min)
+
+        self.db.query(ProductSalesDaily).delete(synchronize_session=False)
+        self.db.query(ProductSales).delete(synchronize_session=False)
+
+        order_day = func.date(Order.order_date)
+        daily = (
+            select(OrderItem.product_id, order_day, func.sum(OrderItem.quantity))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Order.order_date >= start_daily)
+            .group_by(OrderItem.product_id, order_day)
+        )
+        self.db.execute(insert(ProductSalesDaily).from_select(["product_id", "day", "units"], daily))
+
+        totals = (
+            select(
+                OrderItem.product_id,
+                func.sum(OrderItem.quantity),
+                func.sum(case((Order.order_date >= start_7d, OrderItem.quantity), else_=0)),
+                func.sum(case((Order.order_date >= start_30d, OrderItem.quantity), else_=0)),
+                literal(today, Date),
+            )
+            .join(Order, Order.id == OrderItem.order_id)
+            .group_by(OrderItem.product_id)
+        )
+        self.db.execute(insert(ProductSales).from_select(
+            ["product_id", "units_total", "units_7d", "units_30d", "window_day"], totals
+        ))
+        self.db.commit()
+        return self.db.query(func.count()).select_from(ProductSales).scalar()
@@ -0,0 +1,290 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import distinct, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.upsert import upsert
+from app.models.category import Category
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.sales_rollup import SalesCategoryDaily, SalesCategoryMonthly, SalesDaily, SalesMonthly
+
+# category_id con el que se acumulan los productos sin categoría
+NO_CATEGORY = 0
+
+# Claves primarias de cada tabla de acumulados (y orden de sus columnas en los upserts)
+DAILY_KEY = ("day", "locality", "status")
+CATEGORY_DAILY_KEY = ("day", "category_id", "locality", "status")
+MONTHLY_KEY = ("month", "locality", "status")
+CATEGORY_MONTHLY_KEY = ("month", "category_id", "locality", "status")
+
+
+class RollupOrder(NamedTuple):
+    """Lo que una orden aporta a los acumulados."""
+    day: date
+    locality: str
+    status: str
+    total: float
+    # (category_id, cantidad, precio unitario) de cada ítem
+    lines: List[Tuple[Optional[int], int, float]]
+
+    @classmethod
+    def of(cls, order: Order, lines: Iterable[Tuple[Optional[int], int, float]]) -> "RollupOrder":
+        return cls(
+            day=order.order_date.date(),
+            locality=order.locality or "",
+            status=order.status,
+            total=order.total_amount,
+            lines=list(lines),
+        )
+
+
+class SalesRollupRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_orders(self, orders: Iterable[RollupOrder]) -> None:
+        """
+        Suma órdenes nuevas a los acumulados, con un upsert multi-fila por tabla.
+        No hace commit: va en la transacción del checkout.
+        """
+        self._apply((order, 1) for order in orders)
+
+    def move_status(self, order: RollupOrder, new_status: str) -> None:
+        """Pasa una orden de su estado actual (`order.status`) a `new_status`. No hace commit."""
+        self._apply([(order, -1), (order._replace(status=new_status), 1)])
+
+    def order_entry(self, order: Order) -> RollupOrder:
+        """Arma el aporte de una orden ya guardada, leyendo la categoría de sus productos."""
+        lines = (
+            self.db.query(Product.category_id, OrderItem.quantity, OrderItem.unit_price)
+            .join(Product, Product.id == OrderItem.product_id)
+            .filter(OrderItem.order_id == order.id)
+            .all()
+        )
+        return RollupOrder.of(order, (tuple(line) for line in lines))
+
+    def _apply(self, changes: Iterable[Tuple[RollupOrder, int]]) -> None:
+        daily: Dict[tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+        by_category: Dict[tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+        for order, sign in changes:
+            key = (order.day, order.locality or "", order.status)
+            totals = daily[key]
+            totals[0] += sign
+            totals[1] += sign * sum(quantity for _, quantity, _ in order.lines)
+            totals[2] += sign * order.total
+
+            categories = set()
+            for category_id, quantity, price in order.lines:
+                category_id = category_id or NO_CATEGORY
+                totals = by_category[(order.day, category_id) + key[1:]]
+                totals[1] += sign * quantity
+                totals[2] += sign * quantity * price
+                categories.add(category_id)
+            for category_id in categories:
+                by_category[(order.day, category_id) + key[1:]][0] += sign
+
+        # Orden fijo de tablas y de filas: dos transacciones simultáneas toman los bloqueos en el mismo orden
+        self._add(SalesDaily, DAILY_KEY, daily)
+        self._add(SalesCategoryDaily, CATEGORY_DAILY_KEY, by_category)
+        self._add(SalesMonthly, MONTHLY_KEY, _by_month(daily))
+        self._add(SalesCategoryMonthly, CATEGORY_MONTHLY_KEY, _by_month(by_category))
+
+    def _add(self, model, key_columns: Sequence[str], totals: Dict[tuple, List]) -> None:
+        """Suma (órdenes, unidades, facturación) a las filas de `totals` con un upsert multi-fila."""
+        if not totals:
+            return
+        upsert(
+            self.db,
+            model.__table__,
+            [
+                dict(zip(key_columns, key), orders=orders, units=units, revenue=revenue)
+                for key, (orders, units, revenue) in sorted(totals.items())
+            ],
+            key_columns=key_columns,
+            update=lambda incoming: {
+                "orders": model.orders + incoming.orders,
+                "units": model.units + incoming.units,
+                "revenue": model.revenue + incoming.revenue,
+            },
+        )
+
+    def daily_totals(
+        self, date_from: date, date_to: date, locality: Optional[str] = None, status: Optional[str] = None
+    ) -> List[Tuple[date, int, int, float]]:
+        """(día, órdenes, unidades, facturación) de cada día con ventas en el rango (inclusivo)."""
+        totals = self._sum(
+            [(SalesDaily, SalesDaily.day, date_from, date_to)], lambda model, period: [period], locality, status
+        )
+        return [(day, *totals[(day,)]) for (day,) in sorted(totals)]
+
+    def monthly_totals(
+        self, date_from: date, date_to: date, locality: Optional[str] = None, status: Optional[str] = None
+    ) -> List[Tuple[date, int, int, float]]:
+        """(día 1 del mes, órdenes, unidades, facturación) de cada mes con ventas en el rango (inclusivo)."""
+        totals = _by_month(self._sum(
+            _levels(date_from, date_to, SalesDaily, SalesMonthly), lambda model, period: [period], locality, status
+        ))
+        return [(month, *totals[(month,)]) for (month,) in sorted(totals)]
+
+    def locality_totals(
+        self, date_from: date, date_to: date, status: Optional[str] = None
+    ) -> List[Tuple[str, int, int, float]]:
+        """(localidad, órdenes, unidades, facturación) en el rango, de mayor a menor facturación."""
+        totals = self._sum(
+            _levels(date_from, date_to, SalesDaily, SalesMonthly), lambda model, period: [model.locality], None, status
+        )
+        return sorted(
+            ((locality, *values) for (locality,), values in totals.items()),
+            key=lambda row: (-row[3], row[0]),
+        )
+
+    def category_totals(
+        self, date_from: date, date_to: date, locality: Optional[str] = None, status: Optional[str] = None
+    ) -> List[Tuple[int, Optional[str], int, int, float]]:
+        """(category_id, nombre, órdenes, unidades, facturación) en el rango, de mayor a menor facturación."""
+        totals = self._sum(
+            _levels(date_from, date_to, SalesCategoryDaily, SalesCategoryMonthly),
+            lambda model, period: [model.category_id],
+            locality,
+            status,
+        )
+        names = dict(
+            self.db.query(Category.id, Category.name).filter(Category.id.in_([key[0] for key in totals])).all()
+        ) if totals else {}
+        return sorted(
+            ((category_id, names.get(category_id), *values) for (category_id,), values in totals.items()),
+            key=lambda row: (-row[4], row[0]),
+        )
+
+    def _sum(
+        self,
+        levels: List[Tuple[Any, Any, date, date]],
+        group_by: Callable[[Any, Any], List],
+        locality: Optional[str],
+        status: Optional[str],
+    ) -> Dict[tuple, List]:
+        """
+        Suma (órdenes, unidades, facturación) de cada tramo de `levels` agrupando por las
+        columnas que devuelve `group_by(modelo, columna de fecha)`, y junta los tramos.
+        """
+        totals: Dict[tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+        for model, period, period_from, period_to in levels:
+            columns = group_by(model, period)
+            query = self.db.query(model).filter(period >= period_from, period <= period_to)
+            if locality is not None:
+                query = query.filter(model.locality == locality)
+            if status:
+                query = query.filter(model.status == status)
+            rows = query.with_entities(
+                *columns, func.sum(model.orders), func.sum(model.units), func.sum(model.revenue)
+            ).group_by(*columns).all()
+            for *key, orders, units, revenue in rows:
+                values = totals[tuple(key)]
+                values[0] += orders or 0
+                values[1] += units or 0
+                values[2] += revenue or 0
+        return totals
+
+    def rebuild(self) -> int:
+        """
+        Recalcula las tablas diarias desde orders/order_items con INSERT ... SELECT agregados,
+        las mensuales a partir de las diarias, y confirma. Devuelve la cantidad de filas diarias.
+        """
+        for model in (SalesDaily, SalesCategoryDaily, SalesMonthly, SalesCategoryMonthly):
+            self.db.query(model).delete(synchronize_session=False)
+
+        order_day = func.date(Order.order_date)
+        locality = func.coalesce(Order.locality, "")
+
+        units = (
+            select(OrderItem.order_id, func.sum(OrderItem.quantity).label("units"))
+            .group_by(OrderItem.order_id)
+            .subquery()
+        )
+        daily = (
+            select(
+                order_day, locality, Order.status, func.count(Order.id),
+                func.coalesce(func.sum(units.c.units), 0), func.sum(Order.total_amount),
+            )
+            .outerjoin(units, units.c.order_id == Order.id)
+            .group_by(order_day, locality, Order.status)
+        )
+        self.db.execute(insert(SalesDaily).from_select(
+            ["day", "locality", "status", "orders", "units", "revenue"], daily
+        ))
+
+        category_id = func.coalesce(Product.category_id, NO_CATEGORY)
+        by_category = (
+            select(
+                order_day, category_id, locality, Order.status, func.count(distinct(Order.id)),
+                func.sum(OrderItem.quantity), func.sum(OrderItem.quantity * OrderItem.unit_price),
+            )
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .group_by(order_day, category_id, locality, Order.status)
+        )
+        self.db.execute(insert(SalesCategoryDaily).from_select(
+            ["day", "category_id", "locality", "status", "orders", "units", "revenue"], by_category
+        ))
+
+        # El mes se agrupa en Python: no hay una función de fecha común a MariaDB y SQLite.
+        # Un `orders` mensual por categoría es la suma de los diarios (las órdenes son de un solo día)
+        for daily_model, monthly_model, key_columns in (
+            (SalesDaily, SalesMonthly, MONTHLY_KEY),
+            (SalesCategoryDaily, SalesCategoryMonthly, CATEGORY_MONTHLY_KEY),
+        ):
+            keys = [getattr(daily_model, name) for name in ("day",) + key_columns[1:]]
+            monthly = _by_month({
+                tuple(row[:-3]): list(row[-3:])
+                for row in self.db.query(*keys, daily_model.orders, daily_model.units, daily_model.revenue)
+            })
+            if monthly:
+                self.db.execute(insert(monthly_model), [
+                    dict(zip(key_columns, key), orders=orders, units=units, revenue=revenue)
+                    for key, (orders, units, revenue) in sorted(monthly.items())
+                ])
+        self.db.commit()
+        return self.db.query(func.count()).select_from(SalesDaily).scalar()
+
+
+def _by_month(totals: Dict[tuple, List]) -> Dict[tuple, List]:
+    """Junta acumulados cuya clave empieza por un día en el mes de ese día (día 1)."""
+    monthly: Dict[tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+    for (day, *rest), (orders, units, revenue) in totals.items():
+        values = monthly[(day.replace(day=1), *rest)]
+        values[0] += orders
+        values[1] += units
+        values[2] += revenue
+    return monthly
+
+
+def _levels(date_from: date, date_to: date, daily, monthly) -> List[Tuple[Any, Any, date, date]]:
+    """
+    Tramos (modelo, columna de fecha, desde, hasta) que cubren el rango inclusivo: los meses
+    completos se leen de la tabla mensual y de la diaria solo los días sueltos de los bordes
+    (a lo sumo 60). Un rango de años lee una fila por mes y no una por día.
+    """
+    first_month = date_from if date_from.day == 1 else _next_month(date_from)
+    # Día 1 del mes siguiente al último mes completo
+    after_last = _next_month(date_to)
+    if after_last - timedelta(days=1) != date_to:
+        after_last = date_to.replace(day=1)
+    if first_month >= after_last:
+        return [(daily, daily.day, date_from, date_to)]
+
+    levels = [(monthly, monthly.month, first_month, after_last - timedelta(days=1))]
+    if date_from < first_month:
+        levels.append((daily, daily.day, date_from, first_month - timedelta(days=1)))
+    if after_last <= date_to:
+        levels.append((daily, daily.day, after_last, date_to))
+    return levels
+
+
+def _next_month(day: date) -> date:
+    """Día 1 del mes siguiente al de `day`."""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
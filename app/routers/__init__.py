@@ -5,4 +5,5 @@ from .category_router import category_router
 from .cart_item_router import cart_item_router
 from .auth_router import auth_router
 from .cart_router import cart_router
-from .order_router import order_router
\ No newline at end of file
+from .order_router import order_router
+from .dashboard_router import dashboard_router
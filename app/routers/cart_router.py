@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.models.user import User 
 from app.core.security import get_db, get_current_user 
+from app.core.etag import etag_matches, not_modified
+from app.core.rendering import SchemaRenderer
 
-from app.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
+from app.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate, CartOperation, CartSummary
 from app.services.cart_service import CartService 
 
 cart_router = APIRouter(
@@ -13,6 +17,9 @@ cart_router = APIRouter(
     dependencies=[Depends(get_current_user)] 
 )
 
+# Serializador precompilado para la ruta rápida de JSON (settings.FAST_JSON_RENDERING)
+cart_renderer = SchemaRenderer(CartResponse)
+
 def get_cart_service(db: Session = Depends(get_db)) -> CartService:
     """Retorna una instancia del servicio de carrito con la sesión de BD inyectada."""
     return CartService(db)
@@ -33,7 +40,26 @@ def get_user_cart(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Carrito no encontrado (o usuario no válido)."
         )
-    return cart
+    return cart_renderer.respond(cart)
+
+# READ Summary (Badge del header)
+@cart_router.get("/summary", response_model=CartSummary)
+def get_cart_summary(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    service: CartService = Depends(get_cart_service),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Productos distintos, unidades y total del carrito (una sola consulta agregada).
+    Soporta If-None-Match: si el resumen no cambió responde 304 sin cuerpo.
+    """
+    summary = service.get_summary(current_user.id)
+    etag = service.get_summary_etag(current_user.id, summary)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return summary
 
 # ADD/UPDATE Item (Añadir al carrito)
 @cart_router.post("/", response_model=CartResponse, status_code=status.HTTP_200_OK)
@@ -62,7 +88,7 @@ def add_item_to_cart(
             )
         raise e
         
-    return updated_cart
+    return cart_renderer.respond(updated_cart)
 
 # UPDATE Quantity (Establecer cantidad específica)
 @cart_router.put("/", response_model=CartResponse)
@@ -82,7 +108,30 @@ def update_item_in_cart(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Item no encontrado en el carrito o usuario inválido."
         )
-    return updated_cart
+    return cart_renderer.respond(updated_cart)
+
+# PATCH (Lote de cambios: add/set/remove)
+@cart_router.patch("/", response_model=CartResponse)
+def apply_cart_operations(
+    operations: List[CartOperation],
+    current_user: User = Depends(get_current_user),
+    service: CartService = Depends(get_cart_service)
+):
+    """
+    Aplica varias operaciones sobre el carrito en una sola transacción y devuelve el
+    carrito final. Si algún producto no existe o no alcanza el stock, no se aplica ninguna.
+    """
+    try:
+        updated_cart = service.apply_operations(current_user.id, operations)
+    except ValueError as e:
+        if "Product not found" in str(e):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e).replace("Product not found", "Productos no encontrados")
+            )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return cart_renderer.respond(updated_cart)
 
 # DELETE Item
 @cart_router.delete("/items/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db 
+from app.core.etag import etag_matches, not_modified
 from ..schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
 from app.services.category_service import CategoryService 
 
@@ -14,8 +15,17 @@ def get_category_service(db: Session = Depends(get_db)) -> CategoryService:
 
 # READ (Listar todos)
 @category_router.get("/", response_model=List[CategoryResponse])
-def list_categories(service: CategoryService = Depends(get_category_service)):
-    """Obtiene una lista de todas las categorías."""
+def list_categories(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service: CategoryService = Depends(get_category_service),
+):
+    """Obtiene una lista de todas las categorías (con soporte de ETag / 304)."""
+    etag = service.get_categories_etag()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
     return service.get_all_categories()
 
 # READ (Por ID)
@@ -0,0 +1,65 @@
+# app/routers/dashboard_router.py
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.security import get_current_admin_user
+from app.schemas.dashboard import CategorySales, LocalitySales, SalesSeries
+from app.services.dashboard_service import DashboardService
+
+dashboard_router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+
+def get_dashboard_service(db: Session = Depends(get_db)) -> DashboardService:
+    """Retorna una instancia del servicio del dashboard con la sesión de BD inyectada."""
+    return DashboardService(db)
+
+
+@dashboard_router.get("/sales", response_model=SalesSeries)
+def get_sales(
+    date_from: Optional[date] = Query(None, description="Desde (inclusivo); por defecto, 30 días antes de date_to"),
+    date_to: Optional[date] = Query(None, description="Hasta (inclusivo); por defecto, hoy (UTC)"),
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="'day', 'week' o 'month'"),
+    locality: Optional[str] = Query(None, description="Solo órdenes de esta localidad"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Solo órdenes en este estado"),
+    service: DashboardService = Depends(get_dashboard_service),
+):
+    """ADMIN: Órdenes, unidades y facturación por período."""
+    try:
+        return service.get_sales(date_from, date_to, granularity, locality, status_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@dashboard_router.get("/sales/by-category", response_model=List[CategorySales])
+def get_sales_by_category(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    locality: Optional[str] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    service: DashboardService = Depends(get_dashboard_service),
+):
+    """ADMIN: Ventas del rango por categoría, de mayor a menor facturación."""
+    try:
+        return service.get_sales_by_category(date_from, date_to, locality, status_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@dashboard_router.get("/sales/by-locality", response_model=List[LocalitySales])
+def get_sales_by_locality(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    service: DashboardService = Depends(get_dashboard_service),
+):
+    """ADMIN: Ventas del rango por localidad, de mayor a menor facturación."""
+    try:
+        return service.get_sales_by_locality(date_from, date_to, status_filter)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
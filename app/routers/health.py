@@ -1,9 +1,34 @@
 
 from fastapi import APIRouter
 
+from app.services.catalog_cache import catalog_cache
+from app.services.cart_store import write_behind_carts
+from app.services.columnar_catalog import columnar_catalog
+from app.services.flash_sale import flash_sale_queue
+
 health_router = APIRouter()
 
 @health_router.get("/")
 def health():
     return {"status": "ok"}
 
+@health_router.get("/cache")
+def cache_stats():
+    """Contadores de la caché del catálogo (hits, misses, evicciones)."""
+    return catalog_cache.stats()
+
+
+@health_router.get("/columnar")
+def columnar_stats():
+    """Estado del catálogo columnar en memoria (tamaño, versión, refrescos)."""
+    return columnar_catalog.stats()
+
+@health_router.get("/carts")
+def cart_store_stats():
+    """Carritos en memoria y escrituras pendientes (CART_STORE_BACKEND=memory)."""
+    return write_behind_carts.stats()
+
+@health_router.get("/flash-sale")
+def flash_sale_stats():
+    """Cola de checkouts de venta flash: lotes, órdenes y agotados (FLASH_SALE_PRODUCT_IDS)."""
+    return flash_sale_queue.stats()
@@ -1,14 +1,31 @@
 # app/routers/order_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from typing import Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.schemas.order import OrderCreate, OrderRead, OrderStatusUpdate
+from app.core.rendering import SchemaRenderer
+from app.schemas.order import OrderCreate, OrderFilterParams, OrderPage, OrderRead, OrderStatusUpdate
+from app.core.pagination import InvalidCursorError
 from app.services.order_service import OrderService
-from app.core.security import get_current_user
+from app.services.idempotency_service import (
+    IdempotencyKeyInUseError,
+    IdempotencyKeyMismatchError,
+    IdempotencyService,
+)
+from app.services.order_export_service import OrderExportService, EXPORT_FORMATS, EXPORT_MEDIA_TYPES
+from app.services.flash_sale import FlashSaleTimeoutError
+from app.core.security import get_current_user, get_current_admin_user
 from app.models.user import User
 
 order_router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# Serializadores precompilados para la ruta rápida de JSON (settings.FAST_JSON_RENDERING)
+order_renderer = SchemaRenderer(OrderRead)
+order_list_renderer = SchemaRenderer(list[OrderRead])
+order_page_renderer = SchemaRenderer(OrderPage)
+
 
 def get_order_service(db: Session = Depends(get_db)) -> OrderService:
     """Retorna una instancia del servicio de órdenes con la sesión de BD inyectada."""
@@ -24,20 +41,58 @@ def get_order_service(db: Session = Depends(get_db)) -> OrderService:
 def create_order(
     order_data: OrderCreate,
     current_user: User = Depends(get_current_user),
-    service: OrderService = Depends(get_order_service)
+    service: OrderService = Depends(get_order_service),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
     """
     Finaliza el proceso de compra. 
     Ejecuta la transacción atómica: Verifica Stock -> Resta Stock -> Crea Orden.
+    Con el header Idempotency-Key, los reintentos con la misma clave devuelven la
+    orden ya creada (header Idempotent-Replayed) sin volver a ejecutar el checkout.
     """
+    idempotency = IdempotencyService(service.db) if idempotency_key is not None else None
     try:
-      
-        new_order = service.create_order_transactional(
-            user_id=current_user.id, 
-            order_data=order_data
-        )
-        return new_order
+        if idempotency is not None:
+            stored = idempotency.begin(current_user.id, idempotency_key, order_data)
+            if stored is not None:
+                return Response(
+                    content=stored,
+                    status_code=status.HTTP_201_CREATED,
+                    media_type="application/json",
+                    headers={"Idempotent-Replayed": "true"},
+                )
+
+        try:
+            new_order = service.create_order_transactional(
+                user_id=current_user.id, 
+                order_data=order_data,
+                idempotency_key=idempotency_key,
+            )
+        except FlashSaleTimeoutError as e:
+            # Si el lote ya tomó la orden puede crearla igual: la clave sigue tomada y el
+            # reintento recibe esa orden en lugar de crear otra
+            if idempotency is not None and not e.in_doubt:
+                idempotency.abandon(current_user.id, idempotency_key)
+            raise
+        except Exception:
+            if idempotency is not None:
+                idempotency.abandon(current_user.id, idempotency_key)
+            raise
+
+        if idempotency is not None:
+            return Response(
+                content=idempotency.complete(current_user.id, idempotency_key, new_order),
+                status_code=status.HTTP_201_CREATED,
+                media_type="application/json",
+            )
+        return order_renderer.respond(new_order, status_code=status.HTTP_201_CREATED)
         
+    except IdempotencyKeyInUseError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except FlashSaleTimeoutError as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -53,32 +108,104 @@ def create_order(
 # READ (Historial de Órdenes del Cliente)
 @order_router.get(
     "/my-orders", 
-    response_model=list[OrderRead],
+    response_model=Union[list[OrderRead], OrderPage],
     dependencies=[Depends(get_current_user)]
 )
 def get_my_orders(
     current_user: User = Depends(get_current_user),
-    service: OrderService = Depends(get_order_service)
+    service: OrderService = Depends(get_order_service),
+    status_filter: Optional[str] = Query(None, alias="status", description="Estado de la orden (ej: 'Pending')"),
+    date_from: Optional[date] = Query(None, description="Desde esta fecha (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Hasta esta fecha (inclusive)"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Tamaño de página (activa la paginación por cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en 'next_cursor'"),
 ):
-    """Obtiene el historial de órdenes del usuario autenticado."""
-    return service.get_orders_by_user_id(current_user.id)
+    """
+    Obtiene el historial de órdenes del usuario autenticado, más recientes primero.
+    Con `limit` o `cursor` responde una página `{items, next_cursor}`; sin ellos, la lista completa.
+    """
+    filters = OrderFilterParams(user_id=current_user.id, status=status_filter, date_from=date_from, date_to=date_to)
+    if limit is None and cursor is None:
+        return order_list_renderer.respond(service.get_orders_by_user_id(current_user.id, filters))
+
+    try:
+        orders, next_cursor = service.get_orders_page(filters, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return order_page_renderer.respond({"items": orders, "next_cursor": next_cursor})
 
 
 # ADMIN: Ver TODAS las órdenes (Para Dashboard)
 @order_router.get(
     "/admin/all", 
-    response_model=list[OrderRead],
+    response_model=Union[list[OrderRead], OrderPage],
     dependencies=[Depends(get_current_user)]
 )
 def get_all_orders_admin(
     current_user: User = Depends(get_current_user),
-    service: OrderService = Depends(get_order_service)
+    service: OrderService = Depends(get_order_service),
+    status_filter: Optional[str] = Query(None, alias="status", description="Estado de la orden (ej: 'Pending')"),
+    date_from: Optional[date] = Query(None, description="Desde esta fecha (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Hasta esta fecha (inclusive)"),
+    locality: Optional[str] = Query(None, description="Localidad de envío"),
+    user_id: Optional[int] = Query(None, description="Órdenes de este usuario"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Tamaño de página (activa la paginación por cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en 'next_cursor'"),
 ):
-
+    """
+    Órdenes del sistema, más recientes primero, con filtros.
+    Con `limit` o `cursor` responde una página `{items, next_cursor}`; sin ellos, la lista
+    completa (para volúmenes grandes usar la paginación o /orders/admin/export).
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Requiere privilegios de Administrador")
-        
-    return service.get_all_orders()
+
+    filters = OrderFilterParams(
+        user_id=user_id, status=status_filter, date_from=date_from, date_to=date_to, locality=locality
+    )
+    if limit is None and cursor is None:
+        return order_list_renderer.respond(service.get_all_orders(filters))
+
+    try:
+        orders, next_cursor = service.get_orders_page(filters, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return order_page_renderer.respond({"items": orders, "next_cursor": next_cursor})
+
+
+# ADMIN: Exportar órdenes (streaming)
+@order_router.get(
+    "/admin/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(get_current_admin_user)]
+)
+def export_orders(
+    format: str = Query("ndjson", description="'ndjson' o 'csv'"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Estado de la orden (ej: 'Pending')"),
+    date_from: Optional[date] = Query(None, description="Desde esta fecha (inclusive)"),
+    date_to: Optional[date] = Query(None, description="Hasta esta fecha (inclusive)"),
+    locality: Optional[str] = Query(None, description="Localidad de envío"),
+    user_id: Optional[int] = Query(None, description="Órdenes de este usuario"),
+):
+    """
+    Descarga las órdenes filtradas como NDJSON (una orden por línea, con sus ítems) o CSV
+    (una fila por ítem). Se envían a medida que se leen de la BD.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato no soportado. Usa 'ndjson' o 'csv'."
+        )
+    filters = OrderFilterParams(
+        user_id=user_id, status=status_filter, date_from=date_from, date_to=date_to, locality=locality
+    )
+    return StreamingResponse(
+        OrderExportService().stream(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'},
+    )
 
 
 
@@ -105,4 +232,4 @@ def change_order_status(
         if status_data.status != "Completed":
             raise HTTPException(status_code=403, detail="Solo puedes marcar la orden como Completada")
 
-    return service.update_order_status(order_id, status_data.status)
\ No newline at end of file
+    return order_renderer.respond(service.update_order_status(order_id, status_data.status))
\ No newline at end of file
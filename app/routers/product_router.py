@@ -1,53 +1,276 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Annotated, Optional
+from typing import List, Annotated, Optional, Union
 
 from app.core.database import get_db
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductFilterParams
+from app.core.etag import etag_matches, not_modified
+from app.core.pagination import InvalidCursorError
+from app.core.rendering import SchemaRenderer
+from app.models.product import STOCK_STATUSES
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductFilterParams, ProductPage, ProductFacets, ProductImportReport, StockAdjustment, StockSyncReport, LowStockPage, BoughtTogetherItem, BestsellerPage
 from ..services.product_service import ProductCreate, ProductService
+from ..services.product_import_service import ProductImportService, IMPORT_FORMATS
+from ..services.stock_sync_service import StockSyncError, StockSyncService
+from ..services.recommendation_service import RecommendationService
+from ..services.sales_service import SalesService
+from ..services.product_export_service import ProductExportService, EXPORT_FORMATS, EXPORT_MEDIA_TYPES
 from ..core.security import get_current_user, get_current_admin_user 
 
 
 product_router = APIRouter(prefix="/products", tags=["Products"]) 
 
+# Serializadores precompilados para la ruta rápida de JSON (settings.FAST_JSON_RENDERING)
+product_renderer = SchemaRenderer(ProductResponse)
+product_list_renderer = SchemaRenderer(List[ProductResponse])
+product_page_renderer = SchemaRenderer(ProductPage)
+product_facets_renderer = SchemaRenderer(ProductFacets)
+low_stock_renderer = SchemaRenderer(LowStockPage)
+bought_together_renderer = SchemaRenderer(List[BoughtTogetherItem])
+bestseller_page_renderer = SchemaRenderer(BestsellerPage)
+
 
 def get_product_service(db: Session = Depends(get_db)) -> ProductService:
     """Retorna una instancia del servicio de productos con la sesión de BD inyectada."""
     return ProductService(db)
 
 
+def get_product_import_service(db: Session = Depends(get_db)) -> ProductImportService:
+    """Retorna una instancia del servicio de importación con la sesión de BD inyectada."""
+    return ProductImportService(db)
+
+
+def get_stock_sync_service(db: Session = Depends(get_db)) -> StockSyncService:
+    """Retorna una instancia del servicio de sincronización de stock con la sesión de BD inyectada."""
+    return StockSyncService(db)
+
+
+def get_recommendation_service(db: Session = Depends(get_db)) -> RecommendationService:
+    """Retorna una instancia del servicio de recomendaciones con la sesión de BD inyectada."""
+    return RecommendationService(db)
+
+
+def get_sales_service(db: Session = Depends(get_db)) -> SalesService:
+    """Retorna una instancia del servicio de ventas con la sesión de BD inyectada."""
+    return SalesService(db)
+
+
+def _check_stock_status(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Valida el filtro `stock_status` (400 si trae un estado desconocido)."""
+    invalid = [value for value in values or [] if value not in STOCK_STATUSES]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estado de stock inválido: {', '.join(invalid)}. Usa: {', '.join(STOCK_STATUSES)}."
+        )
+    return values
+
+
 # READ (Listar todos) - ACCESO PÚBLICO (Visitante y Cliente)
-@product_router.get("/", response_model=List[ProductResponse])
+@product_router.get("/", response_model=Union[List[ProductResponse], ProductPage])
 def list_products(
+    response: Response,
+    categories: Optional[List[str]] = Query(None, description="Lista de categorías"),
+    price_min: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
+    price_max: Optional[float] = Query(None, description="Precio máximo"),
+    search: Optional[str] = Query(None, description="Texto a buscar en nombre, descripción y SKU"),
+    stock_status: Optional[List[str]] = Query(None, description="Estados de stock: 'Normal', 'Alerta', 'Agotado'"),
+    service: ProductService = Depends(get_product_service),
+    sort_by: Optional[str] = Query(None, description="Campo: 'price', 'created_at', 'name', 'stock_status', 'popularity'"),
+    order: Optional[str] = Query("asc", description="Dirección: 'asc' o 'desc'"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Tamaño de página (activa la paginación por cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en 'next_cursor'"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Permite a Visitantes y Clientes explorar el catálogo y usar filtros.
+    Con `search` (y sin `sort_by`) los resultados vienen ordenados por relevancia.
+    Con `limit` o `cursor` responde una página `{items, next_cursor}`; sin ellos, la lista completa.
+    Soporta If-None-Match: si el listado no cambió responde 304 sin consultar los productos.
+    """
+    filters = ProductFilterParams(
+        categories=categories,
+        price_min=price_min,
+        price_max=price_max,
+        search=search,
+        stock_status=_check_stock_status(stock_status),
+        sort_by=sort_by,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+    )
+
+    # El resumen del conjunto filtrado solo se calcula al revalidar; sin If-None-Match
+    # el ETag sale de la página que se sirve (caché o keyset), sin otra consulta
+    etag = None
+    if if_none_match:
+        etag = service.get_listing_etag(filters)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    if limit is None and cursor is None:
+        products = service.get_filtered_products(filters)
+        body, renderer = products, product_list_renderer
+        content_etag = service.get_content_etag(filters, products)
+    else:
+        try:
+            products, next_cursor = service.get_products_page(filters)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        body, renderer = {"items": products, "next_cursor": next_cursor}, product_page_renderer
+        content_etag = service.get_content_etag(filters, products, next_cursor)
+
+    # Revalidación de un ETag de contenido: si es lo mismo, 304 con el ETag del resumen.
+    # Con el resumen calculado la página no sale de catalog_cache (ver ProductService), así
+    # que se comparó contra la BD o el snapshot del resumen, nunca contra una entrada vieja
+    if etag is not None and etag_matches(if_none_match, content_etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag or content_etag
+    return renderer.respond(body, response=response)
+
+
+# READ (Facetas del listado) - ACCESO PÚBLICO
+# Debe declararse antes de "/{product_id}" para que "facets" no se interprete como un ID
+@product_router.get("/facets", response_model=ProductFacets)
+def get_product_facets(
     categories: Optional[List[str]] = Query(None, description="Lista de categorías"),
     price_min: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
     price_max: Optional[float] = Query(None, description="Precio máximo"),
+    search: Optional[str] = Query(None, description="Texto a buscar en nombre, descripción y SKU"),
+    stock_status: Optional[List[str]] = Query(None, description="Estados de stock: 'Normal', 'Alerta', 'Agotado'"),
+    bucket_size: float = Query(50, gt=0, description="Ancho de cada tramo del histograma de precios"),
+    service: ProductService = Depends(get_product_service),
+):
+    """Conteos por categoría, tramos de precio y estado de stock para los filtros actuales."""
+    filters = ProductFilterParams(
+        categories=categories,
+        price_min=price_min,
+        price_max=price_max,
+        search=search,
+        stock_status=_check_stock_status(stock_status),
+    )
+    return product_facets_renderer.respond(service.get_facets(filters, bucket_size))
+
+
+# REPORTE de stock bajo - RESTRINGIDO A ADMIN
+@product_router.get(
+    "/admin/low-stock",
+    response_model=LowStockPage,
+    dependencies=[Depends(get_current_admin_user)]
+)
+def get_low_stock_report(
+    limit: int = Query(50, ge=1, le=500, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en 'next_cursor'"),
+    category_id: Optional[int] = Query(None, description="Solo productos de esta categoría"),
     service: ProductService = Depends(get_product_service),
-    sort_by: Optional[str] = Query(None, description="Campo: 'price', 'created_at', 'name'"),
+):
+    """
+    Productos en Alerta o Agotado ordenados por margen (stock_current - stock_min), del
+    más urgente al menos. Pagina por cursor sobre el índice del margen.
+    """
+    try:
+        items, next_cursor = service.get_low_stock_page(limit, cursor, category_id)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return low_stock_renderer.respond({"items": items, "next_cursor": next_cursor})
+
+
+# EXPORT del catálogo (streaming) - RESTRINGIDO A ADMIN
+@product_router.get(
+    "/admin/export",
+    response_class=StreamingResponse,
+    dependencies=[Depends(get_current_admin_user)]
+)
+def export_products(
+    format: str = Query("ndjson", description="'ndjson' o 'csv'"),
+    categories: Optional[List[str]] = Query(None, description="Lista de categorías"),
+    price_min: Optional[float] = Query(None, ge=0, description="Precio mínimo"),
+    price_max: Optional[float] = Query(None, description="Precio máximo"),
+    search: Optional[str] = Query(None, description="Texto a buscar en nombre, descripción y SKU"),
+    stock_status: Optional[List[str]] = Query(None, description="Estados de stock: 'Normal', 'Alerta', 'Agotado'"),
+    sort_by: Optional[str] = Query(None, description="Campo: 'price', 'created_at', 'name', 'stock_status', 'popularity' (por defecto, id)"),
     order: Optional[str] = Query("asc", description="Dirección: 'asc' o 'desc'"),
 ):
-    """Permite a Visitantes y Clientes explorar el catálogo y usar filtros."""
+    """
+    Descarga el catálogo (con los mismos filtros del listado) como NDJSON o CSV.
+    Las filas se envían a medida que se leen de la BD, sin armar la respuesta en memoria.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato no soportado. Usa 'ndjson' o 'csv'."
+        )
     filters = ProductFilterParams(
         categories=categories,
         price_min=price_min,
         price_max=price_max,
+        search=search,
+        stock_status=_check_stock_status(stock_status),
         sort_by=sort_by,
-        order=order
+        order=order,
+    )
+    return StreamingResponse(
+        ProductExportService().stream(filters, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
     )
-    return service.get_filtered_products(filters)
+
+
+# READ (Más vendidos) - ACCESO PÚBLICO
+@product_router.get("/bestsellers", response_model=BestsellerPage)
+def get_bestsellers(
+    window: str = Query("30d", pattern="^(7d|30d|total)$", description="Ventana: '7d', '30d' o 'total'"),
+    category: Optional[str] = Query(None, description="Solo productos de esta categoría"),
+    limit: int = Query(20, ge=1, le=100, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en 'next_cursor'"),
+    service: SalesService = Depends(get_sales_service),
+):
+    """Ranking de productos por unidades vendidas en la ventana indicada."""
+    try:
+        items, next_cursor = service.get_bestsellers(window, limit, cursor, category)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return bestseller_page_renderer.respond({"items": items, "next_cursor": next_cursor})
 
 
 #  READ (Por ID) - ACCESO PÚBLICO (Visitante y Cliente)
 @product_router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, service: ProductService = Depends(get_product_service)):
-    """Permite a Visitantes ver el detalle del producto."""
+def get_product(
+    product_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service: ProductService = Depends(get_product_service),
+):
+    """Permite a Visitantes ver el detalle del producto (con soporte de ETag / 304)."""
     product = service.get_product_by_id(product_id)
     if product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Producto con ID {product_id} no encontrado."
         )
-    return product
+
+    # El ETag sale de la misma lectura que el cuerpo: nunca acompaña a un cuerpo viejo
+    etag = service.get_product_etag(product)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return product_renderer.respond(product, response=response)
+
+# READ (Comprados juntos frecuentemente) - ACCESO PÚBLICO
+@product_router.get("/{product_id}/bought-together", response_model=List[BoughtTogetherItem])
+def get_bought_together(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Cantidad máxima de recomendaciones"),
+    service: RecommendationService = Depends(get_recommendation_service),
+):
+    """Productos que más veces se compraron en la misma orden que este."""
+    items = service.get_bought_together(product_id, limit)
+    if items is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Producto con ID {product_id} no encontrado."
+        )
+    return bought_together_renderer.respond(items)
 
 # CREATE - RESTRINGIDO A ADMIN
 @product_router.post(
@@ -61,7 +284,7 @@ def create_product(
     service: ProductService = Depends(get_product_service)
 ):
     """Crea un nuevo producto (Gestión de Inventario)."""
-    return service.create_product(product_data)
+    return product_renderer.respond(service.create_product(product_data), status_code=status.HTTP_201_CREATED)
 
 # UPDATE - RESTRINGIDO A ADMIN
 @product_router.patch("/{product_id}", response_model=ProductResponse)
@@ -77,7 +300,62 @@ def update_product_partial(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Producto con ID {product_id} no encontrado para actualizar."
         )
-    return product
+    return product_renderer.respond(product)
+
+# IMPORT masivo (upsert por SKU) - RESTRINGIDO A ADMIN
+@product_router.post(
+    "/admin/import",
+    response_model=ProductImportReport,
+    dependencies=[Depends(get_current_admin_user)]
+)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, description="'csv' o 'ndjson' (por defecto se deduce del Content-Type)"),
+    service: ProductImportService = Depends(get_product_import_service),
+):
+    """
+    Importa un catálogo de proveedor enviado como cuerpo CSV (con encabezado) o NDJSON.
+    Crea los SKU nuevos y actualiza los existentes; devuelve el reporte con errores por fila.
+    """
+    file_format = format or _format_from_content_type(request.headers.get("content-type", ""))
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Formato no soportado. Usa Content-Type text/csv o application/x-ndjson."
+        )
+    return await service.import_stream(request.stream(), file_format)
+
+
+def _format_from_content_type(content_type: str) -> Optional[str]:
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/csv":
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+# SINCRONIZACIÓN masiva de stock - RESTRINGIDO A ADMIN
+@product_router.post(
+    "/admin/stock-sync",
+    response_model=StockSyncReport,
+    dependencies=[Depends(get_current_admin_user)]
+)
+def sync_stock(
+    adjustments: List[StockAdjustment],
+    service: StockSyncService = Depends(get_stock_sync_service),
+):
+    """
+    Aplica en una sola transacción un lote de niveles de stock `{sku, stock_current}`
+    o variaciones `{sku, delta}`. Informa los SKU modificados, inexistentes y rechazados.
+    """
+    try:
+        return service.sync_stock(adjustments)
+    except StockSyncError:
+        # El servicio ya registró el error de la BD
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno al sincronizar el stock. La transacción fue revertida."
+        )
 
 #  DELETE - RESTRINGIDO A ADMIN
 @product_router.delete(
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional
 from app.schemas.product import ProductResponse # Asumo que existe
 
 class CartItemBase(BaseModel):
@@ -12,6 +12,23 @@ class CartItemCreate(CartItemBase):
 class CartItemUpdate(CartItemBase):
     pass
 
+class CartOperation(BaseModel):
+    """
+    Operación de un lote sobre el carrito (PATCH /cart):
+    `add` suma `quantity`, `set` la fija (0 quita el producto) y `remove` lo quita.
+    """
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_quantity(self):
+        if self.op == "add" and (self.quantity is None or self.quantity <= 0):
+            raise ValueError("'add' requiere 'quantity' mayor que 0.")
+        if self.op == "set" and (self.quantity is None or self.quantity < 0):
+            raise ValueError("'set' requiere 'quantity' mayor o igual que 0.")
+        return self
+
 class CartItemResponse(CartItemBase):
     product: ProductResponse
     
@@ -24,4 +41,10 @@ class CartResponse(BaseModel):
     items: List[CartItemResponse] = []
     
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class CartSummary(BaseModel):
+    """Resumen del carrito para el badge del header: productos distintos, unidades y total."""
+    item_count: int = 0
+    total_quantity: int = 0
+    total_price: float = 0.0
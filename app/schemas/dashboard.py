@@ -0,0 +1,34 @@
+# app/schemas/dashboard.py
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class SalesTotals(BaseModel):
+    orders: int
+    units: int
+    revenue: float
+
+
+class SalesPeriod(SalesTotals):
+    """Ventas de un período; `period` es su primer día (lunes en semanas, día 1 en meses)."""
+    period: date
+
+
+class SalesSeries(BaseModel):
+    """Serie de ventas del rango pedido y su total."""
+    date_from: date
+    date_to: date
+    granularity: str
+    totals: SalesTotals
+    periods: List[SalesPeriod]
+
+
+class CategorySales(SalesTotals):
+    """Ventas de una categoría; `orders` cuenta las órdenes con algún producto de ella."""
+    category_id: Optional[int] = None
+    category_name: Optional[str] = None
+
+
+class LocalitySales(SalesTotals):
+    locality: str
@@ -1,5 +1,5 @@
 # app/schemas/order_schema.py
-from datetime import datetime
+from datetime import date, datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
@@ -35,6 +35,20 @@ class OrderRead(BaseModel):
     class Config:
         from_attributes = True
         
+class OrderFilterParams(BaseModel):
+    """Filtros del historial y de la consola de órdenes (fechas inclusivas)."""
+    user_id: Optional[int] = None
+    status: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    locality: Optional[str] = None
+
+
+class OrderPage(BaseModel):
+    """Página del historial de órdenes (más recientes primero)."""
+    items: List[OrderRead]
+    next_cursor: Optional[str] = None
+
 # Esquema de Entrada (Para crear una Orden)
 class OrderCreate(BaseModel):
     """Esquema usado por el Router para recibir los datos necesarios para la compra."""
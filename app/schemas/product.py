@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, model_validator
+from typing import Dict, List, Optional
 from app.schemas.category import CategoryName
 
 class ProductBase(BaseModel):
@@ -37,5 +37,112 @@ class ProductFilterParams(BaseModel):
     price_min: Optional[float] = None
     price_max: Optional[float] = None
     search: Optional[str] = None
+    stock_status: Optional[List[str]] = None
     sort_by: Optional[str] = None
-    order: Optional[str] = "asc"
\ No newline at end of file
+    order: Optional[str] = "asc"
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+
+class ProductPage(BaseModel):
+    """Página de productos con el cursor opaco para pedir la siguiente."""
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+
+class CategoryFacet(BaseModel):
+    category_id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Conteos para la barra lateral del catálogo según los filtros actuales."""
+    total: int
+    categories: List[CategoryFacet]
+    price_buckets: List[PriceBucket]
+    stock_status: Dict[str, int]
+
+class LowStockItem(BaseModel):
+    id: int
+    sku: str
+    name: str
+    category_id: Optional[int] = None
+    category: Optional[CategoryName] = None
+    stock_current: int
+    stock_min: int
+    stock_margin: int
+    stock_status: str
+
+    class Config:
+        from_attributes = True
+
+
+class LowStockPage(BaseModel):
+    """Página del reporte de stock bajo (más urgentes primero)."""
+    items: List[LowStockItem]
+    next_cursor: Optional[str] = None
+
+
+class BoughtTogetherItem(BaseModel):
+    """Producto comprado junto a otro y en cuántas órdenes coincidieron."""
+    product: ProductResponse
+    order_count: int
+
+
+class BestsellerItem(BaseModel):
+    product: ProductResponse
+    units_sold: int
+
+
+class BestsellerPage(BaseModel):
+    """Página del ranking de más vendidos."""
+    items: List[BestsellerItem]
+    next_cursor: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    line: int
+    sku: Optional[str] = None
+    errors: List[str]
+
+
+class ProductImportReport(BaseModel):
+    """Resultado de una importación masiva. `errors` se corta en un máximo fijo de filas."""
+    received: int = 0
+    upserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
+
+class StockAdjustment(BaseModel):
+    """Nivel de stock de un SKU: valor absoluto (`stock_current`) o variación (`delta`)."""
+    sku: str
+    stock_current: Optional[int] = None
+    delta: Optional[int] = None
+
+    @model_validator(mode="after")
+    def exactly_one_mode(self):
+        if (self.stock_current is None) == (self.delta is None):
+            raise ValueError("Indica 'stock_current' o 'delta' (solo uno de los dos).")
+        return self
+
+
+class StockRejection(BaseModel):
+    sku: str
+    reason: str
+
+
+class StockSyncReport(BaseModel):
+    """Resultado de una sincronización de stock. `unchanged` cuenta los SKU que ya tenían ese nivel."""
+    changed: List[str] = []
+    unchanged: int = 0
+    missing: List[str] = []
+    rejected: List[StockRejection] = []
@@ -1,78 +1,134 @@
+from typing import Dict, List
 from sqlalchemy.orm import Session
-from app.repositories.cart_repository import CartRepository
 from app.repositories.product_repository import ProductRepository
-from app.schemas.cart import CartItemCreate, CartItemUpdate
+from app.core.etag import make_etag
+from app.schemas.cart import CartItemCreate, CartItemUpdate, CartOperation, CartSummary
 from app.models.cart import Cart
+from app.core.config import settings
+from app.services.cart_store import get_cart_store
+from app.services.reservation_service import ReservationService
 
 class CartService:
     def __init__(self, db: Session):
         self.db = db
-        self.cart_repo = CartRepository(db)
+        # SQL o memoria con escritura diferida, según settings.CART_STORE_BACKEND
+        self.store = get_cart_store(db)
         self.product_repo = ProductRepository(db)
+        # Con reservas, cada cambio del carrito aparta (o libera) stock por un tiempo
+        self.reservations = ReservationService(db) if settings.STOCK_RESERVATIONS_ENABLED else None
 
     def get_cart_for_user(self, user_id: int) -> Cart:
         """Obtiene el carrito activo o crea uno si no existe."""
-        return self.cart_repo.get_or_create_cart(user_id)
+        return self.store.get_or_create_cart(user_id)
+
+    def get_summary(self, user_id: int) -> CartSummary:
+        """Cantidad de productos, unidades y total, sin cargar los productos del carrito."""
+        item_count, total_quantity, total_price = self.store.get_summary(user_id)
+        return CartSummary(item_count=item_count, total_quantity=total_quantity, total_price=round(total_price, 2))
+
+    @staticmethod
+    def get_summary_etag(user_id: int, summary: CartSummary) -> str:
+        return make_etag("cart-summary", user_id, summary.item_count, summary.total_quantity, summary.total_price)
 
     def add_or_update_item(self, user_id: int, item_data: CartItemCreate) -> Cart:
         """
         Agrega item validando stock.
         """
-
-        cart = self.cart_repo.get_or_create_cart(user_id)
-        
-        product = self.product_repo.get_by_id(item_data.product_id)
-        if not product:
-            raise ValueError("Product not found")
-
-        existing_item = self.cart_repo.get_item(cart.id, product.id)
-        current_qty_in_cart = existing_item.quantity if existing_item else 0
-        final_quantity = current_qty_in_cart + item_data.quantity
-
-        if final_quantity > product.stock_current:
-            raise ValueError(f"Stock insuficiente. Disponible: {product.stock_current}, En carrito: {current_qty_in_cart}, Intentas agregar: {item_data.quantity}")
-
-        if existing_item:
-            self.cart_repo.update_item_quantity(existing_item, final_quantity)
-        else:
-            self.cart_repo.add_item(cart.id, product.id, item_data.quantity)
-            
-        return self.cart_repo.get_cart_by_user_id(user_id)
+        if self.reservations is not None:
+            # Se aparta la cantidad total que quedará en el carrito
+            _, quantities = self.store.get_or_create_quantities(user_id)
+            self.reservations.reserve(
+                user_id, {item_data.product_id: quantities.get(item_data.product_id, 0) + item_data.quantity}
+            )
+        return self.store.add_item(user_id, item_data.product_id, item_data.quantity)
 
     def update_item_quantity_explicit(self, user_id: int, item_data: CartItemUpdate) -> Cart:
         """Define una cantidad exacta (ej: cambiar de 1 a 5 en el input)."""
-        cart = self.cart_repo.get_or_create_cart(user_id)
-        existing_item = self.cart_repo.get_item(cart.id, item_data.product_id)
+        cart_id, quantities = self.store.get_or_create_quantities(user_id)
 
-        if not existing_item:
+        if item_data.product_id not in quantities:
             return None 
 
+        if self.reservations is not None:
+            self.reservations.reserve(user_id, {item_data.product_id: max(item_data.quantity, 0)})
+        else:
+            stock = self.product_repo.get_stock_levels([item_data.product_id]).get(item_data.product_id, 0)
+            if item_data.quantity > stock:
+                 raise ValueError(f"Stock insuficiente. Solo hay {stock} unidades.")
 
-        product = self.product_repo.get_by_id(item_data.product_id)
-        if item_data.quantity > product.stock_current:
-             raise ValueError(f"Stock insuficiente. Solo hay {product.stock_current} unidades.")
+        self.store.set_quantities(user_id, cart_id, {item_data.product_id: max(item_data.quantity, 0)})
+        return self.store.get_cart(user_id)
 
-        if item_data.quantity <= 0:
-            self.cart_repo.remove_item(existing_item)
+    def apply_operations(self, user_id: int, operations: List[CartOperation]) -> Cart:
+        """
+        Aplica un lote de operaciones (add/set/remove) en orden y de forma atómica.
+        El stock de todos los productos se lee con una sola consulta y se valida sobre
+        la cantidad final de cada uno; si alguno falla no se aplica ninguna operación.
+        Quitar un producto que no está en el carrito no es un error (el lote es idempotente).
+        """
+        if not operations:
+            return self.store.get_or_create_cart(user_id)
+
+        cart_id, quantities = self.store.get_or_create_quantities(user_id)
+        final: Dict[int, int] = {}
+        for operation in operations:
+            current = final.get(operation.product_id, quantities.get(operation.product_id, 0))
+            if operation.op == "add":
+                final[operation.product_id] = current + operation.quantity
+            elif operation.op == "set":
+                final[operation.product_id] = operation.quantity
+            else:
+                final[operation.product_id] = 0
+
+        if self.reservations is not None:
+            # Valida contra el disponible (sin las reservas de otros) y aparta las cantidades finales
+            self.reservations.reserve(user_id, final)
         else:
-            self.cart_repo.update_item_quantity(existing_item, item_data.quantity)
+            self._check_stock(final)
+
+        # Solo se escriben los productos cuya cantidad cambió
+        changes = {
+            product_id: quantity
+            for product_id, quantity in final.items()
+            if quantity != quantities.get(product_id, 0)
+        }
+        self.store.set_quantities(user_id, cart_id, changes)
+        return self.store.get_cart(user_id)
 
-        return self.cart_repo.get_cart_by_user_id(user_id)
+    def _check_stock(self, final: Dict[int, int]) -> None:
+        # Solo cuentan los productos que quedan en el carrito; quitar uno inexistente no falla
+        stock = self.product_repo.get_stock_levels(
+            product_id for product_id, quantity in final.items() if quantity > 0
+        )
+        missing = sorted(product_id for product_id, quantity in final.items() if quantity > 0 and product_id not in stock)
+        if missing:
+            raise ValueError(f"Product not found: {', '.join(str(product_id) for product_id in missing)}")
+
+        short = [
+            f"{product_id} (disponible: {stock[product_id]}, pedido: {quantity})"
+            for product_id, quantity in sorted(final.items())
+            if quantity > stock.get(product_id, quantity)
+        ]
+        if short:
+            raise ValueError(f"Stock insuficiente para los productos {', '.join(short)}.")
 
     def remove_item_from_cart(self, user_id: int, product_id: int) -> bool:
-        cart = self.cart_repo.get_cart_by_user_id(user_id)
-        if not cart: 
+        found = self.store.get_quantities(user_id)
+        if not found or product_id not in found[1]:
             return False
-            
-        item = self.cart_repo.get_item(cart.id, product_id)
-        if item:
-            self.cart_repo.remove_item(item)
-            return True
-        return False
+
+        self.store.set_quantities(user_id, found[0], {product_id: 0})
+        if self.reservations is not None:
+            self.reservations.release(user_id, [product_id])
+        return True
 
     def empty_cart(self, user_id: int) -> bool:
-        cart = self.cart_repo.get_cart_by_user_id(user_id)
-        if cart:
-            self.cart_repo.clear_cart(cart)
-            return True
-        return False
\ No newline at end of file
+        found = self.store.get_quantities(user_id)
+        if not found:
+            return False
+
+        cart_id, quantities = found
+        self.store.set_quantities(user_id, cart_id, {product_id: 0 for product_id in quantities})
+        if self.reservations is not None:
+            self.reservations.release(user_id)
+        return True
@@ -0,0 +1,423 @@
+import atexit
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.cart import Cart
+from app.repositories.cart_repository import CartRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.product import ProductResponse
+from app.services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Contenido de un carrito sin productos: (id del carrito, {product_id: cantidad})
+CartQuantities = Tuple[int, Dict[int, int]]
+
+
+def _stock_error(stock: int, in_cart: int, quantity: int) -> ValueError:
+    return ValueError(f"Stock insuficiente. Disponible: {stock}, En carrito: {in_cart}, Intentas agregar: {quantity}")
+
+
+class CartStore(ABC):
+    """
+    Almacenamiento de carritos detrás de CartService.
+    Los carritos devueltos tienen `id`, `user_id` e `items` (product_id, quantity, product),
+    así que se serializan con CartResponse sin importar la implementación. Una implementación
+    a la que le falte un método abstracto falla al instanciarse, no a mitad de un request.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @abstractmethod
+    def get_cart(self, user_id: int) -> Optional[object]:
+        """Carrito con sus productos; None si el usuario no tiene carrito."""
+
+    @abstractmethod
+    def get_or_create_cart(self, user_id: int) -> object:
+        """Carrito con sus productos; lo crea vacío si el usuario no tiene."""
+
+    @abstractmethod
+    def get_quantities(self, user_id: int) -> Optional[CartQuantities]:
+        """Contenido del carrito sin cargar productos; None si el usuario no tiene carrito."""
+
+    @abstractmethod
+    def add_item(self, user_id: int, product_id: int, quantity: int) -> object:
+        """Suma `quantity` validando stock. ValueError si el producto no existe o no alcanza."""
+
+    @abstractmethod
+    def set_quantities(self, user_id: int, cart_id: int, quantities: Dict[int, int]) -> None:
+        """Fija cantidades ({product_id: cantidad}; 0 quita el producto). El stock ya viene validado."""
+
+    @abstractmethod
+    def get_summary(self, user_id: int) -> Tuple[int, int, float]:
+        """(productos distintos, unidades, total) sin armar el carrito completo."""
+
+    def flush(self, user_id: int) -> None:
+        """Garantiza que la BD tenga el carrito al día (el checkout lo lee de ahí)."""
+
+    def invalidate(self, user_id: int) -> None:
+        """El carrito cambió en la BD por fuera del store (ej: lo vació el checkout)."""
+
+    def get_or_create_quantities(self, user_id: int) -> CartQuantities:
+        found = self.get_quantities(user_id)
+        if found is not None:
+            return found
+        cart = self.get_or_create_cart(user_id)
+        return cart.id, {item.product_id: item.quantity for item in cart.items}
+
+
+class SqlCartStore(CartStore):
+    """Cada cambio se confirma en la BD en el momento (comportamiento por defecto)."""
+
+    def __init__(self, db: Session):
+        super().__init__(db)
+        self.cart_repo = CartRepository(db)
+        self.product_repo = ProductRepository(db)
+
+    def get_cart(self, user_id: int) -> Optional[Cart]:
+        return self.cart_repo.get_cart_by_user_id(user_id)
+
+    def get_or_create_cart(self, user_id: int) -> Cart:
+        return self.cart_repo.get_or_create_cart(user_id)
+
+    def get_quantities(self, user_id: int) -> Optional[CartQuantities]:
+        return self.cart_repo.get_quantities(user_id)
+
+    def add_item(self, user_id: int, product_id: int, quantity: int) -> Cart:
+        """
+        El caso común (carrito existente y stock suficiente) es una sola sentencia de
+        escritura y un commit; después se lee el carrito una vez para la respuesta.
+        """
+        if self.cart_repo.add_item_checked(user_id, product_id, quantity):
+            self.db.commit()
+            return self.cart_repo.get_cart_by_user_id(user_id)
+
+        # No se escribió nada: falta el carrito, el producto o el stock. Averiguamos cuál.
+        product = self.product_repo.get_by_id(product_id)
+        if not product:
+            raise ValueError("Product not found")
+
+        cart = self.cart_repo.get_or_create_cart(user_id)
+        existing_item = self.cart_repo.get_item(cart.id, product.id)
+        current_qty_in_cart = existing_item.quantity if existing_item else 0
+
+        # Carrito recién creado (o el stock cambió entre medio): reintentamos una vez
+        if current_qty_in_cart + quantity <= product.stock_current \
+                and self.cart_repo.add_item_checked(user_id, product.id, quantity):
+            self.db.commit()
+            return self.cart_repo.get_cart_by_user_id(user_id)
+
+        raise _stock_error(product.stock_current, current_qty_in_cart, quantity)
+
+    def set_quantities(self, user_id: int, cart_id: int, quantities: Dict[int, int]) -> None:
+        if quantities:
+            self.cart_repo.set_quantities(cart_id, quantities)
+            self.db.commit()
+
+    def get_summary(self, user_id: int) -> Tuple[int, int, float]:
+        return self.cart_repo.get_summary(user_id)
+
+
+@dataclass
+class CartItemView:
+    product_id: int
+    quantity: int
+    product: ProductResponse
+
+
+@dataclass
+class CartView:
+    """Carrito armado desde memoria (misma forma que el modelo Cart para CartResponse)."""
+    id: int
+    user_id: int
+    items: List[CartItemView] = field(default_factory=list)
+
+
+@dataclass
+class _CartEntry:
+    cart_id: int
+    quantities: Dict[int, int]
+    # Lo que hay en la BD: el flush escribe solo la diferencia
+    persisted: Dict[int, int]
+    used_at: float
+
+
+class WriteBehindCarts:
+    """
+    Carritos en memoria del proceso con escritura diferida.
+
+    Una lectura que no encuentra el carrito lo carga de la BD (read-through). Los cambios
+    quedan en memoria y un hilo los persiste por lotes cada `flush_seconds`: los carritos
+    modificados se escriben juntos (un DELETE y un upsert multi-fila) en una transacción.
+    Los carritos sin cambios pendientes que no se usan hace `idle_seconds` se descartan.
+
+    Es por proceso: con varios workers hace falta afinidad de sesión (o un store
+    compartido con la misma interfaz, ej: Redis).
+    """
+
+    def __init__(
+        self,
+        flush_seconds: float,
+        idle_seconds: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self._session_factory = session_factory
+        self._clock = clock
+        self._entries: Dict[int, _CartEntry] = {}
+        self._dirty: Set[int] = set()
+        # _lock protege los carritos; _flush_lock ordena las escrituras a la BD
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def snapshot(self, db: Session, user_id: int, create: bool) -> Optional[CartQuantities]:
+        entry = self._entry(db, user_id, create)
+        if entry is None:
+            return None
+        with self._lock:
+            return entry.cart_id, dict(entry.quantities)
+
+    def update(self, db: Session, user_id: int, change: Callable[[Dict[int, int]], None]) -> CartQuantities:
+        """
+        Aplica `change` sobre las cantidades del carrito bajo el lock (si lanza, no cambia nada)
+        y deja el carrito pendiente de escribir.
+        """
+        entry = self._entry(db, user_id, create=True)
+        with self._lock:
+            quantities = dict(entry.quantities)
+            change(quantities)
+            entry.quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+            entry.used_at = self._clock()
+            self._dirty.add(user_id)
+            self._ensure_worker()
+            return entry.cart_id, dict(entry.quantities)
+
+    def forget(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._dirty.discard(user_id)
+
+    def flush(self, user_ids: Optional[Iterable[int]] = None) -> Set[int]:
+        """Escribe los carritos pendientes (todos o los indicados). Devuelve los que fallaron."""
+        with self._flush_lock:
+            with self._lock:
+                targets = set(self._dirty) if user_ids is None else self._dirty & set(user_ids)
+                self._dirty -= targets
+                pending = {
+                    user_id: (entry.cart_id, dict(entry.quantities), dict(entry.persisted))
+                    for user_id, entry in ((user_id, self._entries.get(user_id)) for user_id in targets)
+                    if entry is not None
+                }
+            if not pending:
+                return set()
+
+            failed = self._write(pending)
+
+            with self._lock:
+                for user_id, (_, quantities, _) in pending.items():
+                    entry = self._entries.get(user_id)
+                    if entry is None:
+                        continue
+                    if user_id in failed:
+                        self._dirty.add(user_id)
+                    else:
+                        entry.persisted = quantities
+            self.flushes += 1
+            return failed
+
+    def _write(self, pending: Dict[int, Tuple[int, Dict[int, int], Dict[int, int]]]) -> Set[int]:
+        changes = {}
+        for user_id, (cart_id, quantities, persisted) in pending.items():
+            diff = {product_id: quantity for product_id, quantity in quantities.items() if persisted.get(product_id) != quantity}
+            diff.update({product_id: 0 for product_id in persisted if product_id not in quantities})
+            changes[user_id] = (cart_id, diff)
+
+        db = self._session_factory()
+        try:
+            repository = CartRepository(db)
+            try:
+                repository.set_quantities_many({cart_id: diff for cart_id, diff in changes.values() if diff})
+                db.commit()
+                return set()
+            except exc.SQLAlchemyError:
+                db.rollback()
+                logger.exception("Error al guardar carritos en lote, se reintenta uno por uno")
+
+            failed = set()
+            for user_id, (cart_id, diff) in changes.items():
+                try:
+                    repository.set_quantities(cart_id, diff)
+                    db.commit()
+                except exc.IntegrityError:
+                    # Ej: un producto que ya no existe. Se descarta y se vuelve a leer de la BD.
+                    db.rollback()
+                    self.flush_errors += 1
+                    logger.exception(
+                        "Carrito %s (usuario %s) descartado de memoria: se pierden sus cambios sin guardar",
+                        cart_id, user_id,
+                    )
+                    self.forget(user_id)
+                except exc.SQLAlchemyError:
+                    db.rollback()
+                    self.flush_errors += 1
+                    logger.exception("Error al guardar el carrito %s, se reintenta en el próximo lote", cart_id)
+                    failed.add(user_id)
+            return failed
+        finally:
+            db.close()
+
+    def _entry(self, db: Session, user_id: int, create: bool) -> Optional[_CartEntry]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.used_at = now
+                return entry
+
+        repository = CartRepository(db)
+        found = repository.get_quantities(user_id)
+        if found is None:
+            if not create:
+                return None
+            found = (repository.get_or_create_cart(user_id).id, {})
+
+        cart_id, quantities = found
+        with self._lock:
+            # Otro request pudo cargarlo mientras tanto: gana el que ya está
+            return self._entries.setdefault(user_id, _CartEntry(cart_id, quantities, dict(quantities), now))
+
+    def _ensure_worker(self) -> None:
+        # Se llama con self._lock tomado
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="cart-write-behind", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+            self._evict_idle()
+
+    def _evict_idle(self) -> None:
+        limit = self._clock() - self.idle_seconds
+        with self._lock:
+            for user_id in [
+                user_id for user_id, entry in self._entries.items()
+                if entry.used_at < limit and user_id not in self._dirty
+            ]:
+                del self._entries[user_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "carts": len(self._entries),
+                "pending": len(self._dirty),
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+            }
+
+
+write_behind_carts = WriteBehindCarts(
+    flush_seconds=settings.CART_STORE_FLUSH_SECONDS,
+    idle_seconds=settings.CART_STORE_IDLE_SECONDS,
+)
+# Lo pendiente se escribe al terminar el proceso
+atexit.register(write_behind_carts.flush)
+
+
+class MemoryCartStore(CartStore):
+    """Carritos en WriteBehindCarts; la BD solo se lee para el stock y los productos."""
+
+    def __init__(self, db: Session, carts: WriteBehindCarts = write_behind_carts):
+        super().__init__(db)
+        self.carts = carts
+        self.product_repo = ProductRepository(db)
+
+    def get_cart(self, user_id: int) -> Optional[CartView]:
+        found = self.carts.snapshot(self.db, user_id, create=False)
+        return self._view(user_id, found) if found is not None else None
+
+    def get_or_create_cart(self, user_id: int) -> CartView:
+        return self._view(user_id, self.carts.snapshot(self.db, user_id, create=True))
+
+    def get_quantities(self, user_id: int) -> Optional[CartQuantities]:
+        return self.carts.snapshot(self.db, user_id, create=False)
+
+    def add_item(self, user_id: int, product_id: int, quantity: int) -> CartView:
+        stock = self.product_repo.get_stock_levels([product_id])
+        if product_id not in stock:
+            raise ValueError("Product not found")
+
+        def add(quantities: Dict[int, int]) -> None:
+            in_cart = quantities.get(product_id, 0)
+            if in_cart + quantity > stock[product_id]:
+                raise _stock_error(stock[product_id], in_cart, quantity)
+            quantities[product_id] = in_cart + quantity
+
+        return self._view(user_id, self.carts.update(self.db, user_id, add))
+
+    def set_quantities(self, user_id: int, cart_id: int, quantities: Dict[int, int]) -> None:
+        if quantities:
+            self.carts.update(self.db, user_id, lambda current: current.update(quantities))
+
+    def get_summary(self, user_id: int) -> Tuple[int, int, float]:
+        found = self.carts.snapshot(self.db, user_id, create=False)
+        if found is None:
+            return 0, 0, 0.0
+        products = self._products(found[1])
+        items = [(quantity, products[product_id].price) for product_id, quantity in found[1].items() if product_id in products]
+        return len(items), sum(quantity for quantity, _ in items), sum(quantity * price for quantity, price in items)
+
+    def flush(self, user_id: int) -> None:
+        if user_id in self.carts.flush([user_id]):
+            raise exc.SQLAlchemyError(f"No se pudo guardar el carrito del usuario {user_id}.")
+
+    def invalidate(self, user_id: int) -> None:
+        self.carts.forget(user_id)
+
+    def _view(self, user_id: int, found: CartQuantities) -> CartView:
+        cart_id, quantities = found
+        products = self._products(quantities)
+        return CartView(
+            id=cart_id,
+            user_id=user_id,
+            items=[
+                CartItemView(product_id=product_id, quantity=quantity, product=products[product_id])
+                for product_id, quantity in quantities.items()
+                if product_id in products
+            ],
+        )
+
+    def _products(self, product_ids: Iterable[int]) -> Dict[int, ProductResponse]:
+        """Productos de la caché del catálogo; los que falten, en una sola consulta."""
+        products: Dict[int, ProductResponse] = {}
+        for product_id in product_ids:
+            cached = catalog_cache.get_product(product_id)
+            if cached is not None:
+                products[product_id] = cached
+        for row in self.product_repo.get_rows_by_ids(set(product_ids) - set(products)):
+            products[row.id] = ProductResponse.model_validate(row, from_attributes=True)
+            catalog_cache.set_product(row.id, products[row.id])
+        return products
+
+
+def get_cart_store(db: Session) -> CartStore:
+    """Store configurado en settings.CART_STORE_BACKEND."""
+    if settings.CART_STORE_BACKEND == "memory":
+        return MemoryCartStore(db)
+    return SqlCartStore(db)
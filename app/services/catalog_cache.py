@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.product import Product
+from app.repositories.product_search import search_terms
+from app.schemas.product import ProductFilterParams
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    """Valores de un producto que deciden en qué listados filtrados aparece."""
+    category_name: Optional[str]
+    price: float
+    stock_status: str
+
+    @classmethod
+    def of(cls, product: Product) -> "ProductSnapshot":
+        return cls(
+            category_name=product.category.name if product.category else None,
+            price=product.price,
+            stock_status=product.stock_status,
+        )
+
+
+@dataclass(frozen=True)
+class ListingEntry:
+    filters: ProductFilterParams
+    value: Any
+    product_ids: FrozenSet[int]
+
+
+def listing_key(filters: ProductFilterParams) -> Hashable:
+    """Normaliza los filtros para que consultas equivalentes compartan la misma entrada."""
+    return (
+        filters.categories[0] if filters.categories else None,
+        filters.price_min,
+        filters.price_max,
+        " ".join(search_terms(filters.search)) or None,
+        tuple(sorted(set(filters.stock_status))) if filters.stock_status else None,
+        filters.sort_by,
+        "desc" if filters.order == "desc" else "asc",
+        filters.limit,
+        filters.cursor,
+    )
+
+
+def _may_include(filters: ProductFilterParams, snapshot: ProductSnapshot) -> bool:
+    """¿Podría un producto con este estado aparecer en el listado? (conservador con `search`)."""
+    if filters.categories and filters.categories[0] != snapshot.category_name:
+        return False
+    if filters.price_min is not None and snapshot.price < filters.price_min:
+        return False
+    if filters.price_max is not None and snapshot.price > filters.price_max:
+        return False
+    if filters.stock_status and snapshot.stock_status not in filters.stock_status:
+        return False
+    return True
+
+
+def _depends_on_stock(filters: ProductFilterParams) -> bool:
+    """
+    ¿Puede cambiar el listado (qué productos trae o en qué orden) con solo mover el stock?
+    Incluye el orden por popularidad, que cambia con cada compra.
+    """
+    return bool(filters.stock_status) or filters.sort_by in ("stock_status", "popularity")
+
+
+class CatalogCache:
+    """
+    Caché de lectura del catálogo: detalle de producto y listados filtrados.
+
+    Guarda esquemas ya serializables (ProductResponse), nunca objetos ORM ligados a una sesión.
+    Las escrituras invalidan con precisión: el detalle del producto y solo los listados que
+    lo contienen o cuyos filtros coinciden con su estado anterior o nuevo. El TTL acota lo
+    desactualizado que puede quedar un worker cuando la escritura ocurrió en otro proceso.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self.products = LRUCache(max_entries, ttl_seconds)
+        self.listings = LRUCache(max_entries, ttl_seconds)
+        # Facetas del catálogo sin filtros (por tamaño de tramo de precio)
+        self.facets = LRUCache(max_entries, ttl_seconds)
+        # Otras vistas en memoria del catálogo que deben enterarse de las escrituras
+        self._listeners: List[Callable[[Optional[Set[int]]], None]] = []
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[Set[int]]], None]) -> None:
+        """
+        Registra una función que se llama en cada invalidación con los ids de productos
+        modificados, o con None si pudo cambiar cualquier cosa (ej: `clear`).
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, product_ids: Optional[Set[int]]) -> None:
+        for listener in self._listeners:
+            listener(product_ids)
+
+    def get_product(self, product_id: int) -> Optional[Any]:
+        return self.products.get(product_id) if self.enabled else None
+
+    def set_product(self, product_id: int, value: Any) -> None:
+        if self.enabled:
+            self.products.set(product_id, value)
+
+    def get_listing(self, filters: ProductFilterParams) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        entry = self.listings.get(listing_key(filters))
+        return entry.value if entry is not None else None
+
+    def set_listing(self, filters: ProductFilterParams, value: Any, product_ids: Iterable[int]) -> None:
+        if self.enabled:
+            self.listings.set(listing_key(filters), ListingEntry(filters, value, frozenset(product_ids)))
+
+    def get_facets(self, bucket_size: float) -> Optional[Any]:
+        return self.facets.get(bucket_size) if self.enabled else None
+
+    def set_facets(self, bucket_size: float, value: Any) -> None:
+        if self.enabled:
+            self.facets.set(bucket_size, value)
+
+    def invalidate_product(self, product_id: int, *snapshots: ProductSnapshot) -> None:
+        """
+        Invalida el detalle y los listados afectados por un cambio en el producto.
+        `snapshots` son sus estados antes/después; si no se pasan (ej: solo cambió el stock),
+        basta con invalidar los listados que ya lo contienen.
+        """
+        self.products.pop(product_id)
+        self.listings.pop_where(
+            lambda _, entry: product_id in entry.product_ids
+            or any(_may_include(entry.filters, snapshot) for snapshot in snapshots)
+        )
+        # Cualquier cambio de producto altera algún conteo global
+        self.facets.clear()
+        self._notify({product_id})
+
+    def invalidate_products(self, product_ids: Iterable[int]) -> None:
+        """
+        Invalida varios productos cuyo cambio solo afecta al stock (ej: tras una compra).
+        Además de los listados que los contienen, caen los filtrados u ordenados por stock.
+        """
+        ids = set(product_ids)
+        if not ids:
+            return
+        for product_id in ids:
+            self.products.pop(product_id)
+        self.listings.pop_where(
+            lambda _, entry: not ids.isdisjoint(entry.product_ids) or _depends_on_stock(entry.filters)
+        )
+        self.facets.clear()
+        self._notify(ids)
+
+    def clear(self) -> None:
+        self.products.clear()
+        self.listings.clear()
+        self.facets.clear()
+        self._notify(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "products": self.products.stats(),
+            "listings": self.listings.stats(),
+            "facets": self.facets.stats(),
+        }
+
+
+catalog_cache = CatalogCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+)
@@ -3,7 +3,9 @@ from typing import List, Optional
 
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.core.etag import make_etag
 from app.repositories.category_repository import CategoryRepository
+from app.services.catalog_cache import catalog_cache
 
 class CategoryService:
     """
@@ -16,6 +18,10 @@ class CategoryService:
         """Recupera la lista completa de categorías."""
         return self.repository.get_all()
 
+    def get_categories_etag(self) -> str:
+        """ETag de la lista de categorías (la tabla es pequeña: se resume completa)."""
+        return make_etag("categories", self.repository.get_fingerprint())
+
     def get_category_by_id(self, category_id: int) -> Optional[Category]:
         """Recupera una categoría por ID. Manejo de 'no encontrado' queda en el Router."""
         return self.repository.get_by_id(category_id)
@@ -30,7 +36,10 @@ class CategoryService:
         if category is None:
             return None 
         
-        return self.repository.update(category, category_data)
+        updated = self.repository.update(category, category_data)
+        # Los productos exponen el nombre de su categoría: renombrar afecta a todo el catálogo
+        catalog_cache.clear()
+        return updated
 
     def delete_category(self, category_id: int) -> bool:
         """Elimina una categoría."""
@@ -39,4 +48,5 @@ class CategoryService:
             return False 
 
         self.repository.delete(category)
+        catalog_cache.clear()
         return True
@@ -0,0 +1,501 @@
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional: sin numpy el catálogo se consulta siempre en la BD
+    np = None
+
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.product_repository import CategoryRef, ProductRepository, ProductRow, SORT_COLUMNS
+from app.repositories.product_search import search_terms
+from app.schemas.product import ProductFilterParams
+from app.services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# Columnas numéricas del snapshot, en el orden de ProductRepository.SNAPSHOT_COLUMNS.
+# Las 4 siguientes (name, description, sku, image_url) se guardan como tuplas de texto.
+NUMERIC_COLUMNS = {
+    "id": "int64",
+    "price": "float64",
+    "category_id": "int64",
+    "created_at": "datetime64[us]",
+    "updated_at": "datetime64[us]",
+    "stock_current": "int64",
+    "stock_min": "int64",
+    "rating": "int64",
+}
+NO_CATEGORY = -1
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+# Órdenes que resuelve el motor; la relevancia, la popularidad y el nombre siempre van a la BD.
+# El nombre se ordena con la collation de la columna (en MariaDB, sin distinguir mayúsculas ni
+# acentos), que NumPy no reproduce: un cursor "name" emitido por un camino y seguido por el
+# otro saltearía o repetiría filas
+COLUMNAR_SORTS = ("price", "created_at", "stock_status")
+
+# Margen hacia atrás al pedir cambios por updated_at: cubre transacciones que confirmaron
+# después de la última lectura con un updated_at anterior a ella
+REFRESH_LOOKBACK = timedelta(seconds=30)
+
+# Filas que se revisan por vuelta al armar una página con filtros
+SCAN_BLOCK = 4096
+
+# Más ids modificados que esto no se piden con IN: alcanza con updated_at
+MAX_DIRTY_IDS = 1000
+
+
+def _stock_status(stock_current: int, stock_min: int) -> str:
+    """Misma regla que Product.stock_status."""
+    if stock_current == 0:
+        return "Agotado"
+    if stock_current <= stock_min:
+        return "Alerta"
+    return "Normal"
+
+
+class CatalogSnapshot:
+    """
+    Catálogo en arreglos columnares de NumPy, ordenados por id.
+    Es inmutable: cada refresco que trae cambios arma uno nuevo, así las consultas en
+    curso nunca ven un estado a medio actualizar.
+    """
+
+    def __init__(self, columns: Dict[str, Any], texts: List[Tuple], categories: Dict[int, str], version: int):
+        self.columns = columns
+        self.texts = texts
+        self.categories = categories
+        self.category_ids = {name: category_id for category_id, name in categories.items()}
+        self.version = version
+        # Índices de orden y rangos por nombre: se calculan al usarse (ver _ordering)
+        self._orderings: Dict[Optional[str], Tuple[Any, Any]] = {}
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    @classmethod
+    def build(cls, rows: List[Tuple], categories: Dict[int, str], version: int) -> "CatalogSnapshot":
+        """Arma el snapshot desde filas planas (SNAPSHOT_COLUMNS) ordenadas por id."""
+        values = list(zip(*rows)) if rows else [()] * (len(NUMERIC_COLUMNS) + 4)
+        columns = {}
+        for index, (name, dtype) in enumerate(NUMERIC_COLUMNS.items()):
+            column = values[index]
+            if name == "category_id":
+                column = [NO_CATEGORY if value is None else value for value in column]
+            elif dtype == "datetime64[us]":
+                # Convertir datetimes sueltos con numpy es varias veces más lento que pasar por enteros
+                column = np.array([(value - EPOCH) // MICROSECOND for value in column], dtype="int64").view(dtype)
+            columns[name] = np.array(column, dtype=dtype)
+        texts = list(zip(*values[len(NUMERIC_COLUMNS):])) if rows else []
+        return cls(columns, texts, categories, version)
+
+    def merge(self, rows: List[Tuple], removed_ids: List[int], categories: Dict[int, str]) -> "CatalogSnapshot":
+        """
+        Nuevo snapshot con las filas modificadas/nuevas aplicadas y los ids borrados quitados.
+        Si nada cambió de verdad (mismos valores y mismas categorías) devuelve el actual.
+        """
+        changed = CatalogSnapshot.build(rows, categories, self.version)
+        ids = self.columns["id"]
+        count = len(ids)
+
+        positions = np.searchsorted(ids, changed.columns["id"])
+        exists = positions < count
+        exists[exists] = ids[positions[exists]] == changed.columns["id"][exists]
+        # Las filas que se releen por el margen de updated_at y no cambiaron se ignoran. Se
+        # comparan los valores y no updated_at: DATETIME de MariaDB no guarda fracciones y dos
+        # cambios en el mismo segundo (ej: dos compras) tienen el mismo updated_at
+        same = exists.copy()
+        if exists.any():
+            target = positions[exists]
+            equal = np.ones(len(target), dtype=bool)
+            for name, column in self.columns.items():
+                equal &= column[target] == changed.columns[name][exists]
+            equal &= np.array(
+                [self.texts[position] == changed.texts[source]
+                 for source, position in zip(np.flatnonzero(exists), target.tolist())],
+                dtype=bool,
+            )
+            same[exists] = equal
+
+        removed = np.array(sorted(removed_ids), dtype="int64")
+        removed_positions = np.searchsorted(ids, removed)
+        present = removed_positions < count
+        present[present] = ids[removed_positions[present]] == removed[present]
+        removed_positions = removed_positions[present]
+
+        if same.all() and not len(removed_positions) and categories == self.categories:
+            return self
+
+        columns = {name: column.copy() for name, column in self.columns.items()}
+        texts = list(self.texts)
+
+        # 1) Modificaciones de filas existentes: en su lugar
+        updated = exists & ~same
+        if updated.any():
+            target = positions[updated]
+            for name in columns:
+                columns[name][target] = changed.columns[name][updated]
+            for source, position in zip(np.flatnonzero(updated), target):
+                texts[position] = changed.texts[source]
+
+        # 2) Borrados
+        if len(removed_positions):
+            for name in columns:
+                columns[name] = np.delete(columns[name], removed_positions)
+            for position in sorted(removed_positions.tolist(), reverse=True):
+                del texts[position]
+
+        # 3) Altas: al final (lo normal, ids crecientes) o reordenando si quedaron intercaladas
+        added = ~exists
+        if added.any():
+            for name in columns:
+                columns[name] = np.concatenate([columns[name], changed.columns[name][added]])
+            texts.extend(changed.texts[index] for index in np.flatnonzero(added))
+            if len(columns["id"]) > 1 and (np.diff(columns["id"]) < 0).any():
+                order = np.argsort(columns["id"], kind="stable")
+                columns = {name: column[order] for name, column in columns.items()}
+                texts = [texts[index] for index in order]
+
+        return CatalogSnapshot(columns, texts, categories, self.version + 1)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Resumen del contenido (todas las columnas y las categorías) para los ETags.
+        A diferencia de `version`, que es un contador de este proceso, vale igual entre
+        workers y reinicios. Se calcula la primera vez que se pide.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for name in NUMERIC_COLUMNS:
+                digest.update(self.columns[name].tobytes())
+            digest.update(repr(self.texts).encode("utf-8"))
+            digest.update(repr(sorted(self.categories.items())).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def max_updated_at(self) -> Optional[datetime]:
+        if not len(self):
+            return None
+        return self.columns["updated_at"].max().item()
+
+    def query(
+        self, filters: ProductFilterParams, limit: Optional[int] = None, after: Optional[Tuple[Any, int]] = None
+    ) -> List[ProductRow]:
+        """
+        Mismos filtros, orden y keyset que ProductRepository.list_rows (sin búsqueda de texto
+        ni orden por popularidad o nombre). Los filtros se evalúan como una máscara booleana
+        y el orden sale de un índice precalculado por (clave, id): el cursor se ubica con
+        búsqueda binaria y la página se arma recorriendo ese índice hasta juntar `limit`
+        filas que pasan la máscara.
+        """
+        mask = self._mask(filters)
+        if mask is False:
+            return []
+
+        sort_by = filters.sort_by if filters.sort_by in COLUMNAR_SORTS else None
+        # Sin orden explícito ni límite la BD no ordena: devolvemos por id ascendente
+        descending = filters.order == "desc" and (sort_by is not None or limit is not None)
+        order, keys = self._ordering(sort_by)
+
+        start, stop = 0, len(order)
+        if after is not None:
+            value, last_id = after
+            low, high = self._bounds(sort_by, keys, value)
+            # Entre las filas con la misma clave el índice está ordenado por id
+            same_key_ids = self.columns["id"][order[low:high]]
+            if descending:
+                stop = low + int(np.searchsorted(same_key_ids, last_id, side="left"))
+            else:
+                start = low + int(np.searchsorted(same_key_ids, last_id, side="right"))
+
+        positions = self._scan(order[start:stop], mask, descending, limit)
+        return [self._row(position) for position in positions.tolist()]
+
+    def _mask(self, filters: ProductFilterParams):
+        """Máscara de filas que pasan los filtros; None si no hay filtros, False si ninguna puede pasar."""
+        columns = self.columns
+        conditions = []
+
+        category = filters.categories[0] if filters.categories else None
+        if category:
+            category_id = self.category_ids.get(category)
+            if category_id is None:
+                return False
+            conditions.append(columns["category_id"] == category_id)
+        if filters.price_min is not None:
+            conditions.append(columns["price"] >= filters.price_min)
+        if filters.price_max is not None:
+            conditions.append(columns["price"] <= filters.price_max)
+        if filters.stock_status:
+            margin = columns["stock_current"] - columns["stock_min"]
+            out_of_stock = columns["stock_current"] == 0
+            by_status = {
+                "Agotado": out_of_stock,
+                "Alerta": (margin <= 0) & ~out_of_stock,
+                "Normal": (margin > 0) & ~out_of_stock,
+            }
+            conditions.append(np.logical_or.reduce([by_status[status] for status in filters.stock_status]))
+
+        if not conditions:
+            return None
+        return np.logical_and.reduce(conditions)
+
+    def _ordering(self, sort_by: Optional[str]):
+        """
+        (posiciones ordenadas por (clave, id) ascendente, clave en ese orden). Se calcula la
+        primera vez que se usa cada orden y queda fijo mientras viva el snapshot.
+        """
+        with self._lock:
+            if sort_by not in self._orderings:
+                ids = self.columns["id"]
+                if sort_by is None:
+                    # Las filas ya están ordenadas por id
+                    self._orderings[None] = (np.arange(len(ids)), ids)
+                else:
+                    key = self._sort_key(sort_by)
+                    order = np.lexsort((ids, key))
+                    self._orderings[sort_by] = (order, key[order])
+            return self._orderings[sort_by]
+
+    def _sort_key(self, sort_by: str):
+        """Clave numérica de orden por fila."""
+        columns = self.columns
+        if sort_by == "price":
+            return columns["price"]
+        if sort_by == "created_at":
+            return columns["created_at"].view("int64")
+        return columns["stock_current"] - columns["stock_min"]
+
+    def _bounds(self, sort_by: Optional[str], keys, value) -> Tuple[int, int]:
+        """Tramo [low, high) del índice de orden cuyas filas tienen la clave del cursor."""
+        if sort_by == "created_at":
+            value = np.datetime64(value, "us").astype("int64")
+        return int(np.searchsorted(keys, value, side="left")), int(np.searchsorted(keys, value, side="right"))
+
+    @staticmethod
+    def _scan(segment, mask, descending: bool, limit: Optional[int]):
+        """Recorre el tramo del índice (al revés si es descendente) y se queda con las filas de la máscara."""
+        if descending:
+            segment = segment[::-1]
+        if mask is None:
+            return segment if limit is None else segment[:limit]
+        if limit is None:
+            return segment[mask[segment]]
+
+        # Por bloques: una página con filtros poco selectivos no recorre todo el catálogo
+        found, total = [], 0
+        step = max(limit * 8, SCAN_BLOCK)
+        for begin in range(0, len(segment), step):
+            block = segment[begin:begin + step]
+            block = block[mask[block]]
+            found.append(block)
+            total += len(block)
+            if total >= limit:
+                break
+        return np.concatenate(found)[:limit] if found else segment[:0]
+
+    def _row(self, position: int) -> ProductRow:
+        columns = self.columns
+        name, description, sku, image_url = self.texts[position]
+        category_id = int(columns["category_id"][position])
+        stock_current = int(columns["stock_current"][position])
+        stock_min = int(columns["stock_min"][position])
+        category_name = self.categories.get(category_id)
+        return ProductRow(
+            id=int(columns["id"][position]),
+            name=name,
+            description=description,
+            price=float(columns["price"][position]),
+            rating=int(columns["rating"][position]),
+            category_id=None if category_id == NO_CATEGORY else category_id,
+            image_url=image_url,
+            sku=sku,
+            stock_current=stock_current,
+            stock_min=stock_min,
+            stock_margin=stock_current - stock_min,
+            created_at=columns["created_at"][position].item(),
+            stock_status=_stock_status(stock_current, stock_min),
+            category=CategoryRef(category_name) if category_name is not None else None,
+        )
+
+
+class ColumnarCatalog:
+    """
+    Motor opcional de listados en memoria (settings.COLUMNAR_CATALOG_ENABLED).
+
+    Mantiene un CatalogSnapshot por proceso. Se refresca de forma incremental leyendo los
+    productos con updated_at reciente (más los ids que este proceso modificó, para ver los
+    borrados) y se recarga entero cada tanto para ver los borrados de otros procesos.
+    Solo una petición por intervalo hace ese refresco; el resto lee el snapshot vigente
+    sin tocar la BD.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        refresh_seconds: float,
+        full_reload_seconds: float,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if enabled and np is None:
+            logger.warning("COLUMNAR_CATALOG_ENABLED requiere numpy; se usará la base de datos.")
+        self.enabled = enabled and np is not None
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self._session_factory = session_factory
+        self._clock = clock
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+        self._stale = False
+        self._dirty: Set[int] = set()
+        self._refresh_lock = threading.Lock()
+        self._dirty_lock = threading.Lock()
+        self.refreshes = 0
+        self.full_reloads = 0
+
+    def supports(self, filters: ProductFilterParams) -> bool:
+        """¿Puede el motor resolver este listado? (sin búsqueda de texto ni orden por popularidad o nombre)"""
+        if not self.enabled or search_terms(filters.search):
+            return False
+        return filters.sort_by not in SORT_COLUMNS or filters.sort_by in COLUMNAR_SORTS
+
+    def notify_changes(self, product_ids: Optional[Set[int]]) -> None:
+        """Listener de catalog_cache: marca el snapshot para refrescarse en la próxima lectura."""
+        with self._dirty_lock:
+            if product_ids:
+                self._dirty.update(product_ids)
+            self._stale = True
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """Snapshot vigente (lo carga la primera vez); None si el motor no está disponible."""
+        if not self.enabled:
+            return None
+
+        if self._snapshot is None:
+            with self._refresh_lock:
+                if self._snapshot is None:
+                    self._run(self._reload)
+            return self._snapshot
+
+        now = self._clock()
+        if (self._stale or now - self._refreshed_at >= self.refresh_seconds) \
+                and self._refresh_lock.acquire(blocking=False):
+            if now - self._reloaded_at >= self.full_reload_seconds:
+                # La recarga completa tarda: va en otro hilo y mientras tanto se sirve el snapshot vigente
+                threading.Thread(target=self._reload_in_background, daemon=True).start()
+            else:
+                try:
+                    self._run(self._refresh)
+                finally:
+                    self._refresh_lock.release()
+        return self._snapshot
+
+    def query(
+        self,
+        filters: ProductFilterParams,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, int]] = None,
+        snapshot: Optional[CatalogSnapshot] = None,
+    ) -> Optional[List[ProductRow]]:
+        """
+        Listado desde el snapshot; None si hay que ir a la BD. `snapshot` fija uno ya
+        tomado con current() (ej: el del ETag) para que el cuerpo salga del mismo.
+        """
+        if not self.supports(filters):
+            return None
+        if snapshot is None:
+            snapshot = self.current()
+        return snapshot.query(filters, limit, after) if snapshot is not None else None
+
+    def _run(self, step: Callable[[], None]) -> None:
+        # Si la BD falla se sigue sirviendo el último snapshot (o la BD, si no hay ninguno)
+        try:
+            step()
+        except exc.SQLAlchemyError:
+            logger.exception("Error al refrescar el catálogo en memoria")
+
+    def _reload_in_background(self) -> None:
+        try:
+            self._run(self._reload)
+        finally:
+            self._refresh_lock.release()
+
+    def _take_pending(self) -> Set[int]:
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+            self._stale = False
+        return dirty
+
+    def _reload(self) -> None:
+        self._take_pending()
+        db = self._session_factory()
+        try:
+            rows = list(ProductRepository(db).iter_snapshot_rows())
+            categories = dict(CategoryRepository(db).get_fingerprint())
+        finally:
+            db.close()
+
+        version = self._snapshot.version + 1 if self._snapshot is not None else 1
+        self._snapshot = CatalogSnapshot.build(rows, categories, version)
+        self._refreshed_at = self._reloaded_at = self._clock()
+        self.full_reloads += 1
+
+    def _refresh(self) -> None:
+        dirty = self._take_pending()
+        watermark = self._snapshot.max_updated_at
+        requested = sorted(dirty) if len(dirty) <= MAX_DIRTY_IDS else None
+
+        db = self._session_factory()
+        try:
+            repository = ProductRepository(db)
+            # Dos lecturas por índice (updated_at e id) en lugar de un OR que recorre la tabla
+            changed = {row[0]: row for row in repository.iter_snapshot_rows(
+                updated_since=watermark - REFRESH_LOOKBACK if watermark is not None else None,
+            )}
+            if requested:
+                changed.update((row[0], row) for row in repository.iter_snapshot_rows(product_ids=requested))
+            categories = dict(CategoryRepository(db).get_fingerprint())
+        finally:
+            db.close()
+
+        # Un id modificado en este proceso que ya no existe fue borrado
+        removed = [product_id for product_id in requested or [] if product_id not in changed]
+        rows = [changed[product_id] for product_id in sorted(changed)]
+        self._snapshot = self._snapshot.merge(rows, removed, categories)
+        self._refreshed_at = self._clock()
+        self.refreshes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "enabled": self.enabled,
+            "products": len(snapshot) if snapshot is not None else 0,
+            "version": snapshot.version if snapshot is not None else 0,
+            "refreshes": self.refreshes,
+            "full_reloads": self.full_reloads,
+        }
+
+
+columnar_catalog = ColumnarCatalog(
+    enabled=settings.COLUMNAR_CATALOG_ENABLED,
+    refresh_seconds=settings.COLUMNAR_CATALOG_REFRESH_SECONDS,
+    full_reload_seconds=settings.COLUMNAR_CATALOG_FULL_RELOAD_SECONDS,
+)
+catalog_cache.add_invalidation_listener(columnar_catalog.notify_changes)
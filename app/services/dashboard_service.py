@@ -0,0 +1,114 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.repositories.sales_rollup_repository import NO_CATEGORY, SalesRollupRepository
+from app.schemas.dashboard import CategorySales, LocalitySales, SalesPeriod, SalesSeries, SalesTotals
+
+GRANULARITIES = ("day", "week", "month")
+# Rango por defecto: los últimos 30 días, hoy incluido
+DEFAULT_RANGE_DAYS = 30
+# Tope del rango pedido (las series diaria y semanal leen una fila por día con ventas)
+MAX_RANGE_DAYS = 366 * 5
+
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _totals(orders, units, revenue) -> Dict:
+    return {"orders": int(orders or 0), "units": int(units or 0), "revenue": round(float(revenue or 0), 2)}
+
+
+class DashboardService:
+    """
+    Ventas agregadas para el dashboard de administración.
+
+    Lee los acumulados diarios y mensuales que el checkout y el cambio de estado mantienen
+    al día (ver SalesRollupRepository): los totales por categoría/localidad y la serie mensual
+    suman una fila por mes completo más los días sueltos de los bordes, y no dependen de la
+    cantidad de órdenes. Las series diaria y semanal leen una fila por día con ventas.
+    """
+
+    def __init__(self, db: Session):
+        self.repository = SalesRollupRepository(db)
+
+    @staticmethod
+    def resolve_range(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+        """Completa el rango (inclusivo) y lo valida. Lanza ValueError si no es válido."""
+        date_to = date_to or datetime.utcnow().date()
+        date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        if date_from > date_to:
+            raise ValueError("date_from no puede ser posterior a date_to.")
+        if (date_to - date_from).days >= MAX_RANGE_DAYS:
+            raise ValueError(f"El rango no puede superar los {MAX_RANGE_DAYS} días.")
+        return date_from, date_to
+
+    def get_sales(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        granularity: str = "day",
+        locality: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> SalesSeries:
+        """Órdenes, unidades y facturación por día, semana o mes (solo períodos con ventas)."""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad no soportada: '{granularity}'. Usa: {', '.join(GRANULARITIES)}.")
+        date_from, date_to = self.resolve_range(date_from, date_to)
+
+        if granularity == "month":
+            rows = self.repository.monthly_totals(date_from, date_to, locality, status)
+        else:
+            rows = self.repository.daily_totals(date_from, date_to, locality, status)
+        periods: Dict[date, List] = {}
+        for day, orders, units, revenue in rows:
+            totals = periods.setdefault(_period_start(day, granularity), [0, 0, 0.0])
+            totals[0] += orders or 0
+            totals[1] += units or 0
+            totals[2] += revenue or 0
+
+        return SalesSeries(
+            date_from=date_from,
+            date_to=date_to,
+            granularity=granularity,
+            totals=SalesTotals(**_totals(*(sum(values[i] for values in periods.values()) for i in range(3)))),
+            periods=[SalesPeriod(period=period, **_totals(*periods[period])) for period in sorted(periods)],
+        )
+
+    def get_sales_by_category(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        locality: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[CategorySales]:
+        """Ventas del rango por categoría, de mayor a menor facturación."""
+        date_from, date_to = self.resolve_range(date_from, date_to)
+        return [
+            CategorySales(
+                category_id=None if category_id == NO_CATEGORY else category_id,
+                category_name=name,
+                **_totals(orders, units, revenue),
+            )
+            for category_id, name, orders, units, revenue
+            in self.repository.category_totals(date_from, date_to, locality, status)
+        ]
+
+    def get_sales_by_locality(
+        self,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        status: Optional[str] = None,
+    ) -> List[LocalitySales]:
+        """Ventas del rango por localidad, de mayor a menor facturación."""
+        date_from, date_to = self.resolve_range(date_from, date_to)
+        return [
+            LocalitySales(locality=locality, **_totals(orders, units, revenue))
+            for locality, orders, units, revenue in self.repository.locality_totals(date_from, date_to, status)
+        ]
@@ -0,0 +1,273 @@
+import logging
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.repositories.cart_repository import CartRepository
+from app.repositories.cooccurrence_repository import CooccurrenceRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.order_repository import OrderRepository
+from app.repositories.product_repository import ProductRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.repositories.sales_repository import SalesRepository
+from app.repositories.sales_rollup_repository import RollupOrder, SalesRollupRepository
+from app.schemas.order import OrderCreate
+from app.services.cart_store import get_cart_store
+from app.services.catalog_cache import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FlashSaleOrder:
+    """Un checkout en cola: el carrito ya leído y el resultado que espera el request."""
+    user_id: int
+    cart_id: int
+    quantities: Dict[int, int]
+    order_data: OrderCreate
+    idempotency_key: Optional[str] = None
+    # id de la orden creada, o ValueError si no hay stock
+    result: Future = field(default_factory=Future)
+
+
+class FlashSaleTimeoutError(Exception):
+    """
+    El lote no respondió en settings.FLASH_SALE_WAIT_SECONDS. Con `in_doubt` el lote ya
+    había tomado la orden y puede haberla creado; sin él, se quitó de la cola sin procesar.
+    """
+
+    def __init__(self, in_doubt: bool):
+        self.in_doubt = in_doubt
+        if in_doubt:
+            message = "La compra sigue en proceso. Revisa tu historial de órdenes antes de reintentar."
+        else:
+            message = "La cola de venta flash no respondió a tiempo. Intenta nuevamente."
+        super().__init__(message)
+
+
+class FlashSaleQueue:
+    """
+    Checkout con commit agrupado para los productos de settings.FLASH_SALE_PRODUCT_IDS.
+
+    En una venta flash todos los checkouts esperan el bloqueo de la misma fila de
+    `products` y se procesa una orden por cada bloqueo. Con esta cola, los requests cuyo
+    carrito tiene un producto flash se encolan y un único hilo los toma de a lotes (hasta
+    `batch_size`, los que se hayan acumulado mientras procesaba el anterior): bloquea los
+    productos una vez, valida cada orden en orden de llegada contra el stock que va
+    quedando, y resta el stock, crea las órdenes y vacía los carritos en una sola
+    transacción. Cada request recibe su propio resultado (la orden o "agotado").
+
+    Es por proceso: con varios workers cada uno tiene su cola, y los lotes de distintos
+    procesos se ordenan por el bloqueo de las filas como cualquier checkout.
+    """
+
+    def __init__(self, batch_size: int, session_factory: Callable[[], Session] = SessionLocal):
+        self.batch_size = max(batch_size, 1)
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[FlashSaleOrder]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.batches = 0
+        self.orders = 0
+        self.sold_out = 0
+        self.errors = 0
+        self.largest_batch = 0
+
+    @staticmethod
+    def handles(product_ids: Iterable[int]) -> bool:
+        """True si el carrito tiene algún producto de venta flash."""
+        hot = settings.FLASH_SALE_PRODUCT_IDS
+        return bool(hot) and not set(hot).isdisjoint(product_ids)
+
+    def submit(self, order: FlashSaleOrder) -> int:
+        """
+        Encola el checkout y espera su lote. Devuelve el id de la orden creada; lanza
+        ValueError si no alcanzó el stock, FlashSaleTimeoutError si el lote no respondió
+        a tiempo o Exception si falló la transacción del lote.
+        """
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="flash-sale-checkout", daemon=True)
+                self._worker.start()
+        self._queue.put(order)
+        try:
+            return order.result.result(timeout=settings.FLASH_SALE_WAIT_SECONDS)
+        except FutureTimeoutError:
+            # Si sigue en la cola se cancela (el lote la saltea); si no, ya está en un lote
+            raise FlashSaleTimeoutError(in_doubt=not order.result.cancel())
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.process(batch)
+            except Exception:
+                # El hilo sigue vivo para los próximos lotes; process ya resolvió este
+                logger.exception("Error inesperado en la cola de venta flash")
+
+    def process(self, batch: List[FlashSaleOrder]) -> None:
+        """
+        Procesa un lote en una transacción y entrega el resultado a cada request.
+        Todas las órdenes del lote quedan resueltas, pase lo que pase.
+        """
+        # Las que vencieron su espera y se cancelaron no se procesan
+        batch = [order for order in batch if order.result.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            self._process(batch)
+        finally:
+            for order in batch:
+                if not order.result.done():
+                    order.result.set_exception(Exception("Fallo la transacción de la orden. Se revirtieron los cambios."))
+
+    def _process(self, batch: List[FlashSaleOrder]) -> None:
+        db = self._session_factory()
+        try:
+            results = self._apply(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Error en BD durante el lote de venta flash (%d pedidos)", len(batch))
+            self.errors += len(batch)
+            for order in batch:
+                order.result.set_exception(Exception("Fallo la transacción de la orden. Se revirtieron los cambios."))
+            return
+        else:
+            created = [order for order in batch if not isinstance(results[id(order)], Exception)]
+            # Igual que en el checkout normal: el carrito se vació y el stock cambió. Las órdenes
+            # ya están confirmadas, así que un fallo acá se registra y no cambia el resultado
+            try:
+                store = get_cart_store(db)
+                for order in created:
+                    store.invalidate(order.user_id)
+                catalog_cache.invalidate_products({product_id for order in created for product_id in order.quantities})
+            except Exception:
+                logger.exception("Error al invalidar carritos y catálogo tras el lote de venta flash")
+        finally:
+            db.close()
+
+        self.batches += 1
+        self.orders += len(created)
+        self.sold_out += len(batch) - len(created)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for order in batch:
+            result = results[id(order)]
+            if isinstance(result, Exception):
+                order.result.set_exception(result)
+            else:
+                order.result.set_result(result)
+
+    def _apply(self, db: Session, batch: List[FlashSaleOrder]) -> Dict[int, Union[int, Exception]]:
+        now = datetime.utcnow()
+        product_repository = ProductRepository(db)
+        reservation_repository = ReservationRepository(db)
+
+        # Un solo bloqueo, en orden de id, para todos los productos del lote
+        products = product_repository.get_many(
+            (product_id for order in batch for product_id in order.quantities), for_update=True
+        )
+        stock = {product_id: product.stock_current for product_id, product in products.items()}
+
+        # Con reservas, cada orden ve el stock menos lo reservado por los demás
+        reserved: Dict[int, int] = {}
+        own: Dict = {}
+        if settings.STOCK_RESERVATIONS_ENABLED:
+            reserved = reservation_repository.reserved_totals(products, now)
+            own = reservation_repository.get_reservations_of_users((order.user_id for order in batch), products, now)
+
+        results: Dict[int, Union[int, Exception]] = {}
+        accepted: List[FlashSaleOrder] = []
+        users = set()
+        for order in batch:
+            if order.user_id in users:
+                # Checkout repetido del mismo carrito en el lote: el primero ya lo compró
+                results[id(order)] = ValueError("El carrito está vacío. Agrega productos antes de finalizar la compra.")
+                continue
+            missing = [product_id for product_id in order.quantities if product_id not in products]
+            if missing:
+                results[id(order)] = ValueError(f"Producto con ID {missing[0]} no encontrado.")
+                continue
+            short = [
+                products[product_id].name
+                for product_id, quantity in order.quantities.items()
+                if quantity > stock[product_id] - (reserved.get(product_id, 0) - own.get((order.user_id, product_id), 0))
+            ]
+            if short:
+                results[id(order)] = ValueError(f"Agotado: no queda stock suficiente de {', '.join(short)}.")
+                continue
+            for product_id, quantity in order.quantities.items():
+                stock[product_id] -= quantity
+                # Su reserva se convierte en la orden: deja de descontarse para los demás
+                reserved[product_id] = reserved.get(product_id, 0) - own.get((order.user_id, product_id), 0)
+            accepted.append(order)
+            users.add(order.user_id)
+
+        if not accepted:
+            return results
+
+        units = defaultdict(int)
+        for order in accepted:
+            for product_id, quantity in order.quantities.items():
+                units[product_id] += quantity
+        if product_repository.decrement_stock(units) < len(units):
+            raise RuntimeError("El stock cambió durante el lote.")
+
+        order_repository = OrderRepository(db)
+        cooccurrence_repository = CooccurrenceRepository(db)
+        idempotency_repository = IdempotencyRepository(db)
+        rollups = []
+        for order in accepted:
+            items = [
+                {"product_id": product_id, "quantity": quantity, "price": products[product_id].price}
+                for product_id, quantity in order.quantities.items()
+            ]
+            new_order = order_repository.create_order_transaction(
+                user_id=order.user_id,
+                order_data=order.order_data,
+                items_to_add=items,
+                final_total=sum(item["quantity"] * item["price"] for item in items),
+            )
+            cooccurrence_repository.add_order(order.quantities)
+            if order.idempotency_key is not None:
+                idempotency_repository.attach_order(order.user_id, order.idempotency_key, new_order.id)
+            rollups.append(RollupOrder.of(new_order, (
+                (products[item["product_id"]].category_id, item["quantity"], item["price"]) for item in items
+            )))
+            results[id(order)] = new_order.id
+
+        SalesRepository(db).record_order(units.items(), day=now.date())
+        SalesRollupRepository(db).record_orders(rollups)
+        # Se quitan del carrito los productos comprados (lo agregado después queda)
+        CartRepository(db).set_quantities_many(
+            {order.cart_id: {product_id: 0 for product_id in order.quantities} for order in accepted}
+        )
+        if settings.STOCK_RESERVATIONS_ENABLED:
+            reservation_repository.release_users(order.user_id for order in accepted)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "orders": self.orders,
+            "sold_out": self.sold_out,
+            "errors": self.errors,
+            "largest_batch": self.largest_batch,
+        }
+
+
+flash_sale_queue = FlashSaleQueue(batch_size=settings.FLASH_SALE_BATCH_SIZE)
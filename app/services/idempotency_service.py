@@ -0,0 +1,139 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.rendering import SchemaRenderer
+from app.models.order import Order
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.repositories.order_repository import OrderRepository
+from app.schemas.order import OrderRead
+
+SWEEP_BATCH_SIZE = 1000
+SWEEP_SECONDS = 300
+POLL_SECONDS = 0.1
+# Una solicitud "en curso" más vieja que esto se da por caída y su clave se puede volver a usar
+STALE_SECONDS = 120
+MAX_KEY_LENGTH = 255
+
+# La respuesta se guarda con el mismo serializador que la ruta rápida de órdenes
+order_response = SchemaRenderer(OrderRead)
+
+# Último barrido de claves vencidas hecho por este proceso
+_swept_at: Optional[datetime] = None
+_sweep_lock = threading.Lock()
+
+
+class IdempotencyKeyMismatchError(ValueError):
+    """La clave ya se usó con otro cuerpo de solicitud."""
+
+
+class IdempotencyKeyInUseError(ValueError):
+    """Otra solicitud con la misma clave sigue en curso."""
+
+
+class IdempotencyService:
+    """
+    Header Idempotency-Key de POST /orders.
+
+    La primera solicitud registra la clave (con la huella del cuerpo) antes del checkout y
+    guarda la respuesta serializada al terminar. Un reintento con la misma clave devuelve
+    esa respuesta sin leer el carrito ni bloquear productos; si la primera sigue en curso,
+    espera hasta IDEMPOTENCY_WAIT_SECONDS. Las claves vencen a los IDEMPOTENCY_KEY_TTL_SECONDS.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = IdempotencyRepository(db)
+
+    @staticmethod
+    def fingerprint(payload: BaseModel) -> str:
+        canonical = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def begin(self, user_id: int, key: str, payload: BaseModel) -> Optional[bytes]:
+        """
+        Registra la clave y devuelve None (hay que ejecutar el checkout), o devuelve la
+        respuesta guardada de una solicitud anterior con la misma clave.
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"La Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres.")
+
+        self.sweep_if_due()
+        fingerprint = self.fingerprint(payload)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            now = datetime.utcnow()
+            try:
+                self.repository.claim(
+                    user_id, key, fingerprint, now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+                )
+                self.db.commit()
+                return None
+            except exc.IntegrityError:
+                self.db.rollback()
+
+            record = self.repository.get(user_id, key)
+            if record is None:
+                # La solicitud anterior falló y liberó la clave
+                continue
+            if record.expires_at <= now:
+                self.repository.delete_if_expired(user_id, key, now)
+                self.db.commit()
+                continue
+            if record.order_id is None and record.created_at <= now - timedelta(seconds=STALE_SECONDS):
+                self.repository.release(user_id, key, created_before=now - timedelta(seconds=STALE_SECONDS))
+                self.db.commit()
+                continue
+            if record.fingerprint != fingerprint:
+                raise IdempotencyKeyMismatchError("La Idempotency-Key ya se usó con otra solicitud.")
+            if record.response is not None:
+                return record.response.encode("utf-8")
+            if record.order_id is not None:
+                # La orden se creó pero la respuesta no llegó a guardarse
+                order = OrderRepository(self.db).get_by_id(record.order_id)
+                return self.complete(user_id, key, order)
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInUseError(
+                    "Hay una solicitud en curso con esta Idempotency-Key. Reintenta en unos segundos."
+                )
+            # Cierra la transacción para ver el resultado de la otra solicitud al releer
+            self.db.rollback()
+            time.sleep(POLL_SECONDS)
+
+    def complete(self, user_id: int, key: str, order: Order) -> bytes:
+        """Guarda la respuesta de la orden creada con la clave y la devuelve serializada."""
+        body = order_response.render(order)
+        self.repository.store_response(user_id, key, body.decode("utf-8"))
+        self.db.commit()
+        return body
+
+    def abandon(self, user_id: int, key: str) -> None:
+        """El checkout falló sin crear la orden: libera la clave para que el cliente reintente."""
+        self.db.rollback()
+        self.repository.release(user_id, key)
+        self.db.commit()
+
+    def sweep_if_due(self) -> None:
+        """Barrido de claves vencidas, como mucho una vez cada SWEEP_SECONDS por proceso."""
+        global _swept_at
+        now = datetime.utcnow()
+        if _swept_at is not None and now - _swept_at < timedelta(seconds=SWEEP_SECONDS):
+            return
+        if not _sweep_lock.acquire(blocking=False):
+            return
+        try:
+            _swept_at = now
+            while self.repository.delete_expired(now, SWEEP_BATCH_SIZE) == SWEEP_BATCH_SIZE:
+                self.db.commit()
+            self.db.commit()
+        finally:
+            _sweep_lock.release()
@@ -1,15 +1,29 @@
 # app/services/order_service.py
-from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy import exc
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from datetime import datetime
 
-from app.models.order_item import OrderItem
 from app.models.order import Order
 from app.models.user import User
-from app.schemas.order import OrderCreate
+from app.schemas.order import OrderCreate, OrderFilterParams
 from app.repositories.order_repository import OrderRepository
 from app.repositories.cart_repository import CartRepository
 from app.repositories.product_repository import ProductRepository
+from app.repositories.cooccurrence_repository import CooccurrenceRepository
+from app.repositories.sales_repository import SalesRepository
+from app.repositories.sales_rollup_repository import RollupOrder, SalesRollupRepository
+from app.repositories.reservation_repository import ReservationRepository
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.core.config import settings
+from app.services.catalog_cache import catalog_cache
+from app.services.cart_store import get_cart_store
+from app.services.flash_sale import FlashSaleOrder, flash_sale_queue
+from app.core.pagination import decode_cursor, encode_cursor
+
+DEFAULT_PAGE_SIZE = 20
+# Los listados de órdenes siempre se ordenan por (order_date, id) descendente
+ORDER_HISTORY_SCOPE = "order_date:desc"
 
 class OrderService:
     """
@@ -20,57 +34,106 @@ class OrderService:
         self.order_repository = OrderRepository(db)
         self.cart_repository = CartRepository(db)
         self.product_repository = ProductRepository(db)
+        self.cooccurrence_repository = CooccurrenceRepository(db)
+        self.sales_repository = SalesRepository(db)
+        self.sales_rollup_repository = SalesRollupRepository(db)
+        self.cart_store = get_cart_store(db)
+        self.reservation_repository = ReservationRepository(db)
+        self.idempotency_repository = IdempotencyRepository(db)
         
 
     def get_order_by_id(self, order_id: int) -> Optional[Order]:
         return self.order_repository.get_by_id(order_id)
 
 
-    def get_orders_by_user_id(self, user_id: int) -> List[Order]:
+    def get_orders_by_user_id(self, user_id: int, filters: Optional[OrderFilterParams] = None) -> List[Order]:
         """
-        Recupera todas las órdenes de un usuario cargando 
-        automáticamente los productos asociados.
+        Recupera todas las órdenes de un usuario (con los filtros dados)
+        cargando automáticamente los productos asociados.
         """
-        return (
-            self.db.query(Order)
-            .filter(Order.user_id == user_id)
-            # EXPLICACIÓN TÉCNICA:
-            # 1. selectinload(Order.items): Carga eficientemente la lista de items.
-            # 2. .joinedload(OrderItem.product): Por cada item, une la tabla Products para traer el nombre/imagen.
-            .options(
-                selectinload(Order.items).joinedload(OrderItem.product)
-            )
-            .order_by(Order.order_date.desc()) # Ordenamos por fecha descendente
-            .all()
-        )
+        filters = (filters or OrderFilterParams()).model_copy(update={"user_id": user_id})
+        return self.order_repository.list_filtered(**filters.model_dump())
+
+    def get_orders_page(
+        self, filters: OrderFilterParams, limit: Optional[int], cursor: Optional[str]
+    ) -> Tuple[List[Order], Optional[str]]:
+        """Una página de órdenes filtradas, más recientes primero, y el cursor de la siguiente."""
+        limit = limit or DEFAULT_PAGE_SIZE
+        # Lanza InvalidCursorError (ValueError) si el cursor no es válido
+        after = decode_cursor(cursor, ORDER_HISTORY_SCOPE)
 
-    def create_order_transactional(self, user_id: int, order_data: OrderCreate) -> Order:
+        # Pedimos un elemento extra para saber si existe una página siguiente
+        orders = self.order_repository.list_filtered(**filters.model_dump(), limit=limit + 1, after=after)
+
+        next_cursor = None
+        if len(orders) > limit:
+            orders = orders[:limit]
+            next_cursor = encode_cursor(ORDER_HISTORY_SCOPE, orders[-1].order_date, orders[-1].id)
+        return orders, next_cursor
+
+    def create_order_transactional(
+        self, user_id: int, order_data: OrderCreate, idempotency_key: Optional[str] = None
+    ) -> Order:
         """
         Ejecuta la transacción atómica:
         Verifica Stock - Resta Stock - Crea Orden - Vacía Carrito.
+        Con `idempotency_key` (ya registrada por IdempotencyService), la orden queda
+        asociada a la clave en la misma transacción.
         """
         
+        # Con el store en memoria, el carrito puede tener cambios sin escribir todavía
+        try:
+            self.cart_store.flush(user_id)
+        except exc.SQLAlchemyError as e:
+            print(f"Error en BD al guardar el carrito: {e}")
+            raise Exception("Fallo la transacción de la orden. Se revirtieron los cambios.")
+
         cart = self.cart_repository.get_cart_by_user_id(user_id)
         
         if not cart or not cart.items:
             raise ValueError("El carrito está vacío. Agrega productos antes de finalizar la compra.")
 
+        if flash_sale_queue.handles(item.product_id for item in cart.items):
+            return self._create_order_queued(user_id, order_data, cart, idempotency_key)
+
         items_to_process = []
         final_total = 0.0
         
         try:
+            in_cart = {cart_item.product_id: cart_item.quantity for cart_item in cart.items}
+
+            # Con reservas, lo ya apartado por el usuario se convierte sin bloquear el producto:
+            # el disponible se validó al reservar y nadie más puede tomarlo mientras esté vigente
+            reserved = {}
+            reserved_by_others = {}
+            if settings.STOCK_RESERVATIONS_ENABLED:
+                now = datetime.utcnow()
+                reserved = self.reservation_repository.get_user_reservations(user_id, now, in_cart)
+                reserved_by_others = self.reservation_repository.reserved_by_others(
+                    [product_id for product_id, quantity in in_cart.items() if reserved.get(product_id, 0) < quantity],
+                    user_id,
+                    now,
+                )
+            covered = {product_id for product_id, quantity in in_cart.items() if reserved.get(product_id, 0) >= quantity}
+
+            # Un solo SELECT ... FOR UPDATE para todo el carrito, en orden de id (sin deadlocks
+            # entre compras con productos en común) y una lectura simple de los reservados
+            products = self.product_repository.get_many(
+                (product_id for product_id in in_cart if product_id not in covered), for_update=True
+            )
+            products.update(self.product_repository.get_many(covered))
 
             for cart_item in cart.items:
-                product = self.product_repository.get_by_id_for_update(cart_item.product_id)
+                product = products.get(cart_item.product_id)
                 
                 if product is None:
 
                     raise ValueError(f"Producto con ID {cart_item.product_id} no encontrado.")
                 
+                available = product.stock_current - reserved_by_others.get(cart_item.product_id, 0)
+                if cart_item.product_id not in covered and cart_item.quantity > available:
 
-                if cart_item.quantity > product.stock_current:
-
-                    raise ValueError(f"Stock insuficiente para {product.name}. Solo quedan {product.stock_current} unidades.")
+                    raise ValueError(f"Stock insuficiente para {product.name}. Solo quedan {max(available, 0)} unidades.")
                 
 
                 subtotal = cart_item.quantity * product.price
@@ -80,17 +143,12 @@ class OrderService:
                     "product_id": cart_item.product_id,
                     "quantity": cart_item.quantity,
                     "price": product.price,
-                    "product_obj": product 
                 })
             
-
-            updated_products = []
-            for item in items_to_process:
-                product = item["product_obj"]
-                product.stock_current -= item["quantity"]
-                self.db.add(product)
-                updated_products.append(product)
-                
+            # Resta de todo el carrito en un UPDATE ... CASE, condicionado a que alcance el stock
+            # (las filas reservadas no se bloquearon)
+            if self.product_repository.decrement_stock(in_cart) < len(in_cart):
+                raise ValueError("Stock insuficiente: otra compra tomó las últimas unidades. Intenta nuevamente.")
 
             new_order = self.order_repository.create_order_transaction(
                 user_id=user_id,
@@ -99,11 +157,33 @@ class OrderService:
                 final_total=final_total
             )
             
+            # Conteos de "comprados juntos" (misma transacción que la orden)
+            self.cooccurrence_repository.add_order(item["product_id"] for item in items_to_process)
+            # Contadores de ventas para los rankings de más vendidos
+            self.sales_repository.record_order(
+                ((item["product_id"], item["quantity"]) for item in items_to_process),
+                day=datetime.utcnow().date(),
+            )
+            # Acumulados del dashboard (día, categoría y localidad)
+            self.sales_rollup_repository.record_orders([RollupOrder.of(new_order, (
+                (products[item["product_id"]].category_id, item["quantity"], item["price"])
+                for item in items_to_process
+            ))])
+
+            if idempotency_key is not None:
+                self.idempotency_repository.attach_order(user_id, idempotency_key, new_order.id)
+            if settings.STOCK_RESERVATIONS_ENABLED:
+                self.reservation_repository.release(user_id)
             self.cart_repository.clear_cart(cart)
             
 
             self.db.commit()
             self.db.refresh(new_order)
+            # El checkout vació el carrito en la BD
+            self.cart_store.invalidate(user_id)
+
+            # El stock cambió: el detalle y los listados con estos productos quedaron viejos
+            catalog_cache.invalidate_products(item["product_id"] for item in items_to_process)
             
             return new_order
         
@@ -121,21 +201,38 @@ class OrderService:
     
     
     
-    def get_all_orders(self) -> List[Order]:
-        """ADMIN: Recupera todas las órdenes del sistema."""
-        return (
-            self.db.query(Order)
-            .options(
-                selectinload(Order.items).joinedload(OrderItem.product)
-            )
-            .order_by(Order.order_date.desc())
-            .all()
+    def _create_order_queued(
+        self, user_id: int, order_data: OrderCreate, cart, idempotency_key: Optional[str]
+    ) -> Order:
+        """Checkout de venta flash: lo procesa el lote de FlashSaleQueue (commit agrupado)."""
+        request = FlashSaleOrder(
+            user_id=user_id,
+            cart_id=cart.id,
+            quantities={item.product_id: item.quantity for item in cart.items},
+            order_data=order_data,
+            idempotency_key=idempotency_key,
         )
+        # Sin transacción abierta mientras espera: al volver se lee la orden ya confirmada
+        self.db.rollback()
+        order_id = flash_sale_queue.submit(request)
+        return self.order_repository.get_by_id(order_id)
+
+    def get_all_orders(self, filters: Optional[OrderFilterParams] = None) -> List[Order]:
+        """ADMIN: Recupera todas las órdenes del sistema (con los filtros dados)."""
+        return self.order_repository.list_filtered(**(filters or OrderFilterParams()).model_dump())
         
         
         
     def update_order_status(self, order_id: int, new_status: str) -> Order:
-        """Cambia el estado de una orden. Lanza error si no existe."""
+        """
+        Cambia el estado de una orden y mueve su aporte a los acumulados del dashboard
+        en la misma transacción. Lanza error si no existe.
+        """
+        # Bloqueada: dos cambios simultáneos no pueden descontar ambos el estado anterior
+        order = self.order_repository.get_by_id_for_update(order_id)
+        if order is not None and order.status != new_status:
+            self.sales_rollup_repository.move_status(self.sales_rollup_repository.order_entry(order), new_status)
+
         updated_order = self.order_repository.update_status(order_id, new_status)
         
         if not updated_order:
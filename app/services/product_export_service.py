@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from typing import Callable, Iterable, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.repositories.product_repository import ProductRepository, ProductRow
+from app.schemas.product import ProductFilterParams
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Columnas exportadas. Incluyen las de ProductCreate, así que el archivo se puede
+# volver a cargar con POST /products/admin/import.
+EXPORT_COLUMNS = (
+    "id", "sku", "name", "description", "price", "rating", "category_id", "category_name",
+    "image_url", "stock_current", "stock_min", "stock_status", "created_at",
+)
+
+
+def _export_values(row: ProductRow) -> List:
+    return [
+        row.id, row.sku, row.name, row.description, row.price, row.rating, row.category_id,
+        row.category.name if row.category is not None else None,
+        row.image_url, row.stock_current, row.stock_min, row.stock_status,
+        row.created_at.isoformat() if row.created_at is not None else None,
+    ]
+
+
+class ProductExportService:
+    """
+    Exportación del catálogo completo (o filtrado) en NDJSON o CSV.
+
+    Los generadores abren su propia sesión: el cuerpo se envía después de que el
+    endpoint retorna, cuando la sesión del request ya puede estar cerrada.
+    Las filas se leen con un cursor del lado del servidor y se emiten por bloques,
+    así que la memoria no crece con el tamaño del catálogo.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def stream(self, filters: ProductFilterParams, file_format: str) -> Iterator[bytes]:
+        if file_format == "csv":
+            return self._iter_csv(filters)
+        return self._iter_ndjson(filters)
+
+    def _iter_ndjson(self, filters: ProductFilterParams) -> Iterator[bytes]:
+        for batch in self._iter_batches(filters):
+            lines = [
+                json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row))), ensure_ascii=False)
+                for row in batch
+            ]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _iter_csv(self, filters: ProductFilterParams) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in self._iter_batches(filters):
+            writer.writerows(_export_values(row) for row in batch)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Catálogo vacío: solo el encabezado
+            yield buffer.getvalue().encode("utf-8")
+
+    def _iter_batches(self, filters: ProductFilterParams) -> Iterable[List[ProductRow]]:
+        db = self.session_factory()
+        try:
+            rows = ProductRepository(db).iter_rows(
+                category=filters.categories[0] if filters.categories else None,
+                min_price=filters.price_min,
+                max_price=filters.price_max,
+                search=filters.search,
+                stock_status=filters.stock_status,
+                sort_by=filters.sort_by,
+                order=filters.order,
+                batch_size=EXPORT_BATCH_SIZE,
+            )
+            batch: List[ProductRow] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= EXPORT_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            db.close()
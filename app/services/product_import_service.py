@@ -0,0 +1,206 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.product import ImportRowError, ProductCreate, ProductImportReport
+from app.services.catalog_cache import catalog_cache
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ("csv", "ndjson")
+# Tope de una línea (o de un registro CSV de varias líneas): un cuerpo sin saltos no llena la memoria
+MAX_LINE_BYTES = 1024 * 1024
+
+# Registro leído del archivo: (número de línea, datos o mensaje de error de parseo)
+Record = Tuple[int, Union[Dict[str, Any], str]]
+
+
+class _BadLine(NamedTuple):
+    """Línea que no se pudo leer: se reporta como error de esa fila."""
+    message: str
+
+
+def _decode(raw: bytes, line_number: int) -> Union[str, _BadLine]:
+    try:
+        return raw.decode("utf-8-sig" if line_number == 1 else "utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return _BadLine(f"La línea no es UTF-8 válido (byte {e.start + 1}).")
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Union[str, _BadLine]]]:
+    """
+    Corta el cuerpo en líneas a medida que llega; solo retiene la línea incompleta.
+    Las líneas que no son UTF-8 o superan MAX_LINE_BYTES llegan como _BadLine.
+    """
+    buffer = b""
+    line_number = 0
+    oversized = False  # descartando el resto de una línea demasiado larga
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if oversized:
+            if not lines:
+                buffer = b""
+                continue
+            # Lo que precede al primer salto es el final de la línea descartada
+            lines, oversized = lines[1:], False
+        for raw in lines:
+            line_number += 1
+            yield line_number, _decode(raw, line_number)
+        if len(buffer) > MAX_LINE_BYTES:
+            line_number += 1
+            yield line_number, _BadLine(f"La línea supera el máximo de {MAX_LINE_BYTES} bytes.")
+            buffer, oversized = b"", True
+    if buffer and not oversized:
+        line_number += 1
+        yield line_number, _decode(buffer, line_number)
+
+
+async def _iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    async for line_number, line in _iter_lines(stream):
+        if isinstance(line, _BadLine):
+            yield line_number, line.message
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"JSON inválido: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, "Cada línea debe ser un objeto JSON."
+            continue
+        yield line_number, data
+
+
+async def _iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """CSV con encabezado. Une las líneas de un campo entre comillas que contiene saltos de línea."""
+    header = None
+    pending, start_line = "", 0
+    async for line_number, line in _iter_lines(stream):
+        if isinstance(line, _BadLine):
+            # Si cortó un registro de varias líneas, se descarta el registro entero
+            yield line_number, line.message
+            pending = ""
+            continue
+        if not pending:
+            start_line = line_number
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            if len(pending) > MAX_LINE_BYTES:
+                yield start_line, f"El registro CSV supera el máximo de {MAX_LINE_BYTES} bytes."
+                pending = ""
+            continue  # el registro sigue en la próxima línea
+
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start_line, f"Se esperaban {len(header)} columnas y llegaron {len(values)}."
+            continue
+        # Las celdas vacías equivalen a "sin valor" (usa el default del esquema)
+        yield start_line, {name: value for name, value in zip(header, values) if value != ""}
+
+    if pending:
+        yield start_line, "Registro CSV incompleto (comillas sin cerrar)."
+
+
+class ProductImportService:
+    """
+    Importación masiva del catálogo con upsert por SKU.
+
+    El cuerpo se procesa en streaming por lotes de IMPORT_CHUNK_SIZE filas: cada lote se
+    valida contra ProductCreate y se guarda con un único INSERT multi-fila con upsert,
+    así que la memoria usada no depende del tamaño del archivo.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = ProductRepository(db)
+        self.category_repository = CategoryRepository(db)
+
+    async def import_stream(self, stream: AsyncIterator[bytes], file_format: str) -> ProductImportReport:
+        report = ProductImportReport()
+        records = _iter_csv(stream) if file_format == "csv" else _iter_ndjson(stream)
+        chunk: List[Record] = []
+
+        try:
+            async for record in records:
+                chunk.append(record)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    # La BD es síncrona: cada lote se guarda en el threadpool
+                    await run_in_threadpool(self.import_chunk, chunk, report)
+                    chunk = []
+            if chunk:
+                await run_in_threadpool(self.import_chunk, chunk, report)
+        finally:
+            if report.upserted:
+                catalog_cache.clear()
+
+        return report
+
+    def import_chunk(self, records: List[Record], report: ProductImportReport) -> None:
+        """Valida un lote, reporta las filas inválidas y hace upsert de las válidas."""
+        valid: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        for line, data in records:
+            report.received += 1
+            if isinstance(data, str):
+                self._add_error(report, line, None, [data])
+                continue
+            try:
+                product = ProductCreate.model_validate(data)
+            except ValidationError as e:
+                messages = [f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()]
+                self._add_error(report, line, data.get("sku"), messages)
+                continue
+            if product.stock_current < 0:
+                self._add_error(report, line, product.sku, ["stock_current: no puede ser negativo"])
+                continue
+            # Un SKU repetido dentro del lote: gana la última fila
+            valid[product.sku] = (line, product.model_dump())
+
+        category_ids = {row["category_id"] for _, row in valid.values() if row["category_id"] is not None}
+        existing = self.category_repository.get_existing_ids(category_ids)
+        rows = []
+        for sku, (line, row) in valid.items():
+            if row["category_id"] is not None and row["category_id"] not in existing:
+                self._add_error(report, line, sku, [f"category_id: la categoría {row['category_id']} no existe"])
+                continue
+            rows.append((line, row))
+
+        if not rows:
+            return
+
+        try:
+            self.repository.upsert_by_sku([row for _, row in rows])
+            report.upserted += len(rows)
+        except exc.SQLAlchemyError:
+            # Algún valor que la BD rechaza (ej: longitud): se aísla fila por fila
+            self.db.rollback()
+            for line, row in rows:
+                try:
+                    self.repository.upsert_by_sku([row])
+                    report.upserted += 1
+                except exc.SQLAlchemyError as e:
+                    self.db.rollback()
+                    self._add_error(report, line, row["sku"], [str(e.orig) if e.orig else str(e)])
+
+    @staticmethod
+    def _add_error(report: ProductImportReport, line: int, sku: Any, messages: List[str]) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportRowError(line=line, sku=str(sku) if sku is not None else None, errors=messages))
+        else:
+            report.errors_truncated = True
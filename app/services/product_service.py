@@ -1,35 +1,230 @@
+from datetime import datetime
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.repositories.product_repository import ProductRepository
-from app.schemas.product import ProductCreate, ProductUpdate, ProductFilterParams
+from typing import List, Optional, Tuple
+from app.core.etag import make_etag
+from app.core.pagination import encode_cursor, decode_cursor
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.product_repository import ProductRepository, SORT_COLUMNS
+from app.repositories.product_search import search_terms
+from app.schemas.product import ProductCreate, ProductUpdate, ProductFilterParams, ProductResponse, ProductFacets, LowStockItem
 from app.models.product import Product
+from app.services.catalog_cache import catalog_cache, listing_key, ProductSnapshot
+from app.services.columnar_catalog import columnar_catalog
+from app.services.sales_service import SalesService
+
+DEFAULT_PAGE_SIZE = 20
+LOW_STOCK_SCOPE = "low-stock"
+
 
 class ProductService:
     def __init__(self, db: Session):
         self.repository = ProductRepository(db)
+        self.category_repository = CategoryRepository(db)
+        self.sales_service = SalesService(db)
+        # Snapshot columnar con el que se calculó el ETag del listado: el cuerpo sale del mismo
+        self._columnar_snapshot = None
+        # Con el ETag del resumen ya calculado, el cuerpo no sale de catalog_cache: una entrada
+        # vieja (el producto cambió en otro proceso) quedaría guardada bajo el ETag vigente
+        self._skip_listing_cache = False
+
+    @staticmethod
+    def get_product_etag(product: ProductResponse) -> str:
+        """ETag del detalle, derivado de la misma representación que se envía."""
+        return make_etag("product", product.id, product)
 
-    def get_filtered_products(self, filters: ProductFilterParams) -> List[Product]:
+    def get_listing_etag(self, filters: ProductFilterParams) -> str:
         """
-        Llama al repositorio aplicando los filtros recibidos del router.
+        ETag de un listado: filtros normalizados + resumen agregado del conjunto filtrado.
+        Es una consulta sobre todo el conjunto: se usa solo para revalidar (If-None-Match);
+        las respuestas sin revalidación llevan get_content_etag. Incluye las categorías porque cada producto expone el nombre de la suya y, al
+        ordenar por popularidad, el día: las ventanas de ventas se mueven al cambiar de día.
+        Si el listado lo resuelve el catálogo en memoria, basta el resumen de contenido de
+        su snapshot (que ya cubre productos y categorías) y no se consulta la BD.
         """
-        # Convertimos los filtros del esquema a argumentos simples para el repo
-        return self.repository.list_filtered(
+        self._skip_listing_cache = True
+        if columnar_catalog.supports(filters):
+            snapshot = columnar_catalog.current()
+            if snapshot is not None:
+                self._columnar_snapshot = snapshot
+                return make_etag("products", listing_key(filters), "columnar", snapshot.fingerprint)
+
+        version = self.repository.listing_version(
             category=filters.categories[0] if filters.categories else None,
             min_price=filters.price_min,
             max_price=filters.price_max,
-            sort_by=filters.sort_by,
-            order=filters.order
-            # search=filters.search # Si agregamos busqueda
+            search=filters.search,
+            stock_status=filters.stock_status,
         )
+        day = datetime.utcnow().date() if filters.sort_by == "popularity" else None
+        return make_etag("products", listing_key(filters), version, self.category_repository.get_fingerprint(), day)
+
+    @staticmethod
+    def get_content_etag(
+        filters: ProductFilterParams, products: List[ProductResponse], next_cursor: Optional[str] = None
+    ) -> str:
+        """ETag de un listado derivado de lo que se va a servir, sin consultar la BD."""
+        return make_etag("products", listing_key(filters), products, next_cursor)
+
+    def get_filtered_products(self, filters: ProductFilterParams) -> List[ProductResponse]:
+        """
+        Llama al repositorio aplicando los filtros recibidos del router.
+        El resultado se sirve desde la caché del catálogo mientras siga vigente (salvo
+        que ya se haya calculado get_listing_etag: ver `_skip_listing_cache`).
+        """
+        cached = None if self._skip_listing_cache else catalog_cache.get_listing(filters)
+        if cached is not None:
+            return cached
+
+        if filters.sort_by == "popularity":
+            self.sales_service.refresh_windows_if_stale()
 
-    def get_product_by_id(self, product_id: int) -> Optional[Product]:
-        return self.repository.get_by_id(product_id)
+        products = columnar_catalog.query(filters, snapshot=self._columnar_snapshot)
+        if products is None:
+            # Convertimos los filtros del esquema a argumentos simples para el repo
+            products = self.repository.list_rows(
+                category=filters.categories[0] if filters.categories else None,
+                min_price=filters.price_min,
+                max_price=filters.price_max,
+                sort_by=filters.sort_by,
+                search=filters.search,
+                stock_status=filters.stock_status,
+                order=filters.order
+            )
+
+        result = [ProductResponse.model_validate(product, from_attributes=True) for product in products]
+        catalog_cache.set_listing(filters, result, [product.id for product in products])
+        return result
+
+    def get_products_page(self, filters: ProductFilterParams) -> Tuple[List[ProductResponse], Optional[str]]:
+        """
+        Devuelve una página de productos y el cursor de la siguiente (o None si es la última).
+        El costo de cada página es el mismo sin importar su profundidad (keyset).
+        """
+        cached = None if self._skip_listing_cache else catalog_cache.get_listing(filters)
+        if cached is not None:
+            return cached
+
+        if filters.sort_by == "popularity":
+            self.sales_service.refresh_windows_if_stale()
+
+        order = "desc" if filters.order == "desc" else "asc"
+        terms = search_terms(filters.search)
+
+        if filters.sort_by in SORT_COLUMNS:
+            # El cursor guarda el valor de la columna de orden (ej: stock_margin para stock_status)
+            sort_key, scope = SORT_COLUMNS[filters.sort_by].key, f"{filters.sort_by}:{order}"
+        elif terms:
+            # Orden por relevancia: el cursor solo vale para la misma búsqueda
+            sort_key, scope = "search_rank", "relevance:" + " ".join(terms)
+        else:
+            sort_key, scope = "id", f"id:{order}"
+        limit = filters.limit or DEFAULT_PAGE_SIZE
+
+        # Lanza InvalidCursorError (ValueError) si el cursor no es válido
+        after = decode_cursor(filters.cursor, scope)
+
+        # Pedimos un elemento extra para saber si existe una página siguiente
+        products = columnar_catalog.query(
+            filters, limit=limit + 1, after=after, snapshot=self._columnar_snapshot
+        )
+        if products is None:
+            products = self.repository.list_rows(
+                category=filters.categories[0] if filters.categories else None,
+                min_price=filters.price_min,
+                max_price=filters.price_max,
+                search=filters.search,
+                stock_status=filters.stock_status,
+                sort_by=filters.sort_by,
+                order=order,
+                limit=limit + 1,
+                after=after,
+            )
+
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            last = products[-1]
+            next_cursor = encode_cursor(scope, getattr(last, sort_key), last.id)
+
+        page = ([ProductResponse.model_validate(product, from_attributes=True) for product in products], next_cursor)
+        catalog_cache.set_listing(filters, page, [product.id for product in products])
+        return page
+
+    def get_facets(self, filters: ProductFilterParams, bucket_size: float) -> ProductFacets:
+        """
+        Facetas del listado para los filtros dados. El caso sin filtros (la portada del
+        catálogo) se precalcula una vez y se sirve desde caché hasta el próximo cambio.
+        """
+        unfiltered = not (filters.categories or filters.search or filters.stock_status
+                          or filters.price_min is not None or filters.price_max is not None)
+        if unfiltered:
+            cached = catalog_cache.get_facets(bucket_size)
+            if cached is not None:
+                return cached
+
+        facets = ProductFacets(**self.repository.facet_counts(
+            category=filters.categories[0] if filters.categories else None,
+            min_price=filters.price_min,
+            max_price=filters.price_max,
+            search=filters.search,
+            stock_status=filters.stock_status,
+            bucket_size=bucket_size,
+        ))
+
+        if unfiltered:
+            catalog_cache.set_facets(bucket_size, facets)
+        return facets
+
+    def get_low_stock_page(
+        self, limit: int, cursor: Optional[str] = None, category_id: Optional[int] = None
+    ) -> Tuple[List[LowStockItem], Optional[str]]:
+        """
+        Reporte de reposición: productos en Alerta o Agotado, del más urgente al menos.
+        No se cachea (es para administración y debe reflejar el stock actual).
+        """
+        # Lanza InvalidCursorError (ValueError) si el cursor no es válido
+        after = decode_cursor(cursor, LOW_STOCK_SCOPE)
+        rows = self.repository.list_low_stock(limit + 1, after=after, category_id=category_id)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(LOW_STOCK_SCOPE, rows[-1].stock_margin, rows[-1].id)
+
+        return [LowStockItem.model_validate(row, from_attributes=True) for row in rows], next_cursor
+
+    def get_product_by_id(self, product_id: int) -> Optional[ProductResponse]:
+        """
+        Detalle leído de la BD con una consulta de proyección (sin instanciar el ORM).
+        No usa catalog_cache: el ETag sale de esta misma lectura, y la entrada en caché
+        puede estar vieja si otro proceso (worker, CLI, importación) modificó el producto.
+        """
+        row = self.repository.get_row(product_id)
+        if row is None:
+            return None
+        return ProductResponse.model_validate(row, from_attributes=True)
 
     def create_product(self, product_data: ProductCreate) -> Product:
-        return self.repository.create(product_data)
+        product = self.repository.create(product_data)
+        catalog_cache.invalidate_product(product.id, ProductSnapshot.of(product))
+        return product
 
     def update_product(self, product_id: int, product_data: ProductUpdate) -> Optional[Product]:
-        return self.repository.update(product_id, product_data)
+        product = self.repository.get_by_id(product_id)
+        if product is None:
+            return None
+
+        before = ProductSnapshot.of(product)
+        product = self.repository.update(product_id, product_data)
+        catalog_cache.invalidate_product(product_id, before, ProductSnapshot.of(product))
+        return product
 
     def delete_product(self, product_id: int) -> bool:
-        return self.repository.delete(product_id)
\ No newline at end of file
+        product = self.repository.get_by_id(product_id)
+        if product is None:
+            return False
+
+        before = ProductSnapshot.of(product)
+        deleted = self.repository.delete(product_id)
+        catalog_cache.invalidate_product(product_id, before)
+        return deleted
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.repositories.cooccurrence_repository import CooccurrenceRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.product import BoughtTogetherItem
+
+
+class RecommendationService:
+    """
+    Recomendaciones "comprados juntos frecuentemente".
+
+    Los conteos de co-ocurrencia se mantienen al confirmar cada orden (ver OrderService),
+    así que leerlos es una consulta top-K sobre una tabla precalculada.
+    """
+
+    def __init__(self, db: Session):
+        self.repository = CooccurrenceRepository(db)
+        self.product_repository = ProductRepository(db)
+
+    def get_bought_together(self, product_id: int, limit: int) -> Optional[List[BoughtTogetherItem]]:
+        """Devuelve los productos más comprados junto al indicado, o None si este no existe."""
+        if not self.product_repository.exists(product_id):
+            return None
+
+        return [
+            BoughtTogetherItem.model_validate({"product": row, "order_count": count}, from_attributes=True)
+            for row, count in self.repository.top_related(product_id, limit)
+        ]
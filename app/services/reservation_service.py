@@ -0,0 +1,94 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.product_repository import ProductRepository
+from app.repositories.reservation_repository import ReservationRepository
+
+SWEEP_BATCH_SIZE = 1000
+
+# Último barrido de reservas vencidas hecho por este proceso
+_swept_at: Optional[datetime] = None
+_sweep_lock = threading.Lock()
+
+
+class ReservationService:
+    """
+    Reservas de stock por tiempo limitado (settings.STOCK_RESERVATIONS_ENABLED).
+
+    Al agregar al carrito se aparta la cantidad por STOCK_RESERVATION_TTL_SECONDS; cada
+    cambio en el carrito la renueva. El stock disponible para un usuario es
+    `stock_current - reservas vigentes de los demás`, sumadas con un índice. El checkout
+    convierte la reserva sin bloquear el producto (ver OrderService).
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = ReservationRepository(db)
+        self.product_repository = ProductRepository(db)
+
+    def reserve(self, user_id: int, quantities: Dict[int, int]) -> None:
+        """
+        Fija las reservas del usuario ({product_id: cantidad total en el carrito}; 0 la libera).
+        Lanza ValueError si algún producto no existe o no tiene disponible esa cantidad.
+        """
+        self.sweep_if_due()
+        now = datetime.utcnow()
+        wanted = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+
+        # Bloqueo corto (solo esta transacción) para que dos reservas del último
+        # disponible no pasen a la vez
+        stock = self.product_repository.get_stock_levels(wanted, for_update=True)
+        missing = sorted(product_id for product_id in wanted if product_id not in stock)
+        if missing:
+            self.db.rollback()
+            raise ValueError(f"Product not found: {', '.join(str(product_id) for product_id in missing)}")
+
+        others = self.repository.reserved_by_others(wanted, user_id, now)
+        short = [
+            f"{product_id} (disponible: {max(stock[product_id] - others.get(product_id, 0), 0)}, pedido: {quantity})"
+            for product_id, quantity in sorted(wanted.items())
+            if quantity > stock[product_id] - others.get(product_id, 0)
+        ]
+        if short:
+            self.db.rollback()
+            raise ValueError(f"Stock insuficiente para los productos {', '.join(short)}.")
+
+        expires_at = now + timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS)
+        self.repository.set_user_reservations(user_id, quantities, expires_at)
+        self.db.commit()
+
+    def release(self, user_id: int, product_ids: Optional[Iterable[int]] = None) -> None:
+        self.repository.release(user_id, product_ids)
+        self.db.commit()
+
+    def sweep_if_due(self) -> None:
+        """Barrido de reservas vencidas, como mucho una vez cada STOCK_RESERVATION_SWEEP_SECONDS por proceso."""
+        global _swept_at
+        now = datetime.utcnow()
+        if _swept_at is not None and now - _swept_at < timedelta(seconds=settings.STOCK_RESERVATION_SWEEP_SECONDS):
+            return
+        if not _sweep_lock.acquire(blocking=False):
+            return
+        try:
+            _swept_at = now
+            self.sweep(now)
+        finally:
+            _sweep_lock.release()
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """
+        Borra las reservas vencidas por lotes (no cambian el disponible: ya no cuentan).
+        Cada lote es una transacción corta sobre el índice de vencimiento.
+        """
+        now = now or datetime.utcnow()
+        deleted = 0
+        while True:
+            batch = self.repository.delete_expired(now, SWEEP_BATCH_SIZE)
+            self.db.commit()
+            deleted += batch
+            if batch < SWEEP_BATCH_SIZE:
+                return deleted
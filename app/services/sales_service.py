@@ -0,0 +1,60 @@
+import threading
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.pagination import encode_cursor, decode_cursor
+from app.repositories.sales_repository import SalesRepository
+from app.schemas.product import BestsellerItem
+
+# Día para el que este proceso ya verificó las ventanas móviles
+_windows_checked_on: Optional[date] = None
+_windows_lock = threading.Lock()
+
+
+class SalesService:
+    """
+    Rankings de ventas por producto.
+
+    Los contadores se actualizan al confirmar cada orden (ver OrderService), así que
+    leer un ranking es recorrer un índice, no agregar order_items. Las ventanas de 7 y
+    30 días se recalculan una vez por día, en la primera lectura (o con la CLI).
+    """
+
+    def __init__(self, db: Session):
+        self.repository = SalesRepository(db)
+
+    def refresh_windows_if_stale(self) -> None:
+        global _windows_checked_on
+        today = datetime.utcnow().date()
+        if _windows_checked_on == today:
+            return
+        with _windows_lock:
+            if _windows_checked_on != today:
+                # Idempotente: otro proceso puede haberlas recalculado ya hoy
+                self.repository.refresh_windows(today)
+                _windows_checked_on = today
+
+    def get_bestsellers(
+        self, window: str, limit: int, cursor: Optional[str] = None, category: Optional[str] = None
+    ) -> Tuple[List[BestsellerItem], Optional[str]]:
+        """Página del ranking de la ventana dada ('total', '7d' o '30d') y el cursor siguiente."""
+        self.refresh_windows_if_stale()
+
+        scope = f"bestsellers:{window}:{category or ''}"
+        # Lanza InvalidCursorError (ValueError) si el cursor no es válido
+        after = decode_cursor(cursor, scope)
+        rows = self.repository.list_bestsellers(window, limit + 1, after=after, category=category)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, units = rows[-1]
+            next_cursor = encode_cursor(scope, units, last.id)
+
+        items = [
+            BestsellerItem.model_validate({"product": row, "units_sold": units}, from_attributes=True)
+            for row, units in rows
+        ]
+        return items, next_cursor
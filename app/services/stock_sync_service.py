@@ -0,0 +1,85 @@
+from typing import Dict, List
+
+from sqlalchemy import exc
+from sqlalchemy.orm import Session
+
+from app.repositories.product_repository import ProductRepository
+from app.schemas.product import StockAdjustment, StockRejection, StockSyncReport
+from app.services.catalog_cache import catalog_cache
+
+STOCK_SYNC_CHUNK_SIZE = 1000
+
+
+class StockSyncError(Exception):
+    """Falló la transacción de la sincronización (ya revertida)."""
+
+
+class StockSyncService:
+    """
+    Sincronización masiva de stock desde el sistema de depósito.
+
+    Todo el lote se aplica en una sola transacción: por cada bloque de SKUs se bloquean
+    las filas con un SELECT ... FOR UPDATE y se escriben los nuevos niveles con un único
+    UPDATE ... CASE, en vez de un SELECT + UPDATE + COMMIT por producto.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = ProductRepository(db)
+
+    def sync_stock(self, adjustments: List[StockAdjustment]) -> StockSyncReport:
+        """
+        Aplica valores absolutos (`stock_current`) o variaciones (`delta`).
+        Las entradas de un mismo SKU se aplican en el orden recibido; las que dejarían
+        el stock en negativo (check_stock_non_negative) se rechazan sin frenar el resto.
+        """
+        report = StockSyncReport()
+        by_sku: Dict[str, List[StockAdjustment]] = {}
+        for adjustment in adjustments:
+            by_sku.setdefault(adjustment.sku, []).append(adjustment)
+
+        # Orden fijo de bloqueo: dos sincronizaciones simultáneas no se bloquean mutuamente
+        skus = sorted(by_sku)
+        changed_ids = []
+
+        try:
+            for start in range(0, len(skus), STOCK_SYNC_CHUNK_SIZE):
+                chunk = skus[start:start + STOCK_SYNC_CHUNK_SIZE]
+                current = self.repository.get_stock_for_update(chunk)
+                levels = {}
+
+                for sku in chunk:
+                    if sku not in current:
+                        report.missing.append(sku)
+                        continue
+
+                    product_id, stock = current[sku]
+                    target, accepted = stock, False
+                    for adjustment in by_sku[sku]:
+                        value = adjustment.stock_current if adjustment.delta is None else target + adjustment.delta
+                        if value < 0:
+                            report.rejected.append(StockRejection(
+                                sku=sku,
+                                reason=f"El stock quedaría en {value} (actual {target}) y no puede ser negativo.",
+                            ))
+                            continue
+                        target, accepted = value, True
+
+                    if target != stock:
+                        levels[product_id] = target
+                        report.changed.append(sku)
+                    elif accepted:
+                        # Sin cambios: no se toca la fila (ni su updated_at / ETag)
+                        report.unchanged += 1
+
+                self.repository.set_stock_levels(levels)
+                changed_ids.extend(levels)
+
+            self.db.commit()
+        except exc.SQLAlchemyError as e:
+            self.db.rollback()
+            print(f"Error en BD durante la sincronización de stock: {e}")
+            raise StockSyncError("Falló la sincronización de stock. Se revirtieron los cambios.") from e
+
+        catalog_cache.invalidate_products(changed_ids)
+        return report
@@ -0,0 +1,125 @@
+"""
+Benchmark: listados del catálogo en la BD vs. el motor columnar en memoria.
+
+Carga N productos y mide, para varias combinaciones de filtro y orden, el tiempo
+medio de ProductRepository.list_rows y de CatalogSnapshot.query (página de 20 y
+listado completo). La columna "1ª" es la primera consulta de cada orden sobre el
+snapshot, que incluye armar su índice. También informa lo que tarda la carga inicial
+del snapshot y un refresco incremental tras modificar 100 productos.
+
+Uso (desde la raíz del repo; requiere numpy):
+    python -m benchmarks.bench_columnar_catalog --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+QUERIES = {
+    "precio asc, página": dict(sort_by="price", limit=21),
+    "precio desc, página": dict(sort_by="price", order="desc", limit=21),
+    "categoría + rango, por fecha": dict(categories=["Cat 3"], price_min=100, price_max=300, sort_by="created_at", limit=21),
+    "stock Alerta, por margen": dict(stock_status=["Alerta"], sort_by="stock_status", limit=21),
+    "categoría completa": dict(categories=["Cat 7"]),
+}
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench_columnar.db"
+
+    # Importamos después de fijar DATABASE_URL: el engine se crea al importar
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import upgrade_schema
+    from app.models import Category, Product
+    from app.repositories.product_repository import ProductRepository
+    from app.schemas.product import ProductFilterParams
+    from app.services.columnar_catalog import ColumnarCatalog
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    categories = [Category(name=f"Cat {i}") for i in range(20)]
+    db.add_all(categories)
+    db.commit()
+    category_ids = [category.id for category in categories]
+    db.close()
+
+    base = datetime(2024, 1, 1)
+    loaded = 0
+    print(f"{'filas':>10}  {'consulta':<30}{'BD ms':>10}{'numpy ms':>10}{'x':>8}{'1ª ms':>10}")
+    for size in sorted(args.sizes):
+        db = SessionLocal()
+        for start in range(loaded, size, 50000):
+            db.bulk_insert_mappings(Product, [
+                {
+                    "name": f"Producto {(i * 7919) % size}",
+                    "description": f"Descripción del producto {i}",
+                    "price": float((i * 31) % 1000),
+                    "category_id": category_ids[i % len(category_ids)],
+                    "sku": f"COL-{i:08d}",
+                    "stock_current": i % 40,
+                    "stock_min": 10,
+                    "rating": i % 5,
+                    "created_at": base + timedelta(minutes=i),
+                    "updated_at": base + timedelta(minutes=i),
+                }
+                for i in range(start, min(start + 50000, size))
+            ])
+            db.commit()
+        db.close()
+        loaded = size
+
+        catalog = ColumnarCatalog(enabled=True, refresh_seconds=3600, full_reload_seconds=3600)
+        load_ms, snapshot = timed(catalog.current, 1)
+        print(f"{size:>10}  {'carga del snapshot':<30}{'':>10}{load_ms:>10.1f}")
+
+        for label, params in QUERIES.items():
+            params = dict(params)
+            limit = params.pop("limit", None)
+            filters = ProductFilterParams(**params)
+            db = SessionLocal()
+            repository = ProductRepository(db)
+            db_ms, expected = timed(lambda: repository.list_rows(
+                category=filters.categories[0] if filters.categories else None,
+                min_price=filters.price_min, max_price=filters.price_max,
+                stock_status=filters.stock_status, sort_by=filters.sort_by,
+                order=filters.order, limit=limit,
+            ), args.repeat)
+            db.close()
+            # La primera consulta de cada orden arma su índice; se mide aparte
+            first_ms, _ = timed(lambda: snapshot.query(filters, limit), 1)
+            np_ms, rows = timed(lambda: snapshot.query(filters, limit), args.repeat)
+            if limit is not None:
+                assert [row.id for row in rows] == [row.id for row in expected], label
+            print(f"{size:>10}  {label:<30}{db_ms:>10.1f}{np_ms:>10.1f}{db_ms / np_ms:>8.1f}{first_ms:>10.1f}")
+
+        db = SessionLocal()
+        ids = [row[0] for row in db.query(Product.id).limit(100)]
+        db.query(Product).filter(Product.id.in_(ids)).update(
+            {Product.price: Product.price + 1, Product.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        db.close()
+        catalog.notify_changes(set(ids))
+        refresh_ms, _ = timed(catalog.current, 1)
+        print(f"{size:>10}  {'refresco (100 cambios)':<30}{'':>10}{refresh_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: checkouts de un único producto flash según el tamaño de lote de FlashSaleQueue.
+
+Muchos hilos compran a la vez el mismo producto a través de la cola. Con lote 1 cada
+orden es su propia transacción (bloqueo, resta, orden, commit), como el checkout
+normal; con lotes más grandes el bloqueo y el commit se reparten entre las órdenes
+acumuladas. Informa órdenes por segundo y el tamaño medio de lote alcanzado.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_flash_sale --batch-sizes 1 10 50 200 --threads 64
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--orders", type=int, default=20, help="órdenes por hilo")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench_flash_sale.db"
+
+    # Importamos después de fijar DATABASE_URL: el engine se crea al importar
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import upgrade_schema
+    from app.models import Cart, Category, Product, User
+    from app.schemas.order import OrderCreate
+    from app.services.flash_sale import FlashSaleOrder, FlashSaleQueue
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    category = Category(name="Flash")
+    db.add(category)
+    db.flush()
+    product = Product(name="Producto flash", price=99.0, category_id=category.id, sku="FLASH-0001",
+                      stock_current=10**9, stock_min=0)
+    users = [
+        User(name=f"u{i}", username=f"flash{i}", email=f"flash{i}@example.com", password="x", role="client")
+        for i in range(args.threads)
+    ]
+    db.add_all([product] + users)
+    db.flush()
+    carts = [Cart(user_id=user.id) for user in users]
+    db.add_all(carts)
+    db.commit()
+    product_id = product.id
+    buyers = [(user.id, cart.id) for user, cart in zip(users, carts)]
+    db.close()
+
+    order_data = OrderCreate(shipping_address="Calle 1", locality="Centro")
+
+    print(f"{'lote máx.':>10}{'órdenes/s':>12}{'lote medio':>12}{'errores':>9}")
+    for batch_size in args.batch_sizes:
+        flash_sale = FlashSaleQueue(batch_size=batch_size)
+
+        def buyer(user_id, cart_id):
+            for _ in range(args.orders):
+                try:
+                    flash_sale.submit(FlashSaleOrder(
+                        user_id=user_id, cart_id=cart_id, quantities={product_id: 1}, order_data=order_data,
+                    ))
+                except Exception:
+                    pass  # ya contado en stats()["errors"]
+
+        workers = [threading.Thread(target=buyer, args=pair) for pair in buyers]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stats = flash_sale.stats()
+        print(
+            f"{batch_size:>10}{stats['orders'] / elapsed:>12.0f}"
+            f"{(stats['orders'] + stats['sold_out']) / max(stats['batches'], 1):>12.1f}{stats['errors']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
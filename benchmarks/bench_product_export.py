@@ -0,0 +1,78 @@
+"""
+Benchmark: memoria de la exportación en streaming según el tamaño del catálogo.
+
+Consume el generador de ProductExportService (como lo haría StreamingResponse)
+y mide el pico de memoria asignada con tracemalloc. Con el cursor del lado del
+servidor el pico debe mantenerse casi constante aunque crezca el catálogo.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_product_export --sizes 10000 50000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench_export.db"
+
+    # Importamos después de fijar DATABASE_URL: el engine se crea al importar
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import upgrade_schema
+    from app.models import Category, Product
+    from app.schemas.product import ProductFilterParams
+    from app.services.product_export_service import ProductExportService
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    category = Category(name="Exportación")
+    db.add(category)
+    db.commit()
+    category_id = category.id
+    db.close()
+
+    service = ProductExportService()
+    loaded = 0
+    print(f"{'filas':>10}{'formato':>10}{'MiB enviados':>14}{'pico KiB':>10}{'ms':>10}")
+    for size in sorted(args.sizes):
+        db = SessionLocal()
+        db.bulk_insert_mappings(Product, [
+            {
+                "name": f"Producto {i}",
+                "description": f"Descripción del producto {i}",
+                "price": float(i % 500),
+                "category_id": category_id,
+                "sku": f"EXP-{i:08d}",
+                "stock_current": i % 40,
+                "stock_min": 10,
+            }
+            for i in range(loaded, size)
+        ])
+        db.commit()
+        db.close()
+        loaded = size
+
+        for file_format in ("ndjson", "csv"):
+            sent = 0
+            tracemalloc.start()
+            start = time.perf_counter()
+            for chunk in service.stream(ProductFilterParams(), file_format):
+                sent += len(chunk)
+            elapsed = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{size:>10}{file_format:>10}{sent / 2**20:>14.1f}{peak / 1024:>10.0f}{elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: listado con objetos ORM (list_filtered) vs proyección de columnas (list_rows).
+
+Mide, por cada 1k filas, la cantidad de consultas SQL, el tiempo y la memoria
+asignada (pico de tracemalloc) incluyendo la validación con ProductResponse.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_product_listing --rows 1000 --categories 50
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import event
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench_listing.db"
+
+    # Importamos después de fijar DATABASE_URL: el engine se crea al importar
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import upgrade_schema
+    from app.models import Category, Product
+    from app.repositories.product_repository import ProductRepository
+    from app.schemas.product import ProductResponse
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    categories = [Category(name=f"Categoría {i}") for i in range(args.categories)]
+    db.add_all(categories)
+    db.flush()
+    db.bulk_insert_mappings(Product, [
+        {
+            "name": f"Producto {i}",
+            "description": f"Descripción del producto {i}",
+            "price": float(i % 500),
+            "category_id": categories[i % len(categories)].id,
+            "sku": f"LIST-{i:08d}",
+            "stock_current": i % 40,
+            "stock_min": 10,
+        }
+        for i in range(args.rows)
+    ])
+    db.commit()
+    db.close()
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    def orm_path(session):
+        products = ProductRepository(session).list_filtered(sort_by="price")
+        return [ProductResponse.model_validate(p, from_attributes=True) for p in products]
+
+    def rows_path(session):
+        rows = ProductRepository(session).list_rows(sort_by="price")
+        return [ProductResponse.model_validate(r, from_attributes=True) for r in rows]
+
+    per_1k = 1000 / args.rows
+    print(f"{args.rows} filas, {args.categories} categorías ({engine.dialect.name}); valores por 1k filas")
+    print(f"{'ruta':<14}{'consultas':>10}{'ms':>10}{'pico KiB':>12}")
+    for label, runner in (("ORM", orm_path), ("proyección", rows_path)):
+        # Consultas y memoria de una ejecución con sesión nueva (como en cada request)
+        session = SessionLocal()
+        statements["count"] = 0
+        tracemalloc.start()
+        runner(session)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        queries = statements["count"]
+        session.close()
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            session = SessionLocal()
+            runner(session)
+            session.close()
+        elapsed = (time.perf_counter() - start) * 1000 / args.repeat
+
+        print(f"{label:<14}{queries * per_1k:>10.0f}{elapsed * per_1k:>10.2f}{peak / 1024 * per_1k:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: búsqueda ILIKE '%término%' (ruta anterior) vs índice de texto completo.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_product_search --products 100000 --repeat 20
+
+Por defecto crea una base SQLite temporal (FTS5). Para medir contra MariaDB
+(índice FULLTEXT) se puede pasar --database-url apuntando a una base vacía.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import or_
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmpdir}/bench_search.db"
+
+    # Importamos después de fijar DATABASE_URL: el engine se crea al importar
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import upgrade_schema
+    from app.models import Category, Product
+    from app.repositories.product_search import ProductSearch
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    words = ["cuaderno", "lapiz", "boligrafo", "carpeta", "mochila", "regla", "tijera",
+             "pegamento", "marcador", "agenda", "calculadora", "compas", "borrador"]
+    colors = ["rojo", "azul", "verde", "negro", "blanco", "amarillo"]
+    rnd = random.Random(42)
+
+    db = SessionLocal()
+    category = Category(name="Bench")
+    db.add(category)
+    db.flush()
+    batch = []
+    for i in range(args.products):
+        name = f"{rnd.choice(words).capitalize()} {rnd.choice(colors)} {i}"
+        batch.append({
+            "name": name,
+            "description": f"{rnd.choice(words)} {rnd.choice(colors)} de uso escolar",
+            "price": round(rnd.uniform(1, 500), 2),
+            "category_id": category.id,
+            "sku": f"BENCH-{i:08d}",
+            "stock_current": rnd.randint(0, 100),
+            "stock_min": 10,
+        })
+        if len(batch) == 5000:
+            db.bulk_insert_mappings(Product, batch)
+            batch.clear()
+    if batch:
+        db.bulk_insert_mappings(Product, batch)
+    db.commit()
+
+    terms = ["cuaderno", "mochila azul", "calcu", "BENCH-0000012"]
+
+    # Ambas rutas devuelven todos los ids que coinciden (como hacía list_filtered con .all())
+    # sobre las mismas columnas; la de texto completo además los ordena por relevancia.
+    def run_ilike(term):
+        query = db.query(Product.id)
+        for word in term.split():
+            pattern = f"%{word}%"
+            query = query.filter(or_(
+                Product.name.ilike(pattern),
+                Product.description.ilike(pattern),
+                Product.sku.ilike(pattern),
+            ))
+        return query.all()
+
+    def run_fulltext(term):
+        search = ProductSearch.build(db, term)
+        return search.apply(db.query(Product.id)).order_by(search.rank, Product.id).all()
+
+    print(f"{args.products} productos, {args.repeat} repeticiones por término ({engine.dialect.name})")
+    print(f"{'término':<16}{'filas':>8}{'ILIKE ms':>12}{'fulltext ms':>14}{'speedup':>10}")
+    for term in terms:
+        timings = []
+        for runner in (run_ilike, run_fulltext):
+            runner(term)  # calentamiento
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                runner(term)
+                db.expunge_all()
+            timings.append((time.perf_counter() - start) * 1000 / args.repeat)
+        rows = len(run_fulltext(term))
+        print(f"{term:<16}{rows:>8}{timings[0]:>12.2f}{timings[1]:>14.2f}{timings[0] / timings[1]:>9.1f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
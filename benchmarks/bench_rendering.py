@@ -0,0 +1,101 @@
+"""
+Micro-benchmark de serialización por esquema de respuesta.
+
+Compara, a partir de objetos con atributos (como los que devuelve el ORM):
+  - jsonable_encoder + json.dumps (ruta clásica de FastAPI)
+  - orjson sobre el dict de pydantic (si orjson está instalado)
+  - SchemaRenderer: TypeAdapter precompilado + dump_json de pydantic-core
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.bench_rendering --items 1000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.rendering import SchemaRenderer
+from app.schemas.cart import CartResponse
+from app.schemas.order import OrderRead
+from app.schemas.product import ProductResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_product(i):
+    return SimpleNamespace(
+        id=i, name=f"Producto {i}", description="Descripción de prueba " * 3, price=9.99 + i,
+        category_id=1, sku=f"SKU-{i:06d}", stock_current=i % 40, stock_min=10,
+        image_url=f"https://example.com/{i}.jpg", rating=4, stock_status="Normal",
+        category=SimpleNamespace(name="Papelería"),
+    )
+
+
+def make_order(i):
+    items = [
+        SimpleNamespace(product_id=j, quantity=2, unit_price=9.99,
+                        product=SimpleNamespace(id=j, name=f"Producto {j}", image_url=None))
+        for j in range(5)
+    ]
+    return SimpleNamespace(
+        id=i, user_id=1, order_date=datetime(2024, 1, 1, 12, 0), status="Pending",
+        shipping_address="Calle Falsa 123", locality="Ciudad", total_amount=99.9, items=items,
+    )
+
+
+def make_cart(items):
+    return SimpleNamespace(id=1, user_id=1, items=[
+        SimpleNamespace(product_id=i, quantity=1, product=make_product(i)) for i in range(items)
+    ])
+
+
+def bench(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("List[ProductResponse]", List[ProductResponse], [make_product(i) for i in range(args.items)]),
+        ("List[OrderRead]", List[OrderRead], [make_order(i) for i in range(args.items)]),
+        ("CartResponse", CartResponse, make_cart(min(args.items, 50))),
+    ]
+
+    print(f"ms por respuesta ({args.items} elementos, {args.repeat} repeticiones)")
+    print(f"{'esquema':<24}{'jsonable+json':>15}{'orjson':>10}{'renderer':>10}")
+    for label, schema, data in cases:
+        adapter = TypeAdapter(schema)
+        renderer = SchemaRenderer(schema)
+
+        def classic():
+            validated = adapter.validate_python(data, from_attributes=True)
+            return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+        def with_orjson():
+            validated = adapter.validate_python(data, from_attributes=True)
+            return orjson.dumps(adapter.dump_python(validated))
+
+        classic_ms = bench(classic, args.repeat)
+        orjson_ms = bench(with_orjson, args.repeat) if orjson is not None else float("nan")
+        renderer_ms = bench(lambda: renderer.render(data), args.repeat)
+        print(f"{label:<24}{classic_ms:>15.2f}{orjson_ms:>10.2f}{renderer_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()